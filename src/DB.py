@@ -1,111 +1,1032 @@
+from __future__ import annotations
+
 import argparse
 import os
+import sys
 from argparse import ArgumentParser, Namespace
+from typing import TYPE_CHECKING
+
+from database import WAL_COMPACT_BYTES, compact, read_nodes, store_node
+from logger import LOG_LEVELS
+
+# The tree and storage modules are imported by the commands that use them,
+# so the arguments are parsed before any of them is loaded.
+if TYPE_CHECKING:
+    from collections.abc import Iterator
 
-from avl_tree import AVLTree, Node
-from storage import StoreAVLTree
+    from avl_tree import AVLTree, Node
+    from storage import MappedKeyBlock
 
 
-def store_node(root: Node, filename: str) -> None:
+def add(
+    key: int,
+    filename: str,
+    compact_bytes: int = WAL_COMPACT_BYTES,
+    value: bytes | None = None,
+) -> None:
     """
-    Store the AVL tree in the DB file.
+    Add a node to the DB.\n
+    The key is appended to the write-ahead log, which is compacted once it reaches compact_bytes.
+    A DB file with a Bloom filter skips the keys, it already has.
+    Paged DB files are changed in place instead, see add_paged.
 
     Attributes:
-        root (Node): Root node of the AVL tree.
+        key (int): Value of the node.
         filename (str): Path to the DB file.
+        compact_bytes (int): Size of the write-ahead log, that triggers a compaction.
+        value (bytes | None): Payload of the key, only stored by paged DB files.
 
     Returns:
         None
     """
+    from avl_tree import AVLTree
+    from bloom import may_contain, read_header
+    from container import exists
+    from storage import StoreAVLTree
+
     storage: StoreAVLTree = StoreAVLTree()
-    # Serialize the AVL tree into a node str
-    nodes: str = storage.serialize(root=root)
-    # Save the node str in the DB file.
-    filename = filename.split(sep="./DB/")[1]
-    storage.store(nodes=nodes, filename=filename)
 
+    # A new DB file with a value is paged.
+    if value is not None or storage.detect_format(filename=filename) == "paged":
+        add_paged(key=key, value=value, filename=filename)
+        return
+
+    created: bool = False
+
+    # Only one of several concurrent writers creates the DB file.
+    if not exists(filename=filename):
+        with storage.lock(filename=filename):
+            created = not exists(filename=filename)
+            if created:
+                tree: AVLTree = AVLTree(key=key)
+                store_node(root=tree.node, filename=filename)
+
+    if created:
+        tree.show(node=tree.node)
+        return
+
+    # With a Bloom filter, most new keys skip the lookup, and duplicates aren't logged again.
+    if (
+        read_header(filename=filename)
+        and may_contain(filename=filename, key=key)
+        and contains_key(key=key, filename=filename)
+    ):
+        print(f"\nKey {key} already exists.\n")
+        return
 
-def read_nodes(filename: str) -> AVLTree:
+    size: int = storage.append_log(key=key, filename=filename)
+
+    if size >= compact_bytes:
+        compact(filename=filename, min_bytes=compact_bytes)
+
+    print(f"\nKey {key} added.\n")
+
+
+def add_paged(key: int, value: bytes | None, filename: str) -> None:
     """
-    Retrieve the AVL tree from the DB.
+    Add a node with a value to a paged DB file, or replace the value of an existing key.\n
+    Only the pages on the insert path are read and written, under the lock of the DB file.
 
-    Attibutes:
+    Attributes:
+        key (int): Value of the node.
+        value (bytes | None): Payload of the key, None keeps the value of an existing key.
         filename (str): Path to the DB file.
 
     Returns:
-        AVLTree
+        None
     """
-    storage: StoreAVLTree = StoreAVLTree()
-    # Retrieve the DB file and get the node str.
-    nodes: str = storage.read(filename=filename)
-    # Deserialize the node str and get the AVL tree.
-    tree: AVLTree = storage.deserialize(nodes=nodes)
-    return tree
+    from bloom import add_key, sync_bloom
+    from cache import TREES
+    from container import exists, is_tree_path
+    from paged_tree import PagedAVLTree, is_paged
+    from storage import StoreAVLTree
+
+    if is_tree_path(filename=filename):
+        print("\nOnly paged DB files store values, the trees of a container can't.\n")
+        return
 
+    with StoreAVLTree().lock(filename=filename):
+        created: bool = not exists(filename=filename)
+        if not created and not is_paged(filename=filename):
+            print("\nOnly paged DB files store values, convert it with --to paged.\n")
+            return
 
-def add(key: int, filename: str) -> None:
+        # The Bloom filter covers the key, before the page file does.
+        add_key(filename=filename, key=key)
+        sync_bloom(filename=filename)
+
+        try:
+            with PagedAVLTree(filename=filename) as tree:
+                added: bool = tree.insert(key=key, value=value)
+        except ValueError as error:
+            # A value, that doesn't fit in a page, doesn't leave an empty DB file behind.
+            if created:
+                os.remove(path=filename)
+            print(f"\n{error}\n")
+            return
+
+    # The page file is changed in place, possibly within the same mtime and size.
+    TREES.invalidate(filename=filename)
+
+    if added:
+        print(f"\nKey {key} added.\n")
+    elif value is None:
+        print(f"\nKey {key} already exists.\n")
+    else:
+        print(f"\nValue of key {key} replaced.\n")
+
+
+def delete(low: int, high: int, filename: str) -> None:
     """
-    Add a node and visualize the added node.
+    Delete the keys between low and high (inclusive) from the DB.\n
+    The write-ahead log can only replay added keys, so it's compacted into the DB file
+    with the keys removed, under the lock of the DB file.
 
     Attributes:
-        key (int): Value of the node.
+        low (int): Lower bound of the keys, a single key is deleted when low equals high.
+        high (int): Upper bound of the keys.
         filename (str): Path to the DB file.
 
     Returns:
         None
     """
-    if not os.path.exists(path=filename):
-        tree: AVLTree = AVLTree(key=key)
-        store_node(root=tree.node, filename=filename)
-        tree.show(node=tree.node)
-    else:
+    from cache import TREES
+    from container import exists
+    from storage import StoreAVLTree
+
+    storage: StoreAVLTree = StoreAVLTree()
+
+    with storage.lock(filename=filename):
+        if not exists(filename=filename):
+            print("\nDB file give, doesn't exist.\n")
+            return
+
+        # The tree is changed, so it isn't shared with the cache.
         tree: AVLTree = read_nodes(filename=filename)
-        tree.insert(key=key)
+        removed: int = tree.count(low=low, high=high)
+
+        if not removed:
+            print(
+                f"\nKey {low} not found.\n"
+                if low == high
+                else f"\nNo keys between {low} and {high}.\n"
+            )
+            return
+
+        if removed == len(tree):
+            # An AVL tree can't be empty, so the DB file is removed instead.
+            storage.remove(filename=filename)
+            storage.clear_log(filename=filename)
+            storage.store_bloom(bloom=None, filepath=filename)
+            TREES.invalidate(filename=filename)
+            print("\nEvery key is deleted, the DB file was removed.\n")
+            return
+
+        if low == high:
+            tree.delete(key=low)
+        else:
+            tree.delete_range(low=low, high=high)
+
         store_node(root=tree.node, filename=filename)
+        # The deleted keys would be replayed from the write-ahead log otherwise.
+        storage.clear_log(filename=filename)
 
-        saved_tree: AVLTree = read_nodes(filename=filename)
-        saved_tree.show(node=saved_tree.node)
+    print(f"\nKey {low} deleted.\n" if low == high else f"\n{removed} keys deleted.\n")
 
 
-def show(filename: str) -> None:
+def show(
+    filename: str,
+    depth: int | None = None,
+    limit: int | None = None,
+    from_key: int | None = None,
+) -> None:
     """
     Retrieve the AVL tree and visualize the tree.
 
     Attributes:
         filename (str): Path to the DB file.
+        depth (int | None): Number of levels rendered.
+        limit (int | None): Max number of nodes rendered.
+        from_key (int | None): Only render the subtree of this key.
 
     Returns:
         None
     """
-    if os.path.exists(path=filename):
-        tree: AVLTree = read_nodes(filename=filename)
-        tree.show(node=tree.node)
+    from container import exists
+
+    if not exists(filename=filename):
+        print("\nDB file give, doesn't exist.\n")
+        return
+
+    tree: AVLTree = read_nodes(filename=filename, cache=True)
+    node: Node | None = tree.node if from_key is None else tree.find(key=from_key)
+
+    if node is None:
+        print(f"\nKey {from_key} not found.\n")
+        return
+
+    try:
+        tree.show(node=node, depth=depth, limit=limit)
+        sys.stdout.flush()
+    except BrokenPipeError:
+        # The pager was closed early, the rest of the output is dropped silently.
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+
+
+def convert(filename: str, format: str) -> None:
+    """
+    Rewrite the DB file in the given format.
+
+    Attributes:
+        filename (str): Path to the DB file.
+        format (str): Either text, binary, compressed or paged, only paged DB files keep values.
+
+    Returns:
+        None
+    """
+    from container import exists, is_tree_path
+    from storage import StoreAVLTree
+
+    if format == "paged" and is_tree_path(filename=filename):
+        print("\nThe trees of a container can't be paged.\n")
+    elif exists(filename=filename):
+        storage: StoreAVLTree = StoreAVLTree()
+
+        with storage.lock(filename=filename):
+            tree: AVLTree = read_nodes(filename=filename, cache=True)
+            store_node(root=tree.node, filename=filename, format=format)
+            storage.clear_log(filename=filename)
+
+        print(f"\nDB file converted to {format}.\n")
     else:
         print("\nDB file give, doesn't exist.\n")
 
 
+def import_keys(source: str, filename: str, chunk_size: int) -> None:
+    """
+    Bulk import keys into the DB, the tree is rebuilt balanced without any rotations.\n
+    If the DB file exists, its keys are merged with the imported keys.
+
+    Attributes:
+        source (str): Path to a file of keys, or - for stdin.
+        filename (str): Path to the DB file.
+        chunk_size (int): Max number of keys sorted in memory at once.
+
+    Returns:
+        None
+    """
+    import heapq
+
+    from avl_tree import AVLTree
+    from container import exists
+    from storage import StoreAVLTree
+    from utils import parse_keys, sorted_unique
+
+    storage: StoreAVLTree = StoreAVLTree()
+
+    # The DB file is locked, so no key is added between reading and replacing it.
+    with (
+        open(file=source, mode="r") if source != "-" else sys.stdin as lines,
+        storage.lock(filename=filename),
+    ):
+        imported: Iterator[int] = sorted_unique(
+            keys=parse_keys(lines=lines), chunk_size=chunk_size
+        )
+
+        # Merge the sorted keys of the existing tree with the imported keys.
+        keys: Iterator[int] = imported
+        if exists(filename=filename):
+            existing: AVLTree = read_nodes(filename=filename, cache=True)
+            keys = heapq.merge(existing.inorder(), imported)
+
+        # Drop the keys, that are in both the DB and the import.
+        merged: list[int] = []
+        for key in keys:
+            if not merged or merged[-1] != key:
+                merged.append(key)
+
+        if not merged:
+            print("\nNo keys to import.\n")
+            return
+
+        tree: AVLTree = AVLTree.from_sorted(keys=merged)
+        store_node(root=tree.node, filename=filename)
+        # The keys of the write-ahead log are in the DB file now.
+        storage.clear_log(filename=filename)
+
+    print(f"\n{len(merged)} keys stored in the DB.\n")
+
+
+def read_key_block(filename: str) -> tuple[MappedKeyBlock, list[int]] | None:
+    """
+    Maps the sorted key block of the DB file, instead of building the AVL tree.
+
+    Attributes:
+        filename (str): Path to the DB file.
+
+    Returns:
+        tuple[MappedKeyBlock, list[int]] | None: The key block, and the sorted keys of the
+        write-ahead log that are not in it. None if the DB file has no key block.
+    """
+    from storage import MappedKeyBlock, StoreAVLTree
+
+    # The log is read before the DB file, like read_nodes.
+    logged: set[int] = set(StoreAVLTree().read_log(filename=filename))
+    block: MappedKeyBlock | None = MappedKeyBlock.open(filename=filename)
+
+    if block is None:
+        return None
+
+    return block, sorted(key for key in logged if not block.contains(key=key))
+
+
+def contains_key(key: int, filename: str) -> bool:
+    """
+    Checks whether the key exists in a binary, compressed or text DB file.\n
+    The sorted key block is searched in place, otherwise the tree is read.
+
+    Attributes:
+        key (int): Value of the node.
+        filename (str): Path to the DB file.
+
+    Returns:
+        bool: True if the key exists.
+    """
+    mapped: tuple[MappedKeyBlock, list[int]] | None = read_key_block(filename=filename)
+
+    if mapped:
+        block, logged = mapped
+        with block:
+            return block.contains(key=key) or key in logged
+
+    return read_nodes(filename=filename, cache=True).contains(key=key)
+
+
+def get(key: int, filename: str) -> None:
+    """
+    Checks whether the key exists in the DB.\n
+    The Bloom filter of the DB file answers most missing keys, without reading it.
+
+    Attributes:
+        key (int): Value of the node.
+        filename (str): Path to the DB file.
+
+    Returns:
+        None
+    """
+    from bloom import may_contain
+    from container import exists
+    from paged_tree import is_paged
+
+    if exists(filename=filename) and not may_contain(filename=filename, key=key):
+        print(f"\nKey {key} not found.\n")
+    elif is_paged(filename=filename):
+        from paged_tree import PagedAVLTree
+        from storage import StoreAVLTree
+
+        storage: StoreAVLTree = StoreAVLTree()
+
+        # Only the pages on the search path are read. Keys added through append_log, like
+        # the server does, are only in the write-ahead log until it's compacted.
+        with (
+            storage.lock(filename=filename),
+            PagedAVLTree(filename=filename) as tree,
+        ):
+            value: bytes | None = tree.get(key=key)
+            if value is None and key in storage.read_log(filename=filename):
+                value = b""
+
+        if value is None:
+            print(f"\nKey {key} not found.\n")
+        elif value:
+            print(f"\nKey {key} found: {value.decode(errors='replace')}\n")
+        else:
+            print(f"\nKey {key} found.\n")
+    elif exists(filename=filename):
+        if contains_key(key=key, filename=filename):
+            print(f"\nKey {key} found.\n")
+        else:
+            print(f"\nKey {key} not found.\n")
+    else:
+        print("\nDB file give, doesn't exist.\n")
+
+
+def range_keys(low: int, high: int, filename: str) -> None:
+    """
+    Streams the keys between low and high (inclusive), one per line.
+
+    Attributes:
+        low (int): Lower bound of the keys.
+        high (int): Upper bound of the keys.
+        filename (str): Path to the DB file.
+
+    Returns:
+        None
+    """
+    import heapq
+
+    from container import exists
+    from paged_tree import is_paged
+
+    if is_paged(filename=filename):
+        from paged_tree import PagedAVLTree
+        from storage import StoreAVLTree
+
+        storage: StoreAVLTree = StoreAVLTree()
+
+        # The keys are streamed from the pages, without loading the whole tree, and merged
+        # with the keys of the write-ahead log that aren't in the pages yet.
+        with (
+            storage.lock(filename=filename),
+            PagedAVLTree(filename=filename) as paged,
+        ):
+            pending: list[int] = sorted(
+                key
+                for key in set(storage.read_log(filename=filename))
+                if low <= key <= high and not paged.contains(key=key)
+            )
+            for key in heapq.merge(paged.range(low=low, high=high), pending):
+                sys.stdout.write(f"{key}\n")
+    elif exists(filename=filename):
+        mapped: tuple[MappedKeyBlock, list[int]] | None = read_key_block(
+            filename=filename
+        )
+
+        if mapped:
+            block, logged = mapped
+            with block:
+                keys = heapq.merge(
+                    block.range(low=low, high=high),
+                    (key for key in logged if low <= key <= high),
+                )
+                for key in keys:
+                    sys.stdout.write(f"{key}\n")
+        else:
+            tree: AVLTree = read_nodes(filename=filename, cache=True)
+            for key in tree.range(low=low, high=high):
+                sys.stdout.write(f"{key}\n")
+    else:
+        print("\nDB file give, doesn't exist.\n")
+
+
+def order_statistic(command: str, args: Namespace) -> None:
+    """
+    Answers the rank, select and count commands.
+
+    Attributes:
+        command (str): Either rank, select or count.
+        args (Namespace): Parsed arguments of the command.
+
+    Returns:
+        None
+    """
+    from container import exists
+
+    if not exists(filename=args.filename):
+        print("\nDB file give, doesn't exist.\n")
+        return
+
+    if command == "count":
+        mapped: tuple[MappedKeyBlock, list[int]] | None = read_key_block(
+            filename=args.filename
+        )
+
+        if mapped:
+            block, logged = mapped
+            with block:
+                count: int = block.count(low=args.low, high=args.high)
+            count += sum(1 for key in logged if args.low <= key <= args.high)
+            print(f"\n{count} keys between {args.low} and {args.high}.\n")
+            return
+
+    tree: AVLTree = read_nodes(filename=args.filename, cache=True)
+
+    if command == "rank":
+        print(f"\n{tree.rank(key=args.key)} keys are less than {args.key}.\n")
+    elif command == "select":
+        if 0 <= args.k < len(tree):
+            print(f"\nKey {args.k}: {tree.select(k=args.k)}\n")
+        else:
+            print(f"\nThe DB has {len(tree)} keys.\n")
+    elif command == "count":
+        count = tree.count(low=args.low, high=args.high)
+        print(f"\n{count} keys between {args.low} and {args.high}.\n")
+
+
+def set_operation(operation: str, first: str, second: str, output: str) -> None:
+    """
+    Combines the keys of two DB files, and stores the result in a new DB file.
+
+    Attributes:
+        operation (str): Either union, intersection or difference.
+        first (str): Path to the first DB file.
+        second (str): Path to the second DB file.
+        output (str): Path to the new DB file.
+
+    Returns:
+        None
+    """
+    from container import exists
+    from storage import StoreAVLTree
+
+    for filename in (first, second):
+        if not exists(filename=filename):
+            print(f"\nDB file {filename} doesn't exist.\n")
+            return
+
+    # The set operations consume both trees, so they aren't shared with the cache.
+    tree: AVLTree = read_nodes(filename=first)
+    result: AVLTree | None = getattr(tree, operation)(
+        read_nodes(filename=second)
+    )
+
+    if result is None:
+        print("\nThe result has no keys, no DB file was stored.\n")
+        return
+
+    storage: StoreAVLTree = StoreAVLTree()
+
+    with storage.lock(filename=output):
+        store_node(root=result.node, filename=output)
+        # A stale write-ahead log of the output would replay its keys into the result.
+        storage.clear_log(filename=output)
+
+    print(f"\n{len(result)} keys stored in {output}.\n")
+
+
+def stats(filename: str, as_json: bool = False) -> None:
+    """
+    Loads the DB file with the metrics enabled, and prints the shape of the AVL tree with the metrics.
+
+    Attributes:
+        filename (str): Path to the DB file.
+        as_json (bool): Print a JSON object, instead of text.
+
+    Returns:
+        None
+    """
+    import json
+
+    from container import exists, size
+    from metrics import METRICS, configure_metrics, format_snapshot
+    from storage import StoreAVLTree, wal_path
+
+    if not exists(filename=filename):
+        print("\nDB file give, doesn't exist.\n")
+        return
+
+    configure_metrics(enabled=True)
+    # A cached tree would leave the load out of the metrics.
+    tree: AVLTree = read_nodes(filename=filename)
+    # The trees of a container share its write-ahead log.
+    wal: str = wal_path(filename=filename)
+
+    summary: dict = {
+        "keys": len(tree),
+        "height": tree.node.height,
+        "format": StoreAVLTree().detect_format(filename=filename),
+        "file_bytes": size(filename=filename),
+        "wal_bytes": os.path.getsize(wal) if os.path.exists(path=wal) else 0,
+    }
+    snapshot: dict = METRICS.snapshot()
+
+    if as_json:
+        print(json.dumps({**summary, **snapshot}, indent=2))
+        return
+
+    print()
+    for name, value in summary.items():
+        print(f"{name:<34} {value}")
+    print(f"\n{format_snapshot(snapshot=snapshot)}\n")
+
+
+def vacuum(filename: str) -> None:
+    """
+    Reclaims the dead space of a container file, left by rewritten and removed trees.
+
+    Attributes:
+        filename (str): Path to the container file.
+
+    Returns:
+        None
+    """
+    from container import is_container, reclaim
+    from storage import StoreAVLTree
+
+    if not os.path.exists(path=filename):
+        print("\nDB file give, doesn't exist.\n")
+        return
+    if not is_container(filename=filename):
+        print(f"\nDB file {filename} doesn't hold named trees.\n")
+        return
+
+    # Writers of every tree take the lock of the container, to update the catalog.
+    with StoreAVLTree().lock(filename=filename):
+        trees, reclaimed = reclaim(filename=filename)
+
+    print(f"\n{trees} trees kept, {reclaimed} bytes reclaimed.\n")
+
+
+def resolve_trees(args: Namespace) -> bool:
+    """
+    Points the DB file arguments at the tree of --tree, inside their container files.
+
+    Attributes:
+        args (Namespace): Arguments parsed by main, changed in place.
+
+    Returns:
+        bool: False if a DB file argument doesn't fit --tree, the command isn't run then.
+    """
+    from container import is_container, tree_path
+
+    for name in ("filename", "first", "second", "output"):
+        filename: str | None = getattr(args, name, None)
+        if filename is None:
+            continue
+
+        if args.tree is None:
+            if is_container(filename=filename):
+                print(f"\nDB file {filename} holds named trees, pick one with --tree.\n")
+                return False
+            continue
+
+        if os.path.exists(path=filename) and not is_container(filename=filename):
+            print(f"\nDB file {filename} doesn't hold named trees.\n")
+            return False
+
+        try:
+            setattr(args, name, tree_path(filename=filename, tree=args.tree))
+        except ValueError as error:
+            print(f"\n{error}\n")
+            return False
+
+    return True
+
+
+def run(args: Namespace) -> None:
+    """
+    Runs the subcommand of the parsed arguments.
+
+    Attributes:
+        args (Namespace): Arguments parsed by main.
+
+    Returns:
+        None
+    """
+    if args.command == "vacuum":
+        vacuum(filename=args.filename)
+        return
+
+    if not resolve_trees(args=args):
+        return
+
+    if args.command == "show":
+        show(
+            filename=args.filename,
+            depth=args.depth,
+            limit=args.limit,
+            from_key=args.from_key,
+        )
+    elif args.command == "add":
+        add(
+            key=args.key,
+            filename=args.filename,
+            value=args.value.encode() if args.value is not None else None,
+        )
+    elif args.command == "delete":
+        delete(low=args.key, high=args.key, filename=args.filename)
+    elif args.command == "delete-range":
+        delete(low=args.low, high=args.high, filename=args.filename)
+    elif args.command == "get":
+        get(key=args.key, filename=args.filename)
+    elif args.command == "range":
+        range_keys(low=args.low, high=args.high, filename=args.filename)
+    elif args.command in ("rank", "select", "count"):
+        order_statistic(command=args.command, args=args)
+    elif args.command in ("merge", "intersect", "diff"):
+        operations: dict[str, str] = {
+            "merge": "union",
+            "intersect": "intersection",
+            "diff": "difference",
+        }
+        set_operation(
+            operation=operations[args.command],
+            first=args.first,
+            second=args.second,
+            output=args.output,
+        )
+    elif args.command == "serve":
+        import asyncio
+
+        from server import DEFAULT_PORT, DBServer
+
+        port: int = DEFAULT_PORT if args.port is None else args.port
+        asyncio.run(DBServer().serve(host=args.host, port=port, path=args.socket))
+    elif args.command == "convert":
+        convert(filename=args.filename, format=args.to)
+    elif args.command == "compact":
+        from container import exists
+
+        if exists(filename=args.filename):
+            compact(filename=args.filename)
+        else:
+            print("\nDB file give, doesn't exist.\n")
+    elif args.command == "import":
+        import_keys(
+            source=args.source, filename=args.filename, chunk_size=args.chunk_size
+        )
+    elif args.command == "stats":
+        stats(filename=args.filename, as_json=args.json)
+
+
 def main() -> None:
     parser: ArgumentParser = argparse.ArgumentParser(description="DB Management System")
 
-    subparsers = parser.add_subparsers(dest="command", help="Commands: show")
+    parser.add_argument(
+        "--log-level",
+        type=str,
+        choices=list(LOG_LEVELS),
+        default=None,
+        help="Level of the logs written to ./logs/, OFF disables logging. Defaults to RDMS_LOG_LEVEL or INFO.",
+    )
+    parser.add_argument(
+        "--log-queue",
+        action="store_true",
+        help="Write the logs from a background thread.",
+    )
+    parser.add_argument(
+        "--metrics",
+        action="store_true",
+        help="Record counters and latency histograms, and print them to stderr afterwards.",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Run the command under cProfile, and print the hotspots to stderr.",
+    )
+    parser.add_argument(
+        "--profile-sort",
+        type=str,
+        default="cumulative",
+        help="pstats sort key of the hotspots, e.g. cumulative, tottime or ncalls.",
+    )
+    parser.add_argument(
+        "--profile-limit",
+        type=int,
+        default=25,
+        help="Number of hotspots and allocation sites in the reports.",
+    )
+    parser.add_argument(
+        "--profile-output",
+        type=str,
+        default=None,
+        help="Write the cProfile stats to a pstats file, for snakeviz or gprof2dot.",
+    )
+    parser.add_argument(
+        "--profile-stacks",
+        type=str,
+        default=None,
+        help="Sample the call stacks, and write them as collapsed stacks for flamegraphs.",
+    )
+    parser.add_argument(
+        "--trace-malloc",
+        type=int,
+        nargs="?",
+        const=1,
+        default=None,
+        help="Trace the allocations with tracemalloc, optionally keeping N frames, and print the top sites.",
+    )
+    parser.add_argument(
+        "--bloom-fp",
+        type=str,
+        default=None,
+        help="False positive rate of the Bloom filter, stored next to the DB file. 0 removes it. Defaults to RDMS_BLOOM_FP.",
+    )
+
+    subparsers = parser.add_subparsers(
+        dest="command",
+        help="Commands: add, delete, delete-range, show, get, range, rank, select, count, merge, intersect, diff, convert, compact, vacuum, import, serve, stats",
+    )
 
     add_parser: ArgumentParser = subparsers.add_parser(
         name="add", help="Add a node in the AVL tree."
     )
     add_parser.add_argument("key", type=int, help="Key of the node.")
     add_parser.add_argument("filename", type=str, help="Path to the DB file.")
+    add_parser.add_argument(
+        "--value",
+        type=str,
+        default=None,
+        help="Value of the key, stored in a paged DB file.",
+    )
+
+    delete_parser: ArgumentParser = subparsers.add_parser(
+        name="delete", help="Delete a node from the AVL tree."
+    )
+    delete_parser.add_argument("key", type=int, help="Key of the node.")
+    delete_parser.add_argument("filename", type=str, help="Path to the DB file.")
+
+    delete_range_parser: ArgumentParser = subparsers.add_parser(
+        name="delete-range", help="Delete the keys between low and high (inclusive)."
+    )
+    delete_range_parser.add_argument("low", type=int, help="Lower bound of the keys.")
+    delete_range_parser.add_argument("high", type=int, help="Upper bound of the keys.")
+    delete_range_parser.add_argument("filename", type=str, help="Path to the DB file.")
 
     show_parser: ArgumentParser = subparsers.add_parser(
         name="show", help="Show AVL tree."
     )
     show_parser.add_argument("filename", type=str, help="Path to the DB file.")
+    show_parser.add_argument(
+        "--depth", type=int, default=None, help="Number of levels rendered."
+    )
+    show_parser.add_argument(
+        "--limit", type=int, default=None, help="Max number of nodes rendered."
+    )
+    show_parser.add_argument(
+        "--from-key",
+        type=int,
+        default=None,
+        help="Only render the subtree of this key.",
+    )
+
+    get_parser: ArgumentParser = subparsers.add_parser(
+        name="get", help="Check whether a key exists in the AVL tree."
+    )
+    get_parser.add_argument("key", type=int, help="Key of the node.")
+    get_parser.add_argument("filename", type=str, help="Path to the DB file.")
+
+    range_parser: ArgumentParser = subparsers.add_parser(
+        name="range", help="List the keys between low and high (inclusive)."
+    )
+    range_parser.add_argument("low", type=int, help="Lower bound of the keys.")
+    range_parser.add_argument("high", type=int, help="Upper bound of the keys.")
+    range_parser.add_argument("filename", type=str, help="Path to the DB file.")
+
+    rank_parser: ArgumentParser = subparsers.add_parser(
+        name="rank", help="Count the keys less than a key."
+    )
+    rank_parser.add_argument("key", type=int, help="Key of the node.")
+    rank_parser.add_argument("filename", type=str, help="Path to the DB file.")
+
+    select_parser: ArgumentParser = subparsers.add_parser(
+        name="select", help="Find the k-th smallest key, starting from 0."
+    )
+    select_parser.add_argument("k", type=int, help="0-based index of the key.")
+    select_parser.add_argument("filename", type=str, help="Path to the DB file.")
+
+    count_parser: ArgumentParser = subparsers.add_parser(
+        name="count", help="Count the keys between low and high (inclusive)."
+    )
+    count_parser.add_argument("low", type=int, help="Lower bound of the keys.")
+    count_parser.add_argument("high", type=int, help="Upper bound of the keys.")
+    count_parser.add_argument("filename", type=str, help="Path to the DB file.")
+
+    set_operations: dict[str, str] = {
+        "merge": "Store the keys of either DB file in a new DB file.",
+        "intersect": "Store the keys of both DB files in a new DB file.",
+        "diff": "Store the keys of the first DB file, not in the second, in a new DB file.",
+    }
+    for name, help in set_operations.items():
+        set_parser: ArgumentParser = subparsers.add_parser(name=name, help=help)
+        set_parser.add_argument("first", type=str, help="Path to the first DB file.")
+        set_parser.add_argument("second", type=str, help="Path to the second DB file.")
+        set_parser.add_argument("output", type=str, help="Path to the new DB file.")
+
+    convert_parser: ArgumentParser = subparsers.add_parser(
+        name="convert",
+        help="Convert the DB file to the text, binary, compressed or paged format.",
+    )
+    convert_parser.add_argument("filename", type=str, help="Path to the DB file.")
+    convert_parser.add_argument(
+        "--to",
+        type=str,
+        choices=["text", "binary", "compressed", "paged"],
+        default="binary",
+        help="Format to convert the DB file to.",
+    )
+
+    compact_parser: ArgumentParser = subparsers.add_parser(
+        name="compact", help="Compact the write-ahead log into the DB file."
+    )
+    compact_parser.add_argument("filename", type=str, help="Path to the DB file.")
+
+    vacuum_parser: ArgumentParser = subparsers.add_parser(
+        name="vacuum", help="Reclaim the dead space of a container file."
+    )
+    vacuum_parser.add_argument("filename", type=str, help="Path to the container file.")
+
+    import_parser: ArgumentParser = subparsers.add_parser(
+        name="import", help="Bulk import keys into the AVL tree."
+    )
+    import_parser.add_argument(
+        "source", type=str, help="Path to a file of keys, or - for stdin."
+    )
+    import_parser.add_argument("filename", type=str, help="Path to the DB file.")
+    import_parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=1_000_000,
+        help="Max number of keys sorted in memory at once.",
+    )
+
+    serve_parser: ArgumentParser = subparsers.add_parser(
+        name="serve", help="Serve the DB files, and keep the opened trees in memory."
+    )
+    serve_parser.add_argument(
+        "--host", type=str, default="127.0.0.1", help="Address of the TCP server."
+    )
+    serve_parser.add_argument(
+        "--port",
+        type=int,
+        default=None,
+        help="Port of the TCP server, the server's DEFAULT_PORT by default.",
+    )
+    serve_parser.add_argument(
+        "--socket",
+        type=str,
+        default=None,
+        help="Path to a Unix socket, used instead of the TCP port.",
+    )
+
+    stats_parser: ArgumentParser = subparsers.add_parser(
+        name="stats", help="Show the shape of the AVL tree, and the metrics of loading it."
+    )
+    stats_parser.add_argument("filename", type=str, help="Path to the DB file.")
+    stats_parser.add_argument(
+        "--json", action="store_true", help="Print a JSON object, instead of text."
+    )
+
+    # Every command on a DB file can address a named tree of a container file instead.
+    for name, subparser in subparsers.choices.items():
+        if name not in ("serve", "vacuum"):
+            subparser.add_argument(
+                "--tree",
+                type=str,
+                default=None,
+                help="Name of the tree in a container file, which is created if needed.",
+            )
 
     args: Namespace = parser.parse_args()
 
-    if args.command == "show":
-        show(filename=args.filename)
-    elif args.command == "add":
-        add(key=args.key, filename=args.filename)
+    # argparse doesn't check the choices of a default, so the environment is checked here.
+    if args.log_level is None:
+        args.log_level = os.environ.get("RDMS_LOG_LEVEL", "INFO").upper()
+        if args.log_level not in LOG_LEVELS:
+            parser.error(
+                f"RDMS_LOG_LEVEL must be one of {', '.join(LOG_LEVELS)}, not {args.log_level}."
+            )
+
+    # Without a command there is nothing to set up.
+    if args.command is None:
+        return
+
+    from logger import configure_logging
+
+    configure_logging(level=args.log_level, queue=args.log_queue)
+
+    if args.metrics:
+        from metrics import configure_metrics
+
+        configure_metrics(enabled=True)
+
+    # A bad rate of --bloom-fp or RDMS_BLOOM_FP is a usage error, before the command runs.
+    rate: str | None = args.bloom_fp
+    source: str = "--bloom-fp"
+    if rate is None:
+        rate, source = os.environ.get("RDMS_BLOOM_FP"), "RDMS_BLOOM_FP"
+    if rate is not None:
+        from bloom import configure_bloom
+
+        try:
+            configure_bloom(fp_rate=rate)
+        except ValueError as error:
+            parser.error(message=f"{source}: {error}")
+
+    if (
+        args.profile
+        or args.profile_output
+        or args.profile_stacks
+        or args.trace_malloc is not None
+    ):
+        from profiling import profile_command
+
+        with profile_command(
+            profile=args.profile,
+            sort=args.profile_sort,
+            limit=args.profile_limit,
+            output=args.profile_output,
+            stacks=args.profile_stacks,
+            trace_malloc=args.trace_malloc,
+        ):
+            run(args=args)
+    else:
+        run(args=args)
+
+    if args.metrics:
+        from metrics import METRICS, format_snapshot
+
+        print(format_snapshot(snapshot=METRICS.snapshot()), file=sys.stderr)
 
 
 if __name__ == "__main__":
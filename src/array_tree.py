@@ -0,0 +1,281 @@
+from array import array
+from collections.abc import Iterator, Sequence
+
+# Index of a missing child node.
+NIL: int = -1
+
+
+class ArrayAVLTree:
+    """
+    A compact AVL tree, that stores the nodes as a struct of arrays instead of Node objects.\n
+    Node i has its key in keys[i], its children in left[i] and right[i] and its height in heights[i].
+    Keys must fit in a signed 64 bit integer.
+
+    Attributes:
+        keys (array): Keys of the nodes.
+        left (array): Index of the left child node, NIL if there isn't one.
+        right (array): Index of the right child node, NIL if there isn't one.
+        heights (array): Height of the subtree rooted at each node.
+        root (int): Index of the root node, NIL if the tree is empty.
+    """
+
+    def __init__(self) -> None:
+        """
+        Initializes an empty ArrayAVLTree object.
+        """
+        self.keys: array = array("q")
+        self.left: array = array("i")
+        self.right: array = array("i")
+        self.heights: array = array("b")
+        self.root: int = NIL
+
+    @classmethod
+    def from_sorted(cls, keys: Sequence[int]) -> "ArrayAVLTree":
+        """
+        Builds a perfectly balanced tree from sorted, unique keys, without any rotations.\n
+        Node i holds keys[i], so the arrays are filled in a single pass.
+
+        Parameters:
+            keys (Sequence[int]): Keys in ascending order, without duplicates.
+
+        Returns:
+            ArrayAVLTree: Returns an ArrayAVLTree object.
+        """
+        tree: ArrayAVLTree = cls()
+        count: int = len(keys)
+
+        tree.keys = array("q", keys)
+        tree.left = array("i", [NIL]) * count
+        tree.right = array("i", [NIL]) * count
+        tree.heights = array("b", [0]) * count
+
+        # Ranges of keys, that still need a subtree, with the index of their parent.
+        stack: list[tuple[int, int, int, bool]] = [(0, count - 1, NIL, False)]
+        # Subtree roots in the order they were created, used to fill in the heights.
+        created: list[int] = []
+
+        while stack:
+            low, high, parent, is_left = stack.pop()
+            if low > high:
+                continue
+
+            # The middle key becomes the root of the subtree.
+            middle: int = (low + high) // 2
+            created.append(middle)
+
+            if parent == NIL:
+                tree.root = middle
+            elif is_left:
+                tree.left[parent] = middle
+            else:
+                tree.right[parent] = middle
+
+            stack.append((low, middle - 1, middle, True))
+            stack.append((middle + 1, high, middle, False))
+
+        # Parents are always created before their children.
+        for index in reversed(created):
+            tree.update(index=index)
+
+        return tree
+
+    def __len__(self) -> int:
+        """
+        Returns the number of nodes in the tree.
+
+        Returns:
+            int: Length of the key array.
+        """
+        return len(self.keys)
+
+    def height(self, index: int) -> int:
+        """
+        Returns the cached height of a subtree.
+
+        Parameters:
+            index (int): Index of the node.
+
+        Returns:
+            int: Height of the subtree, 0 if the node doesn't exist.
+        """
+        return self.heights[index] if index != NIL else 0
+
+    def update(self, index: int) -> None:
+        """
+        Recalculates the height of a node from its children's cached heights.
+
+        Parameters:
+            index (int): Index of the node.
+
+        Returns:
+            None
+        """
+        self.heights[index] = (
+            max(self.height(index=self.left[index]), self.height(index=self.right[index]))
+            + 1
+        )
+
+    def balance_factor(self, index: int) -> int:
+        """
+        Balance Factor = Left Subtree Height - Right Subtree Height
+
+        Parameters:
+            index (int): Index of the node.
+
+        Returns:
+            int: The balance factor of the node.
+        """
+        return self.height(index=self.left[index]) - self.height(index=self.right[index])
+
+    def rotate_right(self, index: int) -> int:
+        """
+        Rotate the unbalanced node to the right.
+
+        Parameters:
+            index (int): Index of the unbalanced node.
+
+        Returns:
+            int: Index of the node, that takes its place.
+        """
+        child: int = self.left[index]
+        self.left[index] = self.right[child]
+        self.right[child] = index
+
+        self.update(index=index)
+        self.update(index=child)
+
+        return child
+
+    def rotate_left(self, index: int) -> int:
+        """
+        Rotate the unbalanced node to the left.
+
+        Parameters:
+            index (int): Index of the unbalanced node.
+
+        Returns:
+            int: Index of the node, that takes its place.
+        """
+        child: int = self.right[index]
+        self.right[index] = self.left[child]
+        self.left[child] = index
+
+        self.update(index=index)
+        self.update(index=child)
+
+        return child
+
+    def insert(self, key: int) -> None:
+        """
+        Add a new node to the tree.
+
+        Parameters:
+            key (int): The value stored in the node.
+
+        Returns:
+            None
+        """
+        # Indices of the nodes on the insert path.
+        path: list[int] = []
+        index: int = self.root
+
+        while index != NIL:
+            path.append(index)
+
+            if key < self.keys[index]:
+                index = self.left[index]
+            elif key > self.keys[index]:
+                index = self.right[index]
+            else:
+                # Do not duplicate a existing node.
+                return
+
+        # Append the new node to the arrays.
+        new: int = len(self.keys)
+        self.keys.append(key)
+        self.left.append(NIL)
+        self.right.append(NIL)
+        self.heights.append(1)
+
+        if not path:
+            self.root = new
+            return
+
+        if key < self.keys[path[-1]]:
+            self.left[path[-1]] = new
+        else:
+            self.right[path[-1]] = new
+
+        # Walk back up the insert path.
+        for depth in range(len(path) - 1, -1, -1):
+            index = path[depth]
+            old_height: int = self.heights[index]
+            self.update(index=index)
+            balance_factor: int = self.balance_factor(index=index)
+            subtree: int = index
+
+            if balance_factor > 1:
+                if self.balance_factor(index=self.left[index]) < 0:
+                    self.left[index] = self.rotate_left(index=self.left[index])
+                subtree = self.rotate_right(index=index)
+            elif balance_factor < -1:
+                if self.balance_factor(index=self.right[index]) > 0:
+                    self.right[index] = self.rotate_right(index=self.right[index])
+                subtree = self.rotate_left(index=index)
+
+            if subtree != index:
+                # Link the rotated subtree to the parent, its height is restored.
+                if depth == 0:
+                    self.root = subtree
+                elif self.left[path[depth - 1]] == index:
+                    self.left[path[depth - 1]] = subtree
+                else:
+                    self.right[path[depth - 1]] = subtree
+                return
+
+            # If the height didn't change, none of the ancestor nodes will change either.
+            if self.heights[index] == old_height:
+                return
+
+    def contains(self, key: int) -> bool:
+        """
+        Checks whether the key exists in the tree.
+
+        Parameters:
+            key (int): The value stored in the node.
+
+        Returns:
+            bool: True if the key exists.
+        """
+        index: int = self.root
+
+        while index != NIL:
+            if key < self.keys[index]:
+                index = self.left[index]
+            elif key > self.keys[index]:
+                index = self.right[index]
+            else:
+                return True
+
+        return False
+
+    def inorder(self) -> Iterator[int]:
+        """
+        Iterates over the keys of the tree in ascending order.
+
+        Returns:
+            Iterator[int]: Keys of the nodes.
+        """
+        index: int = self.root
+        # Indices of the nodes, whose left subtree is being visited.
+        stack: list[int] = []
+
+        while stack or index != NIL:
+            # Go as far left as possible.
+            while index != NIL:
+                stack.append(index)
+                index = self.left[index]
+
+            index = stack.pop()
+            yield self.keys[index]
+            index = self.right[index]
@@ -1,6 +1,17 @@
-from logging import Logger
+import sys
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterable, Iterator, Sequence
+from itertools import repeat
+from logging import INFO, Logger
+from operator import ne
+from time import perf_counter
+from typing import TextIO
 
 from logger import LOGGER
+from metrics import METRICS
+
+# Number of lines, that show buffers before writing them.
+SHOW_CHUNK_LINES: int = 4096
 
 
 class Node:
@@ -12,10 +23,24 @@ class Node:
         left (Node | None): The left Node object of the current node.
         right (Node | None): The right Node object of the current node.
         balance_factor (int): Checks if the left and right child nodes have matching heights, the balance factor should be -1, 0 or 1.
+        height (int): Height of the subtree rooted at this node, a leaf node has a height of 1.
+        size (int): Number of nodes in the subtree rooted at this node.
         parent (Node | None): The parent node of the current node.
         root (bool): Whether the current node od the origin node.
     """
 
+    # No per node __dict__, every node stores exactly these attributes.
+    __slots__ = (
+        "_key",
+        "root",
+        "balance_factor",
+        "height",
+        "size",
+        "left",
+        "right",
+        "parent",
+    )
+
     def __init__(self, key: int) -> None:
         """
         Initializes a Node object.
@@ -26,6 +51,8 @@ class Node:
         self._key: int = key
         self.root: bool = False
         self.balance_factor: int = 0
+        self.height: int = 1
+        self.size: int = 1
         self.left: Node | None = None
         self.right: Node | None = None
         self.parent: Node | None = None
@@ -40,6 +67,293 @@ class Node:
         """
         return self._key
 
+    def update(self) -> None:
+        """
+        Recalculates the height, balance factor and size from the children's cached values.
+
+        Returns:
+            None
+        """
+        left_height: int = self.left.height if self.left else 0
+        right_height: int = self.right.height if self.right else 0
+
+        self.height = max(left_height, right_height) + 1
+        self.balance_factor = left_height - right_height
+        self.size = (
+            1
+            + (self.left.size if self.left else 0)
+            + (self.right.size if self.right else 0)
+        )
+
+
+def inorder_keys(node: Node | None) -> Iterator[int]:
+    """
+    Iterates over the keys of a subtree in ascending order, without a tree around it.
+
+    Parameters:
+        node (Node | None): Root node of the subtree.
+
+    Returns:
+        Iterator[int]: Keys of the nodes.
+    """
+    # List of nodes, whose left subtree is being visited.
+    stack: list[Node] = []
+
+    while stack or node:
+        # Go as far left as possible.
+        while node:
+            stack.append(node)
+            node = node.left
+
+        node = stack.pop()
+        yield node.key
+        node = node.right
+
+
+def _height(node: Node | None) -> int:
+    """
+    Returns the cached height of a subtree, 0 if the node doesn't exist.
+    """
+    return node.height if node else 0
+
+
+def _link(node: Node, left: Node | None, right: Node | None) -> Node:
+    """
+    Makes left and right the children of the node, and updates its cached values.
+
+    Parameters:
+        node (Node): The parent node.
+        left (Node | None): The new left child node.
+        right (Node | None): The new right child node.
+
+    Returns:
+        Node: The parent node.
+    """
+    node.left = left
+    node.right = right
+    node.root = False
+
+    if left:
+        left.parent = node
+    if right:
+        right.parent = node
+
+    node.update()
+
+    return node
+
+
+def _rotate_left(node: Node) -> Node:
+    """
+    Rotates a detached subtree to the left, and returns its new root.
+    """
+    child: Node = node.right  # type: ignore
+    return _link(child, _link(node, node.left, child.left), child.right)
+
+
+def _rotate_right(node: Node) -> Node:
+    """
+    Rotates a detached subtree to the right, and returns its new root.
+    """
+    child: Node = node.left  # type: ignore
+    return _link(child, child.left, _link(node, child.right, node.right))
+
+
+def _join_right(left: Node, middle: Node, right: Node | None) -> Node:
+    """
+    Joins a taller left subtree, by walking down its right spine.
+    """
+    inner: Node | None = left.right
+
+    if _height(inner) <= _height(right) + 1:
+        subtree: Node = _link(middle, inner, right)
+        if subtree.height <= _height(left.left) + 1:
+            return _link(left, left.left, subtree)
+        return _rotate_left(_link(left, left.left, _rotate_right(subtree)))
+
+    subtree = _join_right(inner, middle, right)  # type: ignore
+    joined: Node = _link(left, left.left, subtree)
+    if subtree.height <= _height(left.left) + 1:
+        return joined
+    return _rotate_left(joined)
+
+
+def _join_left(left: Node | None, middle: Node, right: Node) -> Node:
+    """
+    Joins a taller right subtree, by walking down its left spine.
+    """
+    inner: Node | None = right.left
+
+    if _height(inner) <= _height(left) + 1:
+        subtree: Node = _link(middle, left, inner)
+        if subtree.height <= _height(right.right) + 1:
+            return _link(right, subtree, right.right)
+        return _rotate_right(_link(right, _rotate_left(subtree), right.right))
+
+    subtree = _join_left(left, middle, inner)  # type: ignore
+    joined: Node = _link(right, subtree, right.right)
+    if subtree.height <= _height(right.right) + 1:
+        return joined
+    return _rotate_right(joined)
+
+
+def _join(left: Node | None, middle: Node, right: Node | None) -> Node:
+    """
+    Joins two subtrees, where every key of left < middle.key < every key of right.
+    """
+    if _height(left) > _height(right) + 1:
+        return _join_right(left, middle, right)  # type: ignore
+    if _height(right) > _height(left) + 1:
+        return _join_left(left, middle, right)  # type: ignore
+    return _link(middle, left, right)
+
+
+def _split_last(node: Node) -> tuple[Node | None, Node]:
+    """
+    Removes the node with the largest key from a subtree.
+
+    Returns:
+        tuple[Node | None, Node]: The remaining subtree, and the removed node.
+    """
+    if not node.right:
+        return node.left, node
+
+    rest, last = _split_last(node=node.right)
+    return _join(node.left, node, rest), last
+
+
+def _join2(left: Node | None, right: Node | None) -> Node | None:
+    """
+    Joins two subtrees without a middle key, where every key of left < every key of right.
+    """
+    if not left:
+        return right
+
+    rest, last = _split_last(node=left)
+    return _join(rest, last, right)
+
+
+def _split(node: Node | None, key: int) -> tuple[Node | None, bool, Node | None]:
+    """
+    Splits a subtree into the keys less than and greater than the key.
+
+    Returns:
+        tuple[Node | None, bool, Node | None]: The smaller keys, whether the key exists, the larger keys.
+    """
+    if not node:
+        return None, False, None
+
+    left, right = node.left, node.right
+
+    if key < node.key:
+        smaller, found, larger = _split(node=left, key=key)
+        return smaller, found, _join(larger, node, right)
+    if key > node.key:
+        smaller, found, larger = _split(node=right, key=key)
+        return _join(left, node, smaller), found, larger
+
+    return left, True, right
+
+
+def _build(keys: Sequence[int], low: int, high: int) -> Node | None:
+    """
+    Builds a perfectly balanced subtree from sorted, unique keys[low:high + 1].
+    """
+    # Empty range, there is no node.
+    if low > high:
+        return None
+
+    # The middle key becomes the root of the subtree.
+    middle: int = (low + high) // 2
+    node: Node = Node(key=keys[middle])
+    node.left = _build(keys=keys, low=low, high=middle - 1)
+    node.right = _build(keys=keys, low=middle + 1, high=high)
+
+    if node.left:
+        node.left.parent = node
+    if node.right:
+        node.right.parent = node
+
+    node.update()
+
+    return node
+
+
+def _insert_sorted(
+    node: Node | None, keys: Sequence[int], low: int, high: int
+) -> Node | None:
+    """
+    Merges sorted, unique keys[low:high] into a subtree.\n
+    Only the subtrees, that receive keys, are visited. The keys, that fall into an empty
+    child, are built into a balanced subtree at once, and joined back on the way up.
+    """
+    if low >= high:
+        return node
+    if not node:
+        return _build(keys=keys, low=low, high=high - 1)
+
+    # The keys less than the node go left, the rest right, without the node's own key.
+    index: int = bisect_left(keys, node.key, low, high)
+    after: int = index + 1 if index < high and keys[index] == node.key else index
+
+    left: Node | None = _insert_sorted(node=node.left, keys=keys, low=low, high=index)
+    right: Node | None = _insert_sorted(node=node.right, keys=keys, low=after, high=high)
+
+    return _join(left, node, right)
+
+
+def _batch(keys: Iterable[int]) -> list[int]:
+    """
+    Turns a batch of keys into a list of int keys.\n
+    Arrays (array.array, numpy.ndarray) are converted in C by tolist, which also turns
+    fixed width integers into int, so they compare and serialize like any other key.
+    """
+    tolist = getattr(keys, "tolist", None)
+    return tolist() if tolist else list(keys)
+
+
+def _union(first: Node | None, second: Node | None) -> Node | None:
+    """
+    Merges the keys of two subtrees.
+    """
+    if not first:
+        return second
+    if not second:
+        return first
+
+    left, right = first.left, first.right
+    smaller, _, larger = _split(node=second, key=first.key)
+
+    return _join(_union(left, smaller), first, _union(right, larger))
+
+
+def _intersection(first: Node | None, second: Node | None) -> Node | None:
+    """
+    Keeps the keys of the first subtree, that are also in the second subtree.
+    """
+    if not first or not second:
+        return None
+
+    left, right = first.left, first.right
+    smaller, found, larger = _split(node=second, key=first.key)
+    left = _intersection(left, smaller)
+    right = _intersection(right, larger)
+
+    return _join(left, first, right) if found else _join2(left, right)
+
+
+def _difference(first: Node | None, second: Node | None) -> Node | None:
+    """
+    Keeps the keys of the first subtree, that are not in the second subtree.
+    """
+    if not first or not second:
+        return first
+
+    left, right = second.left, second.right
+    smaller, _, larger = _split(node=first, key=second.key)
+
+    return _join2(_difference(smaller, left), _difference(larger, right))
+
 
 class AVLTree:
     """
@@ -61,9 +375,542 @@ class AVLTree:
         self._key: int = key
         self.node: Node = Node(key=self._key)
         self.node.root = True
+
+        if METRICS.enabled:
+            METRICS.increment(name="tree.nodes_allocated")
         self.logger: Logger = LOGGER(_name="avl_tree.AVLTree", _filename="tree.log")
-        self.logger.info(msg=f"Creating AVL tree...")
-        self.logger.info(msg=f"Origin node {self.node.key} is created.")
+        self.logger.info(msg="Creating AVL tree...")
+        self.logger.info("Origin node %s is created.", self.node.key)
+
+    @classmethod
+    def from_sorted(cls, keys: Sequence[int]) -> "AVLTree":
+        """
+        Builds a perfectly balanced AVL tree bottom-up from sorted, unique keys, without any rotations.
+
+        Parameters:
+            keys (Sequence[int]): Keys in ascending order, without duplicates.
+
+        Returns:
+            AVLTree: Returns an AVLTree object.
+        """
+        if not keys:
+            raise ValueError("Cannot build an AVL tree without any keys.")
+
+        # Hand the built root node to a AVL tree, without an origin node of its own.
+        root: Node = _build(keys=keys, low=0, high=len(keys) - 1)  # type: ignore
+        tree: AVLTree = cls._wrap(node=root)
+        tree.logger.info("Built a balanced AVL tree from %s sorted keys.", len(keys))
+
+        if METRICS.enabled:
+            METRICS.increment(name="tree.nodes_allocated", amount=len(keys))
+
+        return tree
+
+    @classmethod
+    def from_iterable(cls, keys: Iterable[int]) -> "AVLTree":
+        """
+        Builds a perfectly balanced AVL tree from keys in any order, duplicates are dropped.
+
+        Parameters:
+            keys (Iterable[int]): Keys of the nodes.
+
+        Returns:
+            AVLTree: Returns an AVLTree object.
+        """
+        return cls.from_sorted(keys=sorted(set(keys)))
+
+    @classmethod
+    def from_node(cls, node: Node | None) -> "AVLTree | None":
+        """
+        Wraps a detached root node, whose cached values are up to date, in an AVL tree.
+
+        Parameters:
+            node (Node | None): Root node of the tree.
+
+        Returns:
+            AVLTree | None: Returns an AVLTree object, None if there is no node.
+        """
+        if not node:
+            return None
+
+        return cls._wrap(node=node)
+
+    @classmethod
+    def _wrap(cls, node: Node) -> "AVLTree":
+        """
+        Creates a AVL tree around an existing root node, __init__ would allocate an origin
+        node only to replace it.
+        """
+        tree: AVLTree = cls.__new__(cls)
+        tree._key = node.key
+        tree.node = node
+        tree.node.parent = None
+        tree.node.root = True
+        tree.logger = LOGGER(_name="avl_tree.AVLTree", _filename="tree.log")
+
+        return tree
+
+    @classmethod
+    def join(
+        cls, left: "AVLTree | None", key: int, right: "AVLTree | None"
+    ) -> "AVLTree":
+        """
+        Joins two trees and a key, where every key of left < key < every key of right.\n
+        Costs O(|height(left) - height(right)| + 1), the nodes of both trees are reused.
+
+        Parameters:
+            left (AVLTree | None): The tree with the smaller keys.
+            key (int): The middle key.
+            right (AVLTree | None): The tree with the larger keys.
+
+        Returns:
+            AVLTree: The joined tree.
+        """
+        root: Node = _join(
+            left.node if left else None, Node(key=key), right.node if right else None
+        )
+        return cls.from_node(node=root)  # type: ignore
+
+    def split(self, key: int) -> tuple["AVLTree | None", bool, "AVLTree | None"]:
+        """
+        Splits the tree into the keys less than and greater than the key, in O(log n).\n
+        The nodes are reused, so this tree can't be used afterwards.
+
+        Parameters:
+            key (int): The key to split at.
+
+        Returns:
+            tuple[AVLTree | None, bool, AVLTree | None]: The smaller keys, whether the key exists, the larger keys.
+        """
+        smaller, found, larger = _split(node=self.node, key=key)
+        return AVLTree.from_node(node=smaller), found, AVLTree.from_node(node=larger)
+
+    def union(self, other: "AVLTree") -> "AVLTree":
+        """
+        Merges the keys of both trees, in O(m log(n/m + 1)).\n
+        The nodes are reused, so neither tree can be used afterwards.
+
+        Parameters:
+            other (AVLTree): The other tree.
+
+        Returns:
+            AVLTree: Tree with the keys of either tree.
+        """
+        return AVLTree.from_node(node=_union(self.node, other.node))  # type: ignore
+
+    def intersection(self, other: "AVLTree") -> "AVLTree | None":
+        """
+        Keeps the keys, that are in both trees, in O(m log(n/m + 1)).\n
+        The nodes are reused, so neither tree can be used afterwards.
+
+        Parameters:
+            other (AVLTree): The other tree.
+
+        Returns:
+            AVLTree | None: Tree with the common keys, None if there are none.
+        """
+        return AVLTree.from_node(node=_intersection(self.node, other.node))
+
+    def difference(self, other: "AVLTree") -> "AVLTree | None":
+        """
+        Keeps the keys of this tree, that are not in the other tree, in O(m log(n/m + 1)).\n
+        The nodes are reused, so neither tree can be used afterwards.
+
+        Parameters:
+            other (AVLTree): The other tree.
+
+        Returns:
+            AVLTree | None: Tree with the remaining keys, None if there are none.
+        """
+        return AVLTree.from_node(node=_difference(self.node, other.node))
+
+    def inorder(self) -> Iterator[int]:
+        """
+        Iterates over the keys of the tree in ascending order.
+
+        Returns:
+            Iterator[int]: Keys of the nodes.
+        """
+        return inorder_keys(node=self.node)
+
+    def find(self, key: int) -> Node | None:
+        """
+        Finds the node of a key.
+
+        Parameters:
+            key (int): The value stored in the node.
+
+        Returns:
+            Node | None: The node of the key, None if the key doesn't exist.
+        """
+        if METRICS.enabled:
+            return self._find_recorded(key=key)
+
+        node: Node | None = self.node
+
+        while node:
+            if key < node.key:
+                node = node.left
+            elif key > node.key:
+                node = node.right
+            else:
+                return node
+
+        return None
+
+    def _find_recorded(self, key: int) -> Node | None:
+        """
+        Finds the node of a key, and records the comparisons and latency of the lookup.
+
+        Parameters:
+            key (int): The value stored in the node.
+
+        Returns:
+            Node | None: The node of the key, None if the key doesn't exist.
+        """
+        start: float = perf_counter()
+        comparisons: int = 0
+        node: Node | None = self.node
+
+        while node:
+            comparisons += 1
+            if key < node.key:
+                node = node.left
+            elif key > node.key:
+                node = node.right
+            else:
+                break
+
+        self._record(operation="tree.find", start=start, comparisons=comparisons)
+
+        return node
+
+    def _record(self, operation: str, start: float, comparisons: int) -> None:
+        """
+        Records the key comparisons and the latency of an operation.
+
+        Parameters:
+            operation (str): Name of the latency histogram.
+            start (float): perf_counter at the start of the operation.
+            comparisons (int): Number of nodes, the key was compared with.
+
+        Returns:
+            None
+        """
+        METRICS.increment(name="tree.comparisons", amount=comparisons)
+        METRICS.observe(name=operation, seconds=perf_counter() - start)
+
+    def contains(self, key: int) -> bool:
+        """
+        Checks whether the key exists in the tree.
+
+        Parameters:
+            key (int): The value stored in the node.
+
+        Returns:
+            bool: True if the key exists.
+        """
+        return self.find(key=key) is not None
+
+    def floor_node(self, key: int, inclusive: bool = True) -> Node | None:
+        """
+        Finds the node with the largest key, that is less than (or equal to) the key.
+
+        Parameters:
+            key (int): Upper bound of the search.
+            inclusive (bool): Whether the key itself can be returned.
+
+        Returns:
+            Node | None: The node found, None if every key is larger.
+        """
+        node: Node | None = self.node
+        # Best match so far.
+        match: Node | None = None
+
+        while node:
+            if node.key < key or (inclusive and node.key == key):
+                # The node is a candidate, look for a larger one on the right.
+                match = node
+                node = node.right
+            else:
+                node = node.left
+
+        return match
+
+    def ceiling_node(self, key: int, inclusive: bool = True) -> Node | None:
+        """
+        Finds the node with the smallest key, that is greater than (or equal to) the key.
+
+        Parameters:
+            key (int): Lower bound of the search.
+            inclusive (bool): Whether the key itself can be returned.
+
+        Returns:
+            Node | None: The node found, None if every key is smaller.
+        """
+        node: Node | None = self.node
+        # Best match so far.
+        match: Node | None = None
+
+        while node:
+            if node.key > key or (inclusive and node.key == key):
+                # The node is a candidate, look for a smaller one on the left.
+                match = node
+                node = node.left
+            else:
+                node = node.right
+
+        return match
+
+    def floor(self, key: int) -> int | None:
+        """
+        Finds the largest key, that is less than or equal to the key.
+
+        Parameters:
+            key (int): The key to compare against.
+
+        Returns:
+            int | None: The key found, None if every key is larger.
+        """
+        node: Node | None = self.floor_node(key=key)
+        return node.key if node else None
+
+    def ceiling(self, key: int) -> int | None:
+        """
+        Finds the smallest key, that is greater than or equal to the key.
+
+        Parameters:
+            key (int): The key to compare against.
+
+        Returns:
+            int | None: The key found, None if every key is smaller.
+        """
+        node: Node | None = self.ceiling_node(key=key)
+        return node.key if node else None
+
+    def predecessor(self, key: int) -> int | None:
+        """
+        Finds the largest key, that is less than the key.
+
+        Parameters:
+            key (int): The key to compare against.
+
+        Returns:
+            int | None: The key found, None if every key is larger or equal.
+        """
+        node: Node | None = self.floor_node(key=key, inclusive=False)
+        return node.key if node else None
+
+    def successor(self, key: int) -> int | None:
+        """
+        Finds the smallest key, that is greater than the key.
+
+        Parameters:
+            key (int): The key to compare against.
+
+        Returns:
+            int | None: The key found, None if every key is smaller or equal.
+        """
+        node: Node | None = self.ceiling_node(key=key, inclusive=False)
+        return node.key if node else None
+
+    def next_node(self, node: Node) -> Node | None:
+        """
+        Finds the in-order next node, using the parent pointers.
+
+        Parameters:
+            node (Node): The current node.
+
+        Returns:
+            Node | None: The next node, None if the node has the largest key.
+        """
+        # The next node is the leftmost node of the right subtree.
+        if node.right:
+            node = node.right
+            while node.left:
+                node = node.left
+            return node
+
+        # Otherwise, it's the first ancestor, that is reached from its left subtree.
+        while node.parent and node is node.parent.right:
+            node = node.parent
+
+        return node.parent
+
+    def range(self, low: int, high: int) -> Iterator[int]:
+        """
+        Lazily iterates over the keys between low and high (inclusive), in ascending order.
+
+        Parameters:
+            low (int): Lower bound of the keys.
+            high (int): Upper bound of the keys.
+
+        Returns:
+            Iterator[int]: Keys of the nodes.
+        """
+        node: Node | None = self.ceiling_node(key=low)
+
+        while node and node.key <= high:
+            yield node.key
+            node = self.next_node(node=node)
+
+    def __len__(self) -> int:
+        """
+        Returns the number of nodes in the tree.
+
+        Returns:
+            int: Size of the root node.
+        """
+        return self.node.size
+
+    def rank(self, key: int, inclusive: bool = False) -> int:
+        """
+        Counts the keys, that are less than (or equal to) the key.
+
+        Parameters:
+            key (int): The key to compare against.
+            inclusive (bool): Whether the key itself is counted.
+
+        Returns:
+            int: Number of keys, which is also the 0-based index of the key if it exists.
+        """
+        node: Node | None = self.node
+        count: int = 0
+
+        while node:
+            if node.key < key or (inclusive and node.key == key):
+                # The node and its whole left subtree are counted.
+                count += 1 + (node.left.size if node.left else 0)
+                node = node.right
+            else:
+                node = node.left
+
+        return count
+
+    def select(self, k: int) -> int:
+        """
+        Finds the k-th smallest key, starting from 0.
+
+        Parameters:
+            k (int): 0-based index of the key, in ascending order.
+
+        Returns:
+            int: The k-th smallest key.
+        """
+        if not 0 <= k < len(self):
+            raise IndexError(f"Index {k} is out of range for {len(self)} keys.")
+
+        node: Node = self.node
+
+        while True:
+            left_size: int = node.left.size if node.left else 0
+
+            if k < left_size:
+                node = node.left  # type: ignore
+            elif k > left_size:
+                # Skip the left subtree and the node itself.
+                k -= left_size + 1
+                node = node.right  # type: ignore
+            else:
+                return node.key
+
+    def count(self, low: int, high: int) -> int:
+        """
+        Counts the keys between low and high (inclusive).
+
+        Parameters:
+            low (int): Lower bound of the keys.
+            high (int): Upper bound of the keys.
+
+        Returns:
+            int: Number of keys.
+        """
+        if low > high:
+            return 0
+
+        return self.rank(key=high, inclusive=True) - self.rank(key=low)
+
+    def contains_many(self, keys: Iterable[int]) -> list[bool]:
+        """
+        Checks whether each key of a batch exists in the tree.\n
+        Large batches are answered by binary searches in a sorted snapshot of the keys.
+
+        Parameters:
+            keys (Iterable[int]): The keys, a list or an array.
+
+        Returns:
+            list[bool]: Whether each key exists, in the order of the keys.
+        """
+        batch: list[int] = _batch(keys=keys)
+
+        # A snapshot costs about as much as 20 lookups per 1000 nodes.
+        if len(batch) * 20 < len(self):
+            return [self.contains(key=key) for key in batch]
+
+        snapshot: list[int] = list(self.inorder())
+        # A key exists, if some key is at least it and not more than it.
+        return list(
+            map(
+                ne,
+                map(bisect_left, repeat(snapshot), batch),
+                map(bisect_right, repeat(snapshot), batch),
+            )
+        )
+
+    def rank_many(self, keys: Iterable[int], inclusive: bool = False) -> list[int]:
+        """
+        Counts the keys, that are less than (or equal to) each key of a batch.\n
+        Large batches are answered by binary searches in a sorted snapshot of the keys.
+
+        Parameters:
+            keys (Iterable[int]): The keys, a list or an array.
+            inclusive (bool): Whether the key itself is counted.
+
+        Returns:
+            list[int]: The rank of each key, in the order of the keys.
+        """
+        batch: list[int] = _batch(keys=keys)
+
+        if len(batch) * 20 < len(self):
+            return [self.rank(key=key, inclusive=inclusive) for key in batch]
+
+        snapshot: list[int] = list(self.inorder())
+        search = bisect_right if inclusive else bisect_left
+        return list(map(search, repeat(snapshot), batch))
+
+    def insert_many(self, keys: Iterable[int]) -> int:
+        """
+        Adds a batch of keys, duplicates are dropped.\n
+        The batch is sorted once, then merged into the tree in O(m log(n/m + 1)): only the
+        subtrees, that receive keys, are visited, and the keys, that fall between two nodes,
+        are built into a balanced subtree at once, instead of being inserted one by one.
+
+        Parameters:
+            keys (Iterable[int]): The keys, a list or an array.
+
+        Returns:
+            int: Number of keys added.
+        """
+        start: float = perf_counter() if METRICS.enabled else 0.0
+        batch: list[int] = sorted(set(_batch(keys=keys)))
+        size: int = len(self)
+
+        self.node.root = False
+        self.node = _insert_sorted(  # type: ignore
+            node=self.node, keys=batch, low=0, high=len(batch)
+        )
+        self.node.parent = None
+        self.node.root = True
+
+        added: int = len(self) - size
+
+        if start:
+            METRICS.increment(name="tree.nodes_allocated", amount=added)
+            METRICS.observe(name="tree.insert_many", seconds=perf_counter() - start)
+        if self.logger.isEnabledFor(INFO):
+            self.logger.info("%s of %s keys are added.", added, len(batch))
+
+        return added
 
     def insert(self, key: int) -> None:
         """
@@ -75,6 +922,8 @@ class AVLTree:
         Returns:
             None
         """
+        # Only timed, when the metrics are enabled.
+        start: float = perf_counter() if METRICS.enabled else 0.0
         node: Node = self.node
         # List of nodes.
         stack: list[Node] = []
@@ -89,9 +938,12 @@ class AVLTree:
                     node.left = Node(key=key)
                     # Assign the current node as the parent of the new left child node.
                     node.left.parent = node
-                    self.logger.info(
-                        msg=f"Left child node {node.left.key} of node {node.key} is created."
-                    )
+                    if self.logger.isEnabledFor(INFO):
+                        self.logger.info(
+                            "Left child node %s of node %s is created.",
+                            node.left.key,
+                            node.key,
+                        )
                     break
                 # If, it does have a left node, then loop through the next lefy child node.
                 node = node.left
@@ -102,40 +954,236 @@ class AVLTree:
                     node.right = Node(key=key)
                     # Assign the current node as the parent of the new right child node.
                     node.right.parent = node
-                    self.logger.info(
-                        msg=f"Right child node {node.right.key} of node {node.key} is created."
-                    )
+                    if self.logger.isEnabledFor(INFO):
+                        self.logger.info(
+                            "Right child node %s of node %s is created.",
+                            node.right.key,
+                            node.key,
+                        )
                     break
                 # If, it does have a right node, then loop through the next right child node.
                 node = node.right
             else:
                 # Do not duplicate a existing node.
+                if start:
+                    self._record(
+                        operation="tree.insert", start=start, comparisons=len(stack)
+                    )
                 return
 
+        # Every node on the insert path has one more node in its subtree.
+        for parent in stack:
+            parent.size += 1
+
+        # The stack is emptied by balancing, so its length is taken first.
+        comparisons: int = len(stack)
         # Balance the binary tree
         self.balancing(stack=stack)
 
+        if start:
+            METRICS.increment(name="tree.nodes_allocated")
+            self._record(operation="tree.insert", start=start, comparisons=comparisons)
+
+    def delete(self, key: int) -> bool:
+        """
+        Removes the node of a key, and rebalances the tree along the parent chain, in O(log n).
+
+        Parameters:
+            key (int): The value stored in the node.
+
+        Returns:
+            bool: Whether the key existed.
+        """
+        # Only timed, when the metrics are enabled, the lookup records its own comparisons.
+        start: float = perf_counter() if METRICS.enabled else 0.0
+        node: Node | None = self.find(key=key)
+
+        if node is None:
+            if start:
+                METRICS.observe(name="tree.delete", seconds=perf_counter() - start)
+            return False
+
+        if self.node.size == 1:
+            raise ValueError("Cannot delete the last key of an AVL tree.")
+
+        # A node with two children takes the key of its in-order next node, which is removed instead.
+        if node.left and node.right:
+            successor: Node = node.right
+            while successor.left:
+                successor = successor.left
+            node._key = successor.key
+            node = successor
+
+        # The removed node has at most one child, that takes its place.
+        child: Node | None = node.left or node.right
+        parent: Node | None = node.parent
+
+        if child:
+            child.parent = parent
+        if not parent:
+            child.root = True  # type: ignore
+            self.node = child  # type: ignore
+        elif node is parent.left:
+            parent.left = child
+        else:
+            parent.right = child
+
+        # Every ancestor node has one node less in its subtree.
+        ancestor: Node | None = parent
+        while ancestor:
+            ancestor.size -= 1
+            ancestor = ancestor.parent
+
+        self.rebalance(node=parent)
+
+        if self.logger.isEnabledFor(INFO):
+            self.logger.info("Node %s is deleted.", key)
+        if start:
+            METRICS.observe(name="tree.delete", seconds=perf_counter() - start)
+
+        return True
+
+    def delete_range(self, low: int, high: int) -> int:
+        """
+        Removes the keys between low and high (inclusive), with two splits and a join in O(log n).
+
+        Parameters:
+            low (int): Lower bound of the keys.
+            high (int): Upper bound of the keys.
+
+        Returns:
+            int: Number of keys removed.
+        """
+        removed: int = self.count(low=low, high=high)
+
+        if not removed:
+            return 0
+        if removed == len(self):
+            raise ValueError("Cannot delete every key of an AVL tree.")
+
+        # The nodes of the range are dropped, the smaller and larger keys are joined back.
+        smaller, _, rest = _split(node=self.node, key=low)
+        _, _, larger = _split(node=rest, key=high)
+
+        self.node = _join2(smaller, larger)  # type: ignore
+        self.node.parent = None
+        self.node.root = True
+
+        if self.logger.isEnabledFor(INFO):
+            self.logger.info("%s nodes between %s and %s are deleted.", removed, low, high)
+
+        return removed
+
+    def rebalance(self, node: Node | None) -> None:
+        """
+        Updates the heights of the nodes on the path of a deleted node, then rotates the unbalanced nodes.\n
+        Unlike an insert, a rotation can shrink the subtree, so the ancestor nodes are checked too.
+        Stops early, once the height of a subtree doesn't change.
+
+        Attributes:
+            node (Node | None): Parent node of the deleted node, whose sizes are already up to date.
+
+        Returns:
+            None
+        """
+        while node:
+            old_height: int = node.height
+            self.update_height(node=node)
+
+            if node.balance_factor > 1:
+                # A left child node without a heavier side, only needs a single rotation.
+                double: bool = self.calculate_balance_factor(node=node.left) < 0  # type: ignore
+                if double:
+                    self.rotate_left(node=node.left)  # type: ignore
+                self.rotate_right(node=node)
+            elif node.balance_factor < -1:
+                double = self.calculate_balance_factor(node=node.right) > 0  # type: ignore
+                if double:
+                    self.rotate_right(node=node.right)  # type: ignore
+                self.rotate_left(node=node)
+            elif node.height == old_height:
+                # If the height didn't change, none of the ancestor nodes will change either.
+                return
+            else:
+                node = node.parent
+                continue
+
+            if METRICS.enabled:
+                METRICS.increment(
+                    name="tree.rotations.double" if double else "tree.rotations.single"
+                )
+
+            # The rotated node is now below the root of its subtree.
+            top: Node = node.parent  # type: ignore
+            if top.height == old_height:
+                return
+            node = top.parent
+
     def show(
         self,
         node: Node | None,
         level: int = 0,
         prefix: str = "\nL - Left child node\nR - Right child node\n\nRoot--- ",
+        file: TextIO | None = None,
+        depth: int | None = None,
+        limit: int | None = None,
     ) -> None:
         """
-        Visualizes the AVL tree.
+        Visualizes the AVL tree.\n
+        The nodes are visited iteratively, so degenerate trees don't hit the recursion limit,
+        and the lines are written in chunks instead of a print per node.
 
         Attributes:
-            node (Node): Always pass the root node.
+            node (Node): Always pass the root node, or the root of a subtree.
             level (int): Default is 0.
             prefix (str): Is set to Root.
+            file (TextIO | None): Where the tree is written, stdout by default.
+            depth (int | None): Number of levels rendered, deeper subtrees are summarized.
+            limit (int | None): Max number of nodes rendered.
 
         Returns:
             None
         """
-        if node:
-            print(" " * (level * 4) + prefix + str(object=node.key))
-            self.show(node=node.left, level=level + 1, prefix="L--- ")
-            self.show(node=node.right, level=level + 1, prefix="R--- ")
+        output: TextIO = file or sys.stdout
+        # Lines, that are not written yet.
+        lines: list[str] = []
+        # Deepest rendered level, and the number of nodes that can still be rendered.
+        last_level: int = level + depth - 1 if depth is not None else sys.maxsize
+        remaining: int = limit if limit is not None else sys.maxsize
+        # Nodes still to be rendered with their level and line prefix, the left child is
+        # pushed last so it's rendered first.
+        stack: list[tuple[Node, int, str]] = (
+            [(node, level, " " * (level * 4) + prefix)] if node else []
+        )
+
+        while stack:
+            node, node_level, head = stack.pop()
+
+            if not remaining:
+                lines.append(f"... output limited to {limit} nodes.")
+                break
+            remaining -= 1
+
+            lines.append(head + str(node.key))
+
+            if node_level < last_level:
+                indent: str = " " * ((node_level + 1) * 4)
+                if node.right:
+                    stack.append((node.right, node_level + 1, indent + "R--- "))
+                if node.left:
+                    stack.append((node.left, node_level + 1, indent + "L--- "))
+            elif node.size > 1:
+                # Summarize the subtrees below the last rendered level.
+                lines.append(
+                    " " * ((node_level + 1) * 4) + f"... {node.size - 1} more nodes"
+                )
+
+            if len(lines) >= SHOW_CHUNK_LINES:
+                output.write("\n".join(lines) + "\n")
+                lines.clear()
+
+        if lines:
+            output.write("\n".join(lines) + "\n")
 
     def max_depth(self, node: Node | None) -> int:
         """
@@ -157,10 +1205,34 @@ class AVLTree:
 
         return max(ldepth, rdepth) + 1
 
+    def height(self, node: Node | None) -> int:
+        """
+        Returns the cached height of a subtree.
+
+        Parameters:
+            node (Node): Node object used to find the height.
+
+        Returns:
+            int: Height of the subtree, 0 if the node doesn't exist.
+        """
+        return node.height if node else 0
+
+    def update_height(self, node: Node) -> None:
+        """
+        Recalculates the height, balance factor and size of a node from its children's cached values.
+
+        Parameters:
+            node (Node): Node object, whose children already have up to date heights.
+
+        Returns:
+            None
+        """
+        node.update()
+
     def calculate_balance_factor(self, node: Node) -> int:
         """
         Calculating the balance factor of a node.\n
-        Balance Factor = Left Subtree Depth - Right Subtree Depth
+        Balance Factor = Left Subtree Height - Right Subtree Height
 
         Parameters:
             node (Node): The balance factor is calculated for this node.
@@ -168,19 +1240,15 @@ class AVLTree:
         Returns:
             int: The balance factor of the Node object.
         """
-        # Depth of the left subtree.
-        left_height: int = self.max_depth(node=node.left)
-        # Depth of the right subtree.
-        right_height: int = self.max_depth(node=node.right)
-
-        # Balance factor = Left Subtree Depth = Right Subtree Depth
-        balance_factor: int = left_height - right_height
+        # Balance factor = Left Subtree Height - Right Subtree Height
+        balance_factor: int = self.height(node=node.left) - self.height(node=node.right)
 
         return balance_factor
 
     def balancing(self, stack: list[Node]) -> None:
         """
-        Calculates the balance factors for all the nodes, then rotates the unbalanced nodes.
+        Updates the heights of the nodes on the insert path, then rotates the unbalanced nodes.\n
+        Stops early, once the height of an ancestor node doesn't change.
 
         Attributes:
             stack (list[Node]): List of nodes in the order, they were inserted to the tree.
@@ -192,34 +1260,61 @@ class AVLTree:
         while stack:
             # Get the last node from the list.
             node: Node = stack.pop()
-            # Calculate the balance factor for that node.
-            node.balance_factor = self.calculate_balance_factor(node=node)
+            old_height: int = node.height
+            # Update the height and balance factor from the cached heights of the children.
+            self.update_height(node=node)
 
             # If the balance factor is greater that 1, there is more child nodes on the left side.
             if node.balance_factor > 1:
-                self.logger.info(
-                    msg=f"Node {node.key} has a balance factor of {node.balance_factor}."
-                )
+                if self.logger.isEnabledFor(INFO):
+                    self.logger.info(
+                        "Node %s has a balance factor of %s.",
+                        node.key,
+                        node.balance_factor,
+                    )
 
                 # If the balance factor is less than 1, rotate left first.
-                if self.calculate_balance_factor(node=node.left) < 0:  # type: ignore
+                double: bool = self.calculate_balance_factor(node=node.left) < 0  # type: ignore
+                if double:
                     self.rotate_left(node=node.left)  # type: ignore
 
                 # Finally, rotate the node to the right.
                 self.rotate_right(node=node)
+
+                if METRICS.enabled:
+                    METRICS.increment(
+                        name="tree.rotations.double" if double else "tree.rotations.single"
+                    )
+                # A rotation after an insert restores the previous subtree height.
+                return
             # If the balance factor is greater that 1, there is more child nodes on the right side.
             elif node.balance_factor < -1:
-                self.logger.info(
-                    msg=f"Node {node.key} has a balance factor of {node.balance_factor}."
-                )
+                if self.logger.isEnabledFor(INFO):
+                    self.logger.info(
+                        "Node %s has a balance factor of %s.",
+                        node.key,
+                        node.balance_factor,
+                    )
 
                 # If the balance factor is greater than 1, rotate right first.
-                if self.calculate_balance_factor(node=node.right) > 0:  # type: ignore
+                double = self.calculate_balance_factor(node=node.right) > 0  # type: ignore
+                if double:
                     self.rotate_right(node=node.right)  # type: ignore
 
                 # Finally, rotate the node to the left.
                 self.rotate_left(node=node)
 
+                if METRICS.enabled:
+                    METRICS.increment(
+                        name="tree.rotations.double" if double else "tree.rotations.single"
+                    )
+                # A rotation after an insert restores the previous subtree height.
+                return
+
+            # If the height didn't change, none of the ancestor nodes will change either.
+            if node.height == old_height:
+                return
+
     def rotate_right(self, node: Node) -> None:
         """
         Rotate the unbalanced node to the right.
@@ -230,8 +1325,9 @@ class AVLTree:
         Returns:
             None
         """
-        self.logger.info(msg=f"Node {node.key} requires right rotation.")
-        self.logger.info(msg=f"Rotating...")
+        if self.logger.isEnabledFor(INFO):
+            self.logger.info("Node %s requires right rotation.", node.key)
+            self.logger.info(msg="Rotating...")
 
         if node.left:
             # Left child node of the unbalanced node.
@@ -239,7 +1335,8 @@ class AVLTree:
         else:
             # If the left child is None, we cannot perform a right rotation.
             self.logger.warning(
-                msg=f"Cannot perform right rotation on node {node.key} as it has no left child."
+                "Cannot perform right rotation on node %s as it has no left child.",
+                node.key,
             )
             return
 
@@ -272,7 +1369,12 @@ class AVLTree:
         child_node.right = node  # Node becomes the right child of child node.
         node.parent = child_node  # Update unbalanced node's parent.
 
-        self.logger.info(msg=f"Rotated right at node {node.key}.")
+        # Update the cached heights and sizes, the node is now below the child node.
+        self.update_height(node=node)
+        self.update_height(node=child_node)
+
+        if self.logger.isEnabledFor(INFO):
+            self.logger.info("Rotated right at node %s.", node.key)
 
     def rotate_left(self, node: Node) -> None:
         """
@@ -284,8 +1386,9 @@ class AVLTree:
         Returns:
             None
         """
-        self.logger.info(msg=f"Node {node.key} requires left rotation.")
-        self.logger.info(msg=f"Rotating...")
+        if self.logger.isEnabledFor(INFO):
+            self.logger.info("Node %s requires left rotation.", node.key)
+            self.logger.info(msg="Rotating...")
 
         if node.right:
             # Right child node of the unbalanced node.
@@ -293,7 +1396,8 @@ class AVLTree:
         else:
             # If the right child is None, we cannot perform a left rotation.
             self.logger.warning(
-                msg=f"Cannot perform left rotation on node {node.key} as it has no right child."
+                "Cannot perform left rotation on node %s as it has no right child.",
+                node.key,
             )
             return
 
@@ -326,7 +1430,12 @@ class AVLTree:
         child_node.left = node  # Node becomes the left child of child node.
         node.parent = child_node  # Update node's parent.
 
-        self.logger.info(msg=f"Rotated left at node {node.key}.")
+        # Update the cached heights and sizes, the node is now below the child node.
+        self.update_height(node=node)
+        self.update_height(node=child_node)
+
+        if self.logger.isEnabledFor(INFO):
+            self.logger.info("Rotated left at node %s.", node.key)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,65 @@
+import argparse
+import json
+import sys
+from argparse import ArgumentParser, Namespace
+
+
+def load(filename: str) -> dict[tuple[str, int, str], dict]:
+    """
+    Loads a JSON report of benchmarks/run.py.
+
+    Parameters:
+        filename (str): Path to the JSON report.
+
+    Returns:
+        dict: Results by workload, size and operation.
+    """
+    with open(file=filename, mode="r") as file:
+        report: dict = json.load(file)
+
+    return {
+        (result["workload"], result["size"], result["operation"]): result
+        for result in report["results"]
+    }
+
+
+def main() -> None:
+    parser: ArgumentParser = argparse.ArgumentParser(
+        description="Compare two benchmark reports, and flag the regressions."
+    )
+    parser.add_argument("baseline", type=str, help="Path to the older JSON report.")
+    parser.add_argument("candidate", type=str, help="Path to the newer JSON report.")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.10,
+        help="Relative slowdown of the p50 latency, that counts as a regression.",
+    )
+    args: Namespace = parser.parse_args()
+
+    baseline: dict = load(filename=args.baseline)
+    candidate: dict = load(filename=args.candidate)
+    regressions: int = 0
+
+    for key in sorted(baseline.keys() & candidate.keys()):
+        old: float = baseline[key]["p50_us"]
+        new: float = candidate[key]["p50_us"]
+        change: float = (new - old) / old if old else 0.0
+        flag: str = ""
+
+        if change > args.threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+
+        workload, size, operation = key
+        print(
+            f"{workload:>10} {size:>9} {operation:<22}"
+            f" {old:>12.3f}us -> {new:>12.3f}us {change:+8.1%}{flag}"
+        )
+
+    # A non zero exit code lets CI fail on regressions.
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
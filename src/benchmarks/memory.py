@@ -0,0 +1,62 @@
+import argparse
+import tracemalloc
+from argparse import ArgumentParser, Namespace
+from collections.abc import Callable
+
+from array_tree import ArrayAVLTree
+from avl_tree import AVLTree
+
+
+def measure(build: Callable[[list[int]], object], keys: list[int]) -> int:
+    """
+    Measures the memory, that is allocated while building a tree.
+
+    Parameters:
+        build (Callable): Builds a tree from sorted keys.
+        keys (list[int]): Sorted, unique keys.
+
+    Returns:
+        int: Allocated bytes, that are still held by the tree.
+    """
+    tracemalloc.start()
+    before: int = tracemalloc.get_traced_memory()[0]
+    tree: object = build(keys)
+    after: int = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    del tree
+    return after - before
+
+
+def main() -> None:
+    parser: ArgumentParser = argparse.ArgumentParser(
+        description="Compare the memory per key of the Node and array backed trees."
+    )
+    parser.add_argument(
+        "sizes",
+        type=int,
+        nargs="*",
+        default=[1_000_000, 10_000_000],
+        help="Number of keys.",
+    )
+    args: Namespace = parser.parse_args()
+
+    engines: dict[str, Callable[[list[int]], object]] = {
+        "AVLTree": lambda keys: AVLTree.from_sorted(keys=keys),
+        "ArrayAVLTree": lambda keys: ArrayAVLTree.from_sorted(keys=keys),
+    }
+
+    for size in args.sizes:
+        # Keys above 256, so they are not shared small int objects.
+        keys: list[int] = list(range(1_000, 1_000 + size))
+
+        for name, build in engines.items():
+            allocated: int = measure(build=build, keys=keys)
+            print(
+                f"{name:>12} {size:>10} keys: {allocated / 2**20:9.1f} MiB,"
+                f" {allocated / size:6.1f} bytes/key"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,566 @@
+import argparse
+import itertools
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from argparse import ArgumentParser, Namespace
+from bisect import bisect_left
+from collections.abc import Callable, Iterable
+
+from avl_tree import AVLTree
+from logger import configure_logging
+from storage import StoreAVLTree
+
+# Path to the DB.py entry point, used for the CLI round-trips.
+DB_SCRIPT: str = os.path.join(os.path.dirname(os.path.dirname(__file__)), "DB.py")
+
+WORKLOADS: tuple[str, ...] = ("sequential", "reverse", "random", "zipfian")
+
+
+def generate(workload: str, size: int, seed: int) -> list[int]:
+    """
+    Generates the keys of a workload.
+
+    Parameters:
+        workload (str): One of WORKLOADS.
+        size (int): Number of keys.
+        seed (int): Seed of the random generator, so runs are reproducible.
+
+    Returns:
+        list[int]: Keys in insert order, zipfian keys repeat.
+    """
+    rng: random.Random = random.Random(seed)
+
+    if workload == "sequential":
+        return list(range(size))
+    if workload == "reverse":
+        return list(range(size - 1, -1, -1))
+    if workload == "random":
+        return rng.sample(range(size * 10), size)
+
+    # Zipfian with s = 1.1, over size distinct keys that are spread out randomly.
+    weights: list[float] = list(
+        itertools.accumulate(1 / rank**1.1 for rank in range(1, size + 1))
+    )
+    keys: list[int] = rng.sample(range(size * 10), size)
+    return [
+        keys[min(bisect_left(weights, rng.random() * weights[-1]), size - 1)]
+        for _ in range(size)
+    ]
+
+
+def percentile(samples: list[int], fraction: float) -> float:
+    """
+    Returns a percentile of sorted latency samples, in microseconds.
+
+    Parameters:
+        samples (list[int]): Sorted latencies in nanoseconds.
+        fraction (float): Percentile between 0 and 1.
+
+    Returns:
+        float: The percentile in microseconds.
+    """
+    if not samples:
+        return 0.0
+    return samples[min(int(len(samples) * fraction), len(samples) - 1)] / 1000
+
+
+def measure(
+    operation: Callable[[object], object],
+    items: Iterable[object],
+    memory: bool,
+    setup: Callable[[], None] | None = None,
+) -> dict:
+    """
+    Times an operation per item, and optionally its peak memory in a second pass.
+
+    Parameters:
+        operation (Callable): Called once per item.
+        items (Iterable): Arguments of the operation.
+        memory (bool): Whether to repeat the run under tracemalloc, to get the peak memory.
+        setup (Callable | None): Called before each pass, and not timed.
+
+    Returns:
+        dict: count, seconds, throughput, p50_us, p99_us and peak_bytes.
+    """
+    items = list(items)
+    samples: list[int] = []
+    clock: Callable[[], int] = time.perf_counter_ns
+
+    if setup:
+        setup()
+
+    start: int = clock()
+    for item in items:
+        before: int = clock()
+        operation(item)
+        samples.append(clock() - before)
+    seconds: float = (clock() - start) / 1e9
+
+    peak: int | None = None
+    if memory:
+        if setup:
+            setup()
+        tracemalloc.start()
+        for item in items:
+            operation(item)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    samples.sort()
+
+    return {
+        "count": len(items),
+        "seconds": round(seconds, 6),
+        "throughput": round(len(items) / seconds, 1) if seconds else None,
+        "p50_us": round(percentile(samples=samples, fraction=0.50), 3),
+        "p99_us": round(percentile(samples=samples, fraction=0.99), 3),
+        "peak_bytes": peak,
+    }
+
+
+def bench_tree(workload: str, size: int, keys: list[int], memory: bool) -> list[dict]:
+    """
+    Benchmarks the inserts, and the (de)serialization of the built tree.
+
+    Parameters:
+        workload (str): Name of the workload.
+        size (int): Number of keys.
+        keys (list[int]): Keys in insert order.
+        memory (bool): Whether to measure the peak memory.
+
+    Returns:
+        list[dict]: A result per operation.
+    """
+    results: list[dict] = []
+
+    def record(operation: str, result: dict) -> None:
+        results.append(
+            {"workload": workload, "size": size, "operation": operation, **result}
+        )
+
+    # Every insert is timed, on a new tree per pass.
+    trees: list[AVLTree] = []
+
+    def setup() -> None:
+        trees[:] = [AVLTree(key=keys[0])]
+
+    record(
+        operation="insert",
+        result=measure(
+            operation=lambda key: trees[0].insert(key=key),  # type: ignore
+            items=keys[1:],
+            memory=memory,
+            setup=setup,
+        ),
+    )
+    tree: AVLTree = trees[0]
+
+    storage: StoreAVLTree = StoreAVLTree()
+    formats: dict[str, Callable[[], str | bytes]] = {
+        "text": lambda: storage.serialize(root=tree.node),
+        "binary": lambda: storage.serialize_binary(root=tree.node),
+        "compressed": lambda: storage.serialize_compressed(root=tree.node),
+    }
+
+    for name, serialize in formats.items():
+        nodes: str | bytes = serialize()
+        record(
+            operation=f"serialize_{name}",
+            result=measure(operation=lambda _: serialize(), items=[None], memory=memory),
+        )
+        record(
+            operation=f"deserialize_{name}",
+            result=measure(
+                operation=lambda _: storage.deserialize(nodes=nodes),
+                items=[None],
+                memory=memory,
+            ),
+        )
+
+        filename: str = f"bench_{workload}_{size}_{name}.db"
+        record(
+            operation=f"store_{name}",
+            result=measure(
+                operation=lambda _: storage.store(nodes=nodes, filename=filename),
+                items=[None],
+                memory=memory,
+            ),
+        )
+        record(
+            operation=f"read_{name}",
+            result=measure(
+                operation=lambda _: storage.read(filename=f"./DB/{filename}"),
+                items=[None],
+                memory=memory,
+            ),
+        )
+        os.remove(path=f"./DB/{filename}")
+
+    return results
+
+
+def bench_churn(
+    workload: str, size: int, keys: list[int], seed: int, memory: bool
+) -> list[dict]:
+    """
+    Benchmarks mixed inserts and deletes, that keep the size of the tree, and range deletes.
+
+    Parameters:
+        workload (str): Name of the workload.
+        size (int): Number of keys.
+        keys (list[int]): Keys of the tree.
+        seed (int): Seed of the random generator, so runs are reproducible.
+        memory (bool): Whether to measure the peak memory.
+
+    Returns:
+        list[dict]: A result per operation.
+    """
+    rng: random.Random = random.Random(seed)
+    distinct: list[int] = sorted(set(keys))
+    trees: list[AVLTree] = []
+
+    def setup() -> None:
+        trees[:] = [AVLTree.from_sorted(keys=distinct)]
+
+    # Every step deletes a random key of the tree, and inserts a new key.
+    operations: list[tuple[bool, int]] = []
+    pool: list[int] = distinct[:]
+    new_key: int = distinct[-1] + 1
+    for _ in range(len(pool)):
+        index: int = rng.randrange(len(pool))
+        operations += [(False, pool[index]), (True, new_key)]
+        pool[index] = new_key
+        new_key += 1
+
+    def churn(operation: tuple[bool, int]) -> None:
+        if operation[0]:
+            trees[0].insert(key=operation[1])
+        else:
+            trees[0].delete(key=operation[1])
+
+    # 50 ranges of 1% of the keys each, so at most half of the tree is removed.
+    width: int = max(len(distinct) // 100, 1)
+    ranges: list[tuple[int, int]] = []
+    for _ in range(min(50, len(distinct) // width - 1)):
+        index = rng.randrange(len(distinct) - width)
+        ranges.append((distinct[index], distinct[index + width - 1]))
+
+    return [
+        {
+            "workload": workload,
+            "size": size,
+            "operation": "churn",
+            **measure(
+                operation=churn,  # type: ignore
+                items=operations,
+                memory=memory,
+                setup=setup,
+            ),
+        },
+        {
+            "workload": workload,
+            "size": size,
+            "operation": "delete_range",
+            **measure(
+                operation=lambda bounds: trees[0].delete_range(  # type: ignore
+                    low=bounds[0], high=bounds[1]  # type: ignore
+                ),
+                items=ranges,
+                memory=memory,
+                setup=setup,
+            ),
+        },
+    ]
+
+
+def bench_batch(workload: str, size: int, keys: list[int], memory: bool) -> list[dict]:
+    """
+    Benchmarks the batch inserts and lookups, against the same keys in a per-key loop.\n
+    Half of the keys are in the tree, the other half is the batch. The throughput of
+    every operation is in keys per second.
+
+    Parameters:
+        workload (str): Name of the workload.
+        size (int): Number of keys.
+        keys (list[int]): Keys in insert order.
+        memory (bool): Whether to measure the peak memory.
+
+    Returns:
+        list[dict]: A result per operation.
+    """
+    distinct: list[int] = sorted(set(keys))
+    batch: list[int] = keys[1::2]
+    trees: list[AVLTree] = []
+
+    def setup() -> None:
+        trees[:] = [AVLTree.from_sorted(keys=distinct[::2])]
+
+    def insert_loop(_: object) -> None:
+        # Insert the batch one key at a time, the baseline of insert_many.
+        for key in batch:
+            trees[0].insert(key=key)
+
+    operations: dict[str, Callable[[object], object]] = {
+        "insert_loop": insert_loop,
+        "insert_many": lambda _: trees[0].insert_many(keys=batch),
+        "contains_loop": lambda _: [trees[0].contains(key=key) for key in batch],
+        "contains_many": lambda _: trees[0].contains_many(keys=batch),
+        "rank_loop": lambda _: [trees[0].rank(key=key) for key in batch],
+        "rank_many": lambda _: trees[0].rank_many(keys=batch),
+    }
+
+    results: list[dict] = []
+    for operation, run in operations.items():
+        result: dict = measure(operation=run, items=[None], memory=memory, setup=setup)
+        result["count"] = len(batch)
+        result["throughput"] = (
+            round(len(batch) / result["seconds"], 1) if result["seconds"] else None
+        )
+        results.append(
+            {"workload": workload, "size": size, "operation": operation, **result}
+        )
+
+    return results
+
+
+def bench_cli(workload: str, size: int, keys: list[int], rounds: int) -> list[dict]:
+    """
+    Benchmarks DB.py add and show round-trips, each in a new Python process.
+
+    Parameters:
+        workload (str): Name of the workload.
+        size (int): Number of keys.
+        keys (list[int]): Keys of the DB file.
+        rounds (int): Number of add and show calls.
+
+    Returns:
+        list[dict]: A result per command.
+    """
+    filename: str = f"./DB/bench_cli_{workload}_{size}.db"
+    tree: AVLTree = AVLTree.from_iterable(keys=keys)
+    storage: StoreAVLTree = StoreAVLTree()
+    storage.store(nodes=storage.serialize_binary(root=tree.node), filename=filename[5:])
+
+    def run(arguments: list[str]) -> None:
+        subprocess.run(
+            [sys.executable, DB_SCRIPT, "--log-level", "OFF", *arguments],
+            check=True,
+            stdout=subprocess.DEVNULL,
+        )
+
+    new_keys: list[int] = [max(keys) + 1 + number for number in range(rounds)]
+    results: list[dict] = [
+        {
+            "workload": workload,
+            "size": size,
+            "operation": "cli_add",
+            **measure(
+                operation=lambda key: run(arguments=["add", str(key), filename]),
+                items=new_keys,
+                memory=False,
+            ),
+        },
+        {
+            "workload": workload,
+            "size": size,
+            "operation": "cli_show",
+            **measure(
+                operation=lambda _: run(arguments=["show", filename]),
+                items=range(rounds),
+                memory=False,
+            ),
+        },
+    ]
+
+    for path in (filename, filename + ".wal"):
+        if os.path.exists(path=path):
+            os.remove(path=path)
+
+    return results
+
+
+def parse_importtime(stderr: str) -> dict[str, int]:
+    """
+    Parses the output of python -X importtime.
+
+    Parameters:
+        stderr (str): Standard error of the process.
+
+    Returns:
+        dict[str, int]: Cumulative import time in microseconds, by top-level module.
+    """
+    modules: dict[str, int] = {}
+
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+
+        _, cumulative, name = line[len("import time:") :].split(sep="|")
+        # Nested imports are indented, their time is already in their parent.
+        if not name.startswith("  "):
+            modules[name.strip()] = int(cumulative)
+
+    return modules
+
+
+def bench_startup(rounds: int) -> list[dict]:
+    """
+    Benchmarks the startup of DB.py, with a command that does nothing.
+
+    Parameters:
+        rounds (int): Number of processes.
+
+    Returns:
+        list[dict]: The wall-clock time of the process, and its total import time with the
+        slowest top-level imports.
+    """
+    command: list[str] = [sys.executable, DB_SCRIPT, "--log-level", "OFF"]
+    imports: list[int] = []
+    modules: dict[str, int] = {}
+
+    def run(importtime: bool) -> None:
+        process: subprocess.CompletedProcess = subprocess.run(
+            command[:1] + ["-X", "importtime"] + command[1:] if importtime else command,
+            check=True,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            text=True,
+        )
+
+        if importtime:
+            modules.update(parse_importtime(stderr=process.stderr))
+            imports.append(sum(modules.values()))
+
+    wall: dict = measure(
+        operation=lambda _: run(importtime=False), items=range(rounds), memory=False
+    )
+    for _ in range(rounds):
+        modules.clear()
+        run(importtime=True)
+
+    imports.sort()
+
+    return [
+        {"workload": "startup", "size": 0, "operation": "cli_noop", **wall},
+        {
+            "workload": "startup",
+            "size": 0,
+            "operation": "import_noop",
+            "count": rounds,
+            "seconds": round(sum(imports) / 1e6, 6),
+            "throughput": None,
+            "p50_us": float(imports[len(imports) // 2]),
+            "p99_us": float(imports[-1]),
+            "peak_bytes": None,
+            # Slowest top-level imports of the last round.
+            "modules": dict(sorted(modules.items(), key=lambda item: -item[1])[:10]),
+        },
+    ]
+
+
+def main() -> None:
+    parser: ArgumentParser = argparse.ArgumentParser(
+        description="Benchmark the AVL tree, the storage formats and the CLI."
+    )
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[1_000, 10_000, 100_000],
+        help="Number of keys, up to 10^7.",
+    )
+    parser.add_argument(
+        "--workloads",
+        type=str,
+        nargs="+",
+        choices=WORKLOADS,
+        default=list(WORKLOADS),
+        help="Key workloads.",
+    )
+    parser.add_argument("--seed", type=int, default=42, help="Seed of the workloads.")
+    parser.add_argument(
+        "--memory", action="store_true", help="Measure the peak memory with tracemalloc."
+    )
+    parser.add_argument(
+        "--cli-max-size",
+        type=int,
+        default=100_000,
+        help="Largest size, that also runs the CLI round-trips.",
+    )
+    parser.add_argument(
+        "--cli-rounds", type=int, default=5, help="Number of CLI calls per command."
+    )
+    parser.add_argument(
+        "--startup-rounds",
+        type=int,
+        default=10,
+        help="Number of DB.py startups, timed with a command that does nothing. 0 skips them.",
+    )
+    parser.add_argument(
+        "--output", type=str, default=None, help="Path to the JSON report, or stdout."
+    )
+    args: Namespace = parser.parse_args()
+
+    configure_logging(level="OFF")
+    output: str | None = os.path.abspath(args.output) if args.output else None
+
+    results: list[dict] = []
+
+    # The DB and log files of the benchmark are kept out of the working directory.
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+
+        if args.startup_rounds > 0:
+            results += bench_startup(rounds=args.startup_rounds)
+
+        for size in args.sizes:
+            for workload in args.workloads:
+                keys: list[int] = generate(workload=workload, size=size, seed=args.seed)
+                results += bench_tree(
+                    workload=workload, size=size, keys=keys, memory=args.memory
+                )
+                results += bench_churn(
+                    workload=workload,
+                    size=size,
+                    keys=keys,
+                    seed=args.seed,
+                    memory=args.memory,
+                )
+                results += bench_batch(
+                    workload=workload, size=size, keys=keys, memory=args.memory
+                )
+
+                if size <= args.cli_max_size:
+                    results += bench_cli(
+                        workload=workload, size=size, keys=keys, rounds=args.cli_rounds
+                    )
+
+                print(f"{workload} {size} done.", file=sys.stderr)
+
+    report: dict = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": args.seed,
+            "sizes": args.sizes,
+            "workloads": args.workloads,
+        },
+        "results": results,
+    }
+
+    if output:
+        with open(file=output, mode="w") as file:
+            json.dump(report, file, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+
+
+if __name__ == "__main__":
+    main()
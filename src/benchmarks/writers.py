@@ -0,0 +1,123 @@
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser, Namespace
+from contextlib import redirect_stdout
+
+from database import WAL_COMPACT_BYTES, read_nodes
+from DB import add
+from logger import configure_logging
+
+
+def writer(filename: str, keys: range, compact_bytes: int) -> None:
+    """
+    Adds keys to the DB one at a time, like a loop of DB.py add calls.
+
+    Parameters:
+        filename (str): Path to the DB file.
+        keys (range): Keys of this writer.
+        compact_bytes (int): Size of the write-ahead log, that triggers a compaction.
+
+    Returns:
+        None
+    """
+    configure_logging(level="OFF")
+
+    with open(file=os.devnull, mode="w") as null, redirect_stdout(null):
+        for key in keys:
+            add(key=key, filename=filename, compact_bytes=compact_bytes)
+
+
+def bench_writers(writers: int, keys: int, compact_bytes: int) -> dict:
+    """
+    Runs parallel writer processes against a single DB file.
+
+    Parameters:
+        writers (int): Number of writer processes.
+        keys (int): Number of keys per writer.
+        compact_bytes (int): Size of the write-ahead log, that triggers a compaction.
+
+    Returns:
+        dict: writers, keys, seconds, throughput, and the number of lost keys.
+    """
+    filename: str = f"./DB/writers_{writers}.db"
+
+    # The DB file exists before the writers start, with a key none of them adds.
+    with open(file=os.devnull, mode="w") as null, redirect_stdout(null):
+        add(key=-1, filename=filename)
+
+    processes: list[multiprocessing.Process] = [
+        multiprocessing.Process(
+            target=writer,
+            args=(filename, range(number * keys, (number + 1) * keys), compact_bytes),
+        )
+        for number in range(writers)
+    ]
+
+    start: float = time.perf_counter()
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    seconds: float = time.perf_counter() - start
+
+    stored: int = len(read_nodes(filename=filename)) - 1
+
+    return {
+        "writers": writers,
+        "keys": writers * keys,
+        "seconds": round(seconds, 6),
+        "throughput": round(writers * keys / seconds, 1),
+        "lost": writers * keys - stored,
+    }
+
+
+def main() -> None:
+    parser: ArgumentParser = argparse.ArgumentParser(
+        description="Benchmark parallel DB.py add writers on a single DB file."
+    )
+    parser.add_argument(
+        "--writers",
+        type=int,
+        nargs="+",
+        default=[1, 2, 4, 8],
+        help="Numbers of writer processes.",
+    )
+    parser.add_argument("--keys", type=int, default=200, help="Keys per writer.")
+    parser.add_argument(
+        "--compact-bytes",
+        type=int,
+        default=WAL_COMPACT_BYTES,
+        help="Size of the write-ahead log, that triggers a compaction.",
+    )
+    parser.add_argument(
+        "--output", type=str, default=None, help="Path to the JSON report, or stdout."
+    )
+    args: Namespace = parser.parse_args()
+
+    configure_logging(level="OFF")
+    output: str | None = os.path.abspath(args.output) if args.output else None
+
+    # The DB and log files of the benchmark are kept out of the working directory.
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        results: list[dict] = [
+            bench_writers(
+                writers=writers, keys=args.keys, compact_bytes=args.compact_bytes
+            )
+            for writers in args.writers
+        ]
+
+    if output:
+        with open(file=output, mode="w") as file:
+            json.dump(results, file, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,404 @@
+import math
+import os
+import struct
+import sys
+import warnings
+from array import array
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from typing import BinaryIO
+
+from container import is_tree_path, open_tree, sidecar_path
+from metrics import METRICS
+
+# Suffix of the Bloom filter, next to the DB file or in the container of a tree.
+BLOOM_SUFFIX: str = ".bloom"
+
+# Header of the Bloom filter: magic, number of bits set per key, false positive rate and number of words.
+BLOOM_MAGIC: bytes = b"AVLB"
+HEADER: struct.Struct = struct.Struct("<4sBdQ")
+
+# Bits are set in 64 bit words, so a lookup reads a single word.
+WORD: struct.Struct = struct.Struct("<Q")
+
+# A blocked Bloom filter needs about 20% more bits than a classic one, for the same rate.
+BLOCKED_OVERHEAD: float = 1.2
+
+MASK: int = (1 << 64) - 1
+
+
+def parse_rate(value: str | float) -> float:
+    """
+    Parses and checks a false positive rate, from RDMS_BLOOM_FP, --bloom-fp or a caller.
+
+    Parameters:
+        value (str | float): The rate, as a number or its text.
+
+    Returns:
+        float: The rate, at least 0 and below 1.
+    """
+    try:
+        rate: float = float(value)
+    except ValueError:
+        rate = math.nan
+
+    # NaN fails the comparison as well.
+    if not 0 <= rate < 1:
+        raise ValueError(
+            f"The false positive rate must be a number from 0 to below 1, not {value}."
+        )
+
+    return rate
+
+
+def _environment_rate() -> float | None:
+    """
+    Returns the rate of RDMS_BLOOM_FP, None with a warning if it isn't a valid rate.
+    """
+    value: str | None = os.environ.get("RDMS_BLOOM_FP")
+    if value is None:
+        return None
+
+    try:
+        return parse_rate(value=value)
+    except ValueError as error:
+        warnings.warn(f"RDMS_BLOOM_FP is ignored. {error}")
+        return None
+
+
+# False positive rate of new Bloom filters, set with RDMS_BLOOM_FP or configure_bloom.
+# None keeps the Bloom filter of a DB file with its rate, and 0 removes it.
+FP_RATE: float | None = _environment_rate()
+
+
+def configure_bloom(fp_rate: str | float | None) -> None:
+    """
+    Sets the false positive rate of the Bloom filters, written when a DB file is stored.
+
+    Parameters:
+        fp_rate (str | float | None): False positive rate, checked by parse_rate. None keeps
+        the rate of an existing Bloom filter, 0 removes it.
+
+    Returns:
+        None
+    """
+    global FP_RATE
+
+    FP_RATE = None if fp_rate is None else parse_rate(value=fp_rate)
+
+
+def bloom_rate(filename: str) -> float | None:
+    """
+    Returns the false positive rate of the Bloom filter, a stored DB file gets.
+
+    Parameters:
+        filename (str): Path to the DB file.
+
+    Returns:
+        float | None: The configured rate, else the rate of the existing Bloom filter,
+        None if the DB file gets no Bloom filter.
+    """
+    rate: float | None = FP_RATE
+    if rate is None:
+        header: tuple[int, float, int] | None = read_header(filename=filename)
+        rate = header[1] if header else None
+
+    return rate or None
+
+
+def _mix(key: int) -> int:
+    """
+    Scrambles a key into 64 random looking bits, with the splitmix64 finalizer.
+    """
+    z: int = (key + 0x9E3779B97F4A7C15) & MASK
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & MASK
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & MASK
+    return z ^ (z >> 31)
+
+
+def _mask(z: int, hashes: int) -> int:
+    """
+    Returns the bits of a mixed key within its word, every bit position takes 6 bits of z.
+    """
+    mask: int = 0
+    for index in range(hashes):
+        mask |= 1 << ((z >> (16 + 6 * index)) & 63)
+    return mask
+
+
+def _tables(hashes: int) -> list[list[int]]:
+    """
+    Builds the lookup tables of _mask, that turn 12 bits of z into the bits of 2 positions.
+    """
+    tables: list[list[int]] = []
+
+    for index in range(0, 8, 2):
+        tables.append(
+            [
+                (1 << (bits & 63) if index < hashes else 0)
+                | (1 << (bits >> 6) if index + 1 < hashes else 0)
+                for bits in range(4096)
+            ]
+        )
+
+    return tables
+
+
+class BloomFilter:
+    """
+    A blocked Bloom filter of int keys, every key sets its bits in a single 64 bit word.\n
+    A negative answer is always right, a positive answer is wrong at about the false positive rate.
+
+    Attributes:
+        words (array | memoryview): The 64 bit words.
+        hashes (int): Number of bits set per key, at most 8.
+        fp_rate (float): False positive rate, the filter was sized for.
+    """
+
+    def __init__(self, words: array | memoryview, hashes: int, fp_rate: float) -> None:
+        """
+        Initializes a BloomFilter object.
+
+        Parameters:
+            words (array | memoryview): The 64 bit words.
+            hashes (int): Number of bits set per key.
+            fp_rate (float): False positive rate, the filter was sized for.
+        """
+        self.words: array | memoryview = words
+        self.hashes: int = hashes
+        self.fp_rate: float = fp_rate
+
+    @classmethod
+    def for_capacity(cls, capacity: int, fp_rate: float) -> "BloomFilter":
+        """
+        Creates an empty Bloom filter, sized for a number of keys.
+
+        Parameters:
+            capacity (int): Expected number of keys.
+            fp_rate (float): False positive rate at that number of keys.
+
+        Returns:
+            BloomFilter: Returns a BloomFilter object.
+        """
+        bits: float = -max(capacity, 1) * math.log(fp_rate) / math.log(2) ** 2
+        count: int = max(math.ceil(bits * BLOCKED_OVERHEAD / 64), 1)
+        hashes: int = min(max(round(-math.log2(fp_rate)), 1), 8)
+
+        return cls(words=array("Q", [0]) * count, hashes=hashes, fp_rate=fp_rate)
+
+    @classmethod
+    def from_keys(
+        cls, keys: Iterable[int], capacity: int, fp_rate: float
+    ) -> "BloomFilter":
+        """
+        Creates a Bloom filter of the keys.
+
+        Parameters:
+            keys (Iterable[int]): The keys.
+            capacity (int): Expected number of keys, including the ones added later.
+            fp_rate (float): False positive rate at that number of keys.
+
+        Returns:
+            BloomFilter: Returns a BloomFilter object.
+        """
+        bloom: BloomFilter = cls.for_capacity(capacity=capacity, fp_rate=fp_rate)
+        words: array = bloom.words  # type: ignore
+        count: int = len(words)
+        # Four table lookups are faster than a loop over the bit positions.
+        first, second, third, fourth = _tables(hashes=bloom.hashes)
+
+        for key in keys:
+            z: int = _mix(key=key)
+            words[z % count] |= (
+                first[(z >> 16) & 4095]
+                | second[(z >> 28) & 4095]
+                | third[(z >> 40) & 4095]
+                | fourth[(z >> 52) & 4095]
+            )
+
+        return bloom
+
+    def locate(self, key: int) -> tuple[int, int]:
+        """
+        Returns the word and the bits of a key.
+
+        Parameters:
+            key (int): The key.
+
+        Returns:
+            tuple[int, int]: Index of the word, and the mask of the bits.
+        """
+        z: int = _mix(key=key)
+        return z % len(self.words), _mask(z=z, hashes=self.hashes)
+
+    def add(self, key: int) -> None:
+        """
+        Sets the bits of a key.
+
+        Parameters:
+            key (int): The key.
+
+        Returns:
+            None
+        """
+        index, mask = self.locate(key=key)
+        self.words[index] |= mask
+
+    def __contains__(self, key: int) -> bool:
+        """
+        Checks whether the key may be in the filter.
+
+        Parameters:
+            key (int): The key.
+
+        Returns:
+            bool: False if the key is surely not in the filter.
+        """
+        index, mask = self.locate(key=key)
+        return self.words[index] & mask == mask
+
+    def to_bytes(self) -> bytes:
+        """
+        Serializes the Bloom filter, the words are little endian.
+
+        Returns:
+            bytes: Header and words.
+        """
+        words: array = array("Q", self.words)
+        if sys.byteorder == "big":
+            words.byteswap()
+
+        return (
+            HEADER.pack(BLOOM_MAGIC, self.hashes, self.fp_rate, len(words))
+            + words.tobytes()
+        )
+
+
+@contextmanager
+def _open(filename: str, mode: str = "rb") -> Iterator[tuple[BinaryIO, int] | None]:
+    """
+    Opens the Bloom filter of a DB file, and yields the file and the offset of the filter in it,
+    None if there is none. The Bloom filter of a tree is stored in its container file.
+    """
+    if is_tree_path(filename=filename):
+        path: str = sidecar_path(filename=filename, suffix=BLOOM_SUFFIX)
+        with open_tree(filename=path, mode=mode) as entry:
+            yield entry[:2] if entry else None
+        return
+
+    try:
+        file: BinaryIO = open(file=filename + BLOOM_SUFFIX, mode=mode)  # type: ignore
+    except FileNotFoundError:
+        yield None
+        return
+
+    with file:
+        yield file, 0
+
+
+def read_header(filename: str) -> tuple[int, float, int] | None:
+    """
+    Reads the header of the Bloom filter of a DB file.
+
+    Parameters:
+        filename (str): Path to the DB file.
+
+    Returns:
+        tuple[int, float, int] | None: Bits set per key, false positive rate and number of words,
+        None if the DB file has no Bloom filter.
+    """
+    with _open(filename=filename) as bloom:
+        if bloom is None:
+            return None
+        file, start = bloom
+        file.seek(start)
+        header: bytes = file.read(HEADER.size)
+
+    if len(header) < HEADER.size:
+        return None
+
+    magic, hashes, fp_rate, count = HEADER.unpack(header)
+    return (hashes, fp_rate, count) if magic == BLOOM_MAGIC else None
+
+
+def may_contain(filename: str, key: int) -> bool:
+    """
+    Checks the Bloom filter of a DB file, only the word of the key is read.
+
+    Parameters:
+        filename (str): Path to the DB file.
+        key (int): The key.
+
+    Returns:
+        bool: False if the key is surely not in the DB file, True if it may be or
+        if the DB file has no Bloom filter.
+    """
+    header: tuple[int, float, int] | None = read_header(filename=filename)
+    if header is None:
+        return True
+
+    hashes, _, count = header
+    z: int = _mix(key=key)
+    mask: int = _mask(z=z, hashes=hashes)
+
+    with _open(filename=filename) as bloom:
+        if bloom is None:
+            return True
+        file, start = bloom
+        file.seek(start + HEADER.size + (z % count) * WORD.size)
+        word: int = WORD.unpack(file.read(WORD.size))[0]
+
+    found: bool = word & mask == mask
+    if METRICS.enabled:
+        METRICS.increment(name="bloom.maybe" if found else "bloom.negative")
+
+    return found
+
+
+def add_key(filename: str, key: int) -> None:
+    """
+    Sets the bits of a key in the Bloom filter of a DB file, in place.\n
+    Callers hold the lock of the DB file, and set the bits before the key is written,
+    so a reader never misses it. sync_bloom makes the bits durable.
+
+    Parameters:
+        filename (str): Path to the DB file.
+        key (int): The key.
+
+    Returns:
+        None
+    """
+    header: tuple[int, float, int] | None = read_header(filename=filename)
+    if header is None:
+        return
+
+    hashes, _, count = header
+    z: int = _mix(key=key)
+    mask: int = _mask(z=z, hashes=hashes)
+
+    with _open(filename=filename, mode="r+b") as bloom:
+        if bloom is None:
+            return
+        file, start = bloom
+        offset: int = start + HEADER.size + (z % count) * WORD.size
+
+        file.seek(offset)
+        word: int = WORD.unpack(file.read(WORD.size))[0]
+        if word & mask != mask:
+            file.seek(offset)
+            file.write(WORD.pack(word | mask))
+
+
+def sync_bloom(filename: str) -> None:
+    """
+    Makes the bits set by add_key durable, before the keys they cover.
+
+    Parameters:
+        filename (str): Path to the DB file.
+
+    Returns:
+        None
+    """
+    with _open(filename=filename) as bloom:
+        if bloom is not None:
+            os.fsync(bloom[0].fileno())
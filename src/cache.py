@@ -0,0 +1,204 @@
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+from avl_tree import AVLTree, Node
+from container import split_tree_path
+from storage import wal_path
+
+# Estimated memory of a cached node, its key included.
+NODE_BYTES: int = sys.getsizeof(Node(key=0)) + sys.getsizeof(2**40)
+
+# Identity of a DB file: inode, mtime and size of the DB file, and size of its write-ahead log.
+Stamp = tuple[int, int, int, int]
+
+
+def stamp(filename: str, logged: int | None = None) -> Stamp | None:
+    """
+    Returns the identity of a DB file, an atomic store always changes its inode.\n
+    A tree of a container file has the identity of the container, which grows on every write.
+
+    Parameters:
+        filename (str): Path to the DB file.
+        logged (int | None): Size of the write-ahead log, it's looked up if None.
+
+    Returns:
+        Stamp | None: The identity, None if the DB file doesn't exist.
+    """
+    try:
+        status: os.stat_result = os.stat(split_tree_path(filename=filename)[0])
+    except FileNotFoundError:
+        return None
+
+    if logged is None:
+        try:
+            logged = os.path.getsize(wal_path(filename=filename))
+        except FileNotFoundError:
+            logged = 0
+
+    return (status.st_ino, status.st_mtime_ns, status.st_size, logged)
+
+
+class TreeCache:
+    """
+    A least recently used cache of opened trees, by the absolute path to their DB file.\n
+    An entry is only returned while the DB file and its write-ahead log are unchanged.
+    The trees are shared with the callers, so a caller that changes a tree must not use the cache.
+
+    Attributes:
+        max_entries (int): Max number of cached trees, 0 disables the cache.
+        max_bytes (int): Max estimated memory of the cached trees.
+        entries (OrderedDict[str, tuple[Stamp, AVLTree]]): Cached trees, least recently used first.
+        size (int): Estimated memory of the cached trees.
+        hits (int): Number of lookups, that returned a tree.
+        misses (int): Number of lookups, that didn't.
+    """
+
+    def __init__(
+        self, max_entries: int = 8, max_bytes: int = 256 * 1024 * 1024
+    ) -> None:
+        """
+        Initializes a TreeCache object.
+
+        Parameters:
+            max_entries (int): Max number of cached trees, 0 disables the cache.
+            max_bytes (int): Max estimated memory of the cached trees.
+        """
+        self.max_entries: int = max_entries
+        self.max_bytes: int = max_bytes
+        self.entries: OrderedDict[str, tuple[Stamp, AVLTree]] = OrderedDict()
+        self.size: int = 0
+        self.hits: int = 0
+        self.misses: int = 0
+        # Several threads of a process share the cache.
+        self._lock: threading.RLock = threading.RLock()
+
+    def __len__(self) -> int:
+        """
+        Returns the number of cached trees.
+
+        Returns:
+            int: Number of entries.
+        """
+        return len(self.entries)
+
+    def get(self, filename: str) -> AVLTree | None:
+        """
+        Returns the cached tree of a DB file, if the file didn't change since it was cached.
+
+        Parameters:
+            filename (str): Path to the DB file.
+
+        Returns:
+            AVLTree | None: The tree, None if it isn't cached or is stale.
+        """
+        path: str = os.path.abspath(filename)
+
+        with self._lock:
+            entry: tuple[Stamp, AVLTree] | None = self.entries.get(path)
+
+            if entry is not None and entry[0] == stamp(filename=filename):
+                self.entries.move_to_end(key=path)
+                self.hits += 1
+                return entry[1]
+
+            # A stale entry is dropped right away.
+            if entry is not None:
+                self.invalidate(filename=filename)
+
+            self.misses += 1
+            return None
+
+    def put(
+        self, filename: str, tree: AVLTree, identity: Stamp | None = None
+    ) -> None:
+        """
+        Caches the tree of a DB file, and evicts the least recently used trees over budget.
+
+        Parameters:
+            filename (str): Path to the DB file.
+            tree (AVLTree): The tree, as stored in the DB file and its write-ahead log.
+            identity (Stamp | None): Identity of the DB file when it was read, taken before
+            reading so a concurrent change makes the entry stale. Looked up if None.
+
+        Returns:
+            None
+        """
+        size: int = len(tree) * NODE_BYTES
+
+        # The cache is disabled, or the tree alone is over budget.
+        if not self.max_entries or size > self.max_bytes:
+            self.invalidate(filename=filename)
+            return
+
+        identity = identity or stamp(filename=filename)
+        if identity is None:
+            return
+
+        with self._lock:
+            self.invalidate(filename=filename)
+            self.entries[os.path.abspath(filename)] = (identity, tree)
+            self.size += size
+            self.evict()
+
+    def evict(self) -> None:
+        """
+        Evicts the least recently used trees, until the cache is within budget.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            while self.entries and (
+                len(self.entries) > self.max_entries or self.size > self.max_bytes
+            ):
+                _, (_, evicted) = self.entries.popitem(last=False)
+                self.size -= len(evicted) * NODE_BYTES
+
+    def invalidate(self, filename: str | None = None) -> None:
+        """
+        Drops the cached tree of a DB file, or every cached tree.
+
+        Parameters:
+            filename (str | None): Path to the DB file, None drops every tree.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            if filename is None:
+                self.entries.clear()
+                self.size = 0
+                return
+
+            entry: tuple[Stamp, AVLTree] | None = self.entries.pop(
+                os.path.abspath(filename), None
+            )
+            if entry is not None:
+                self.size -= len(entry[1]) * NODE_BYTES
+
+
+# Trees of the process, sized with RDMS_CACHE_ENTRIES and RDMS_CACHE_BYTES or configure_cache.
+TREES: TreeCache = TreeCache(
+    max_entries=int(os.environ.get("RDMS_CACHE_ENTRIES", 8)),
+    max_bytes=int(os.environ.get("RDMS_CACHE_BYTES", 256 * 1024 * 1024)),
+)
+
+
+def configure_cache(
+    max_entries: int = 8, max_bytes: int = 256 * 1024 * 1024
+) -> None:
+    """
+    Sets the budget of the tree cache, and evicts the trees over it.
+
+    Parameters:
+        max_entries (int): Max number of cached trees, 0 disables the cache.
+        max_bytes (int): Max estimated memory of the cached trees.
+
+    Returns:
+        None
+    """
+    TREES.max_entries = max_entries
+    TREES.max_bytes = max_bytes
+    TREES.evict()
@@ -0,0 +1,476 @@
+import os
+import struct
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import BinaryIO
+from zlib import crc32
+
+# Header of a container file: magic, version, then offset, length and CRC32 of the catalog.
+CONTAINER_MAGIC: bytes = b"AVLC"
+CONTAINER_VERSION: int = 1
+HEADER: struct.Struct = struct.Struct("<4sBQQI")
+
+# Catalog entry: offset and length of the tree, then the length of its UTF-8 name.
+ENTRY: struct.Struct = struct.Struct("<QQH")
+
+# Separates the container file from the tree name, in the path of a tree. A path can't
+# hold a NUL character, so a path given by a user never names a tree by accident, the
+# path of a tree is only built by tree_path, from --tree or a server request that has one.
+TREE_SEPARATOR: str = "\0"
+
+# Readers retry a catalog, that was read while a writer replaced it.
+READ_ATTEMPTS: int = 3
+
+# A write reclaims the dead space, once it's larger than the live trees and this size in bytes.
+RECLAIM_BYTES: int = 1024 * 1024
+
+Catalog = dict[str, tuple[int, int]]
+
+# Decoded catalogs by container path, with the inode and header they were read for.
+_catalogs: dict[str, tuple[tuple[int, bytes], Catalog]] = {}
+
+
+def tree_path(filename: str, tree: str) -> str:
+    """
+    Returns the path of a named tree in a container file.
+
+    Parameters:
+        filename (str): Path to the container file.
+        tree (str): Name of the tree.
+
+    Returns:
+        str: The container path and the tree name, joined by TREE_SEPARATOR.
+    """
+    if (
+        not tree
+        or TREE_SEPARATOR in tree
+        or "\n" in tree
+        or "/" in tree
+        or "\\" in tree
+        or len(tree.encode()) > 255
+    ):
+        raise ValueError(
+            f"Tree name {tree!r} must be 1 to 255 bytes, without NUL, newlines or slashes."
+        )
+
+    return f"{filename}{TREE_SEPARATOR}{tree}"
+
+
+def split_tree_path(filename: str) -> tuple[str, str | None]:
+    """
+    Splits the path of a tree into the container path and the tree name.
+
+    Parameters:
+        filename (str): Path to a DB file, or to a tree of a container file.
+
+    Returns:
+        tuple[str, str | None]: The container path and the tree name, or the path and None for a DB file.
+    """
+    container, separator, tree = filename.partition(TREE_SEPARATOR)
+    return (container, tree) if separator else (filename, None)
+
+
+def is_tree_path(filename: str) -> bool:
+    """
+    Checks whether a path names a tree of a container file.
+
+    Parameters:
+        filename (str): Path to a DB file, or to a tree of a container file.
+
+    Returns:
+        bool: True for a tree of a container file.
+    """
+    return split_tree_path(filename=filename)[1] is not None
+
+
+def sidecar_path(filename: str, suffix: str) -> str:
+    """
+    Returns the path of a file, that belongs to a DB file, like its Bloom filter.\n
+    The file of a DB file is stored next to it, the one of a tree is stored in the container,
+    under the tree name and the suffix, which can't be the name of another tree.
+
+    Parameters:
+        filename (str): Path to a DB file, or to a tree of a container file.
+        suffix (str): Suffix of the file.
+
+    Returns:
+        str: Path of the file, or of the tree it is stored as.
+    """
+    if is_tree_path(filename=filename):
+        return f"{filename}{TREE_SEPARATOR}{suffix}"
+    return filename + suffix
+
+
+def is_sidecar(tree: str) -> bool:
+    """
+    Checks whether a name in the catalog is the file of a tree, instead of a tree.
+
+    Parameters:
+        tree (str): Name in the catalog.
+
+    Returns:
+        bool: True for the file of a tree.
+    """
+    return TREE_SEPARATOR in tree
+
+
+def is_container(filename: str) -> bool:
+    """
+    Checks whether a file is a container file, from its header.
+
+    Parameters:
+        filename (str): Path to the file.
+
+    Returns:
+        bool: True for a container file, False if it's a DB file or doesn't exist.
+    """
+    try:
+        with open(file=filename, mode="rb") as file:
+            return file.read(len(CONTAINER_MAGIC)) == CONTAINER_MAGIC
+    except FileNotFoundError:
+        return False
+
+
+def read_catalog(filename: str) -> Catalog:
+    """
+    Reads the catalog of a container file, only the header and the catalog are read.\n
+    The catalog is shared with the other callers, so it must not be changed.
+
+    Parameters:
+        filename (str): Path to the container file.
+
+    Returns:
+        Catalog: Offset and length of every tree by name, empty if the file doesn't exist.
+    """
+    if not os.path.exists(path=filename):
+        return {}
+
+    with open(file=filename, mode="rb") as file:
+        return _read_catalog(file=file, filename=filename)
+
+
+def _read_catalog(file: BinaryIO, filename: str) -> Catalog:
+    """
+    Reads the catalog from an opened container file, the trees are read from the same file,
+    since reclaim may replace the path in the meantime.
+    """
+    path: str = os.path.abspath(filename)
+
+    for _ in range(READ_ATTEMPTS):
+        file.seek(0)
+        header: bytes = file.read(HEADER.size)
+
+        if len(header) < HEADER.size or not header.startswith(CONTAINER_MAGIC):
+            raise ValueError(f"{filename} isn't a container file.")
+
+        _, version, offset, length, checksum = HEADER.unpack(header)
+        if version != CONTAINER_VERSION:
+            raise ValueError(f"Container version {version} is not supported.")
+
+        # The catalog is only decoded again, once a writer pointed the header elsewhere.
+        identity: tuple[int, bytes] = (os.fstat(file.fileno()).st_ino, header)
+        cached: tuple[tuple[int, bytes], Catalog] | None = _catalogs.get(path)
+        if cached is not None and cached[0] == identity:
+            return cached[1]
+
+        file.seek(offset)
+        data: bytes = file.read(length)
+
+        # A writer may have replaced the header, while the old one was read.
+        if len(data) == length and crc32(data) == checksum:
+            catalog: Catalog = _decode_catalog(data=data)
+            _catalogs[path] = (identity, catalog)
+            return catalog
+
+    raise ValueError(f"The catalog of {filename} is corrupt.")
+
+
+def _encode_catalog(catalog: Catalog) -> bytes:
+    """
+    Serializes a catalog, the entries follow each other without padding.
+    """
+    data: bytearray = bytearray()
+    for name, (offset, length) in catalog.items():
+        encoded: bytes = name.encode()
+        data += ENTRY.pack(offset, length, len(encoded)) + encoded
+    return bytes(data)
+
+
+def _decode_catalog(data: bytes) -> Catalog:
+    """
+    Deserializes a catalog, written by _encode_catalog.
+    """
+    catalog: Catalog = {}
+    position: int = 0
+
+    while position < len(data):
+        offset, length, size = ENTRY.unpack_from(data, position)
+        position += ENTRY.size
+        catalog[data[position : position + size].decode()] = (offset, length)
+        position += size
+
+    return catalog
+
+
+def locate(filename: str) -> tuple[str, int, int] | None:
+    """
+    Finds a tree in its container file.
+
+    Parameters:
+        filename (str): Path to a tree of a container file.
+
+    Returns:
+        tuple[str, int, int] | None: The container path, and the offset and length of the tree.
+        None if the container or the tree doesn't exist.
+    """
+    container, tree = split_tree_path(filename=filename)
+    if tree is None or not is_container(filename=container):
+        return None
+
+    entry: tuple[int, int] | None = read_catalog(filename=container).get(tree)
+    return (container, *entry) if entry else None
+
+
+def exists(filename: str) -> bool:
+    """
+    Checks whether a DB file, or a tree of a container file, exists.
+
+    Parameters:
+        filename (str): Path to a DB file, or to a tree of a container file.
+
+    Returns:
+        bool: True if it exists.
+    """
+    if not is_tree_path(filename=filename):
+        return os.path.exists(path=filename)
+    return locate(filename=filename) is not None
+
+
+def size(filename: str) -> int:
+    """
+    Returns the size in bytes of a DB file, or of a tree of a container file.
+
+    Parameters:
+        filename (str): Path to a DB file, or to a tree of a container file.
+
+    Returns:
+        int: Size in bytes.
+    """
+    if not is_tree_path(filename=filename):
+        return os.path.getsize(filename)
+
+    located: tuple[str, int, int] | None = locate(filename=filename)
+    if located is None:
+        raise FileNotFoundError(filename)
+    return located[2]
+
+
+def read_tree(filename: str, length: int | None = None) -> bytes:
+    """
+    Reads a tree of a container file, without touching the other trees.
+
+    Parameters:
+        filename (str): Path to a tree of a container file.
+        length (int | None): Only read the first bytes of the tree, the whole tree if None.
+
+    Returns:
+        bytes: The serialized tree, in any DB format but paged.
+    """
+    container, tree = split_tree_path(filename=filename)
+    if tree is None:
+        raise FileNotFoundError(filename)
+
+    with open(file=container, mode="rb") as file:
+        catalog: Catalog = _read_catalog(file=file, filename=container)
+        entry: tuple[int, int] | None = catalog.get(tree)
+        if entry is None:
+            raise FileNotFoundError(filename)
+
+        offset, total = entry
+        file.seek(offset)
+        return file.read(total if length is None else min(length, total))
+
+
+@contextmanager
+def open_tree(filename: str, mode: str = "rb") -> Iterator[tuple[BinaryIO, int, int] | None]:
+    """
+    Opens the container of a tree, to read or change the bytes of the tree in place.\n
+    Callers, that change the bytes, hold the lock of the container file.
+
+    Parameters:
+        filename (str): Path to a tree of a container file.
+        mode (str): Either rb or r+b.
+
+    Returns:
+        Iterator[tuple[BinaryIO, int, int] | None]: The opened container, and the offset and
+        length of the tree in it. None if the container or the tree doesn't exist.
+    """
+    container, tree = split_tree_path(filename=filename)
+
+    try:
+        file: BinaryIO = open(file=container, mode=mode)  # type: ignore
+    except FileNotFoundError:
+        yield None
+        return
+
+    with file:
+        catalog: Catalog = _read_catalog(file=file, filename=container)
+        entry: tuple[int, int] | None = catalog.get(tree)  # type: ignore
+        yield (file, *entry) if entry else None
+
+
+def write_tree(filename: str, data: bytes) -> int:
+    """
+    Writes a tree to its container file, and creates the container file if needed.\n
+    The tree and a new catalog are appended, then the header is pointed at the new catalog.
+    The old copy of the tree and the old catalog become dead space, until reclaim.
+    Callers hold the lock of the container file.
+
+    Parameters:
+        filename (str): Path to a tree of a container file.
+        data (bytes): The serialized tree.
+
+    Returns:
+        int: Number of bytes written.
+    """
+    container, tree = split_tree_path(filename=filename)
+    if tree is None:
+        raise ValueError(f"{filename} isn't the path of a tree.")
+
+    if not os.path.exists(path=container):
+        _rewrite(filename=container, trees={tree: data})
+        return HEADER.size + len(data)
+
+    return _append(filename=container, tree=tree, data=data)
+
+
+def remove_tree(filename: str) -> bool:
+    """
+    Removes a tree and its files from the catalog of its container file, their bytes
+    become dead space.\n
+    Callers hold the lock of the container file.
+
+    Parameters:
+        filename (str): Path to a tree of a container file.
+
+    Returns:
+        bool: True if the tree existed.
+    """
+    located: tuple[str, int, int] | None = locate(filename=filename)
+    if located is None:
+        return False
+
+    container, tree = split_tree_path(filename=filename)
+    _append(filename=container, tree=tree, data=None)  # type: ignore
+
+    return True
+
+
+def reclaim(filename: str) -> tuple[int, int]:
+    """
+    Rewrites a container file with only its live trees, to reclaim the dead space.\n
+    The new file replaces the old one atomically, so readers see either of them.
+    Callers hold the lock of the container file.
+
+    Parameters:
+        filename (str): Path to the container file.
+
+    Returns:
+        tuple[int, int]: Number of trees without their files, and number of bytes reclaimed.
+    """
+    before: int = os.path.getsize(filename)
+    trees: dict[str, bytes] = {}
+
+    # The trees are copied in the order of their offsets, so the file is read sequentially.
+    with open(file=filename, mode="rb") as file:
+        catalog: Catalog = _read_catalog(file=file, filename=filename)
+        for name, (offset, length) in sorted(
+            catalog.items(), key=lambda entry: entry[1][0]
+        ):
+            file.seek(offset)
+            trees[name] = file.read(length)
+
+    _rewrite(filename=filename, trees=trees)
+
+    count: int = sum(not is_sidecar(tree=name) for name in trees)
+    return count, before - os.path.getsize(filename)
+
+
+def _append(filename: str, tree: str, data: bytes | None) -> int:
+    """
+    Appends a tree and a new catalog, or only a new catalog without the tree if data is None,
+    then points the header at the new catalog. Reclaims the dead space, once it's too large.
+    """
+    catalog: Catalog = dict(read_catalog(filename=filename))
+
+    with open(file=filename, mode="r+b") as file:
+        offset: int = file.seek(0, os.SEEK_END)
+
+        if data is None:
+            # The files of the tree go with it.
+            for name in [
+                name
+                for name in catalog
+                if name == tree or name.startswith(tree + TREE_SEPARATOR)
+            ]:
+                del catalog[name]
+            data = b""
+        else:
+            catalog[tree] = (offset, len(data))
+        encoded: bytes = _encode_catalog(catalog=catalog)
+
+        file.write(data)
+        file.write(encoded)
+        file.flush()
+        # The tree and the catalog are durable, before the header points at them.
+        os.fsync(file.fileno())
+
+        file.seek(0)
+        file.write(_header(offset=offset + len(data), catalog=encoded))
+        file.flush()
+        os.fsync(file.fileno())
+
+    # Every write leaves a catalog behind, so the dead space is reclaimed like a
+    # write-ahead log is compacted, at an amortized cost per write.
+    live: int = HEADER.size + len(encoded) + sum(entry[1] for entry in catalog.values())
+    dead: int = offset + len(data) + len(encoded) - live
+    if dead > max(live, RECLAIM_BYTES):
+        reclaim(filename=filename)
+
+    return len(data) + len(encoded) + HEADER.size
+
+
+def _header(offset: int, catalog: bytes) -> bytes:
+    """
+    Packs the header of a container file, that points at the catalog.
+    """
+    return HEADER.pack(
+        CONTAINER_MAGIC, CONTAINER_VERSION, offset, len(catalog), crc32(catalog)
+    )
+
+
+def _rewrite(filename: str, trees: dict[str, bytes]) -> None:
+    """
+    Writes a container file without dead space, through a synced temporary file.
+    """
+    # Imported here, storage imports this module.
+    from storage import _fsync_dir, _temporary_path
+
+    catalog: Catalog = {}
+    offset: int = HEADER.size
+    for name, data in trees.items():
+        catalog[name] = (offset, len(data))
+        offset += len(data)
+    encoded: bytes = _encode_catalog(catalog=catalog)
+
+    temporary: str = _temporary_path(filepath=filename)
+    with open(file=temporary, mode="wb") as file:
+        file.write(_header(offset=offset, catalog=encoded))
+        for data in trees.values():
+            file.write(data)
+        file.write(encoded)
+        file.flush()
+        os.fsync(file.fileno())
+
+    os.replace(src=temporary, dst=filename)
+    _fsync_dir(path=filename)
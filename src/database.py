@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import os
+from typing import TYPE_CHECKING
+
+# The tree and storage modules are imported by the functions that use them,
+# so the command line can import this module before parsing its arguments.
+if TYPE_CHECKING:
+    from avl_tree import AVLTree, Node
+
+# Compact the write-ahead log into the DB file, once it reaches this size in bytes.
+WAL_COMPACT_BYTES: int = 1024 * 1024
+
+
+def store_node(
+    root: Node, filename: str, format: str | None = None, cache: bool = True
+) -> None:
+    """
+    Store the AVL tree in the DB file, and update the tree cache in place.
+
+    Attributes:
+        root (Node): Root node of the AVL tree.
+        filename (str): Path to the DB file.
+        format (str | None): Either text, binary, compressed or paged. By default, an existing
+        DB file keeps its format, and a new DB file is binary.
+        cache (bool): Cache the stored tree, a caller that keeps changing the tree passes False.
+
+    Returns:
+        None
+    """
+    from avl_tree import AVLTree
+    from bloom import BloomFilter, bloom_rate
+    from cache import TREES, stamp
+    from storage import StoreAVLTree
+
+    storage: StoreAVLTree = StoreAVLTree()
+
+    if format is None:
+        format = storage.detect_format(filename=filename) or "binary"
+
+    tree: AVLTree = AVLTree.from_node(node=root)  # type: ignore
+
+    # Sized for twice the keys, so the logged keys don't raise the false positive rate much.
+    bloom: BloomFilter | None = None
+    rate: float | None = bloom_rate(filename=filename)
+    if rate:
+        bloom = BloomFilter.from_keys(
+            keys=tree.inorder(), capacity=max(2 * len(tree), 1024), fp_rate=rate
+        )
+
+    if format == "paged":
+        from paged_tree import PagedAVLTree
+
+        storage.store_bloom(bloom=bloom, filepath=filename)
+        # The page file is written in key order, and keeps the values of the old one.
+        PagedAVLTree.build(filename=filename, keys=tree.inorder())
+    else:
+        # Serialize the AVL tree into binary, compressed blocks or a node str.
+        nodes: str | bytes
+        if format == "binary":
+            nodes = storage.serialize_binary(root=root)
+        elif format == "compressed":
+            nodes = storage.serialize_compressed(root=root)
+        else:
+            nodes = storage.serialize(root=root)
+        # Save the node str in the DB file.
+        storage.store(
+            nodes=nodes, filename=filename.split(sep="./DB/")[1], bloom=bloom
+        )
+
+    # The callers clear the write-ahead log after storing, otherwise the entry is stale.
+    if cache:
+        TREES.put(
+            filename=filename, tree=tree, identity=stamp(filename=filename, logged=0)
+        )
+    else:
+        TREES.invalidate(filename=filename)
+
+
+def read_nodes(filename: str, cache: bool = False) -> AVLTree:
+    """
+    Retrieve the AVL tree from the DB, and replay the keys of the write-ahead log.\n
+    By default the caller gets its own tree, that it may change. With cache=True the tree
+    is cached until the DB file or its write-ahead log change, and the same tree object is
+    returned to every other caller, so changing it changes theirs and the cached tree.
+    Only callers that never change the tree pass cache=True.
+
+    Attibutes:
+        filename (str): Path to the DB file.
+        cache (bool): Use the tree cache, and share the returned tree with the other callers.
+
+    Returns:
+        AVLTree
+    """
+    from cache import TREES, Stamp, stamp
+    from storage import StoreAVLTree
+
+    identity: Stamp | None = None
+    if cache:
+        cached: AVLTree | None = TREES.get(filename=filename)
+        if cached is not None:
+            return cached
+        # Taken before reading, so a concurrent change leaves a stale entry.
+        identity = stamp(filename=filename)
+
+    storage: StoreAVLTree = StoreAVLTree()
+    # The log is read first, a compaction replaces the DB file before it clears the log,
+    # so a concurrent compaction can only add keys, that are replayed again harmlessly.
+    logged: list[int] = storage.read_log(filename=filename)
+    # Retrieve the DB file and get the node str or bytes.
+    nodes: str | bytes = storage.read(filename=filename)
+    # Deserialize the node str and get the AVL tree.
+    tree: AVLTree = storage.deserialize(nodes=nodes)
+
+    # Insert the keys, that are not compacted into the DB file yet.
+    for key in logged:
+        tree.insert(key=key)
+
+    if identity is not None:
+        TREES.put(filename=filename, tree=tree, identity=identity)
+
+    return tree
+
+
+def compact(filename: str, min_bytes: int = 0) -> None:
+    """
+    Compact the write-ahead log into the DB file, under the lock of the DB file.\n
+    The trees of a container share its write-ahead log, so every tree with logged keys
+    is compacted, and the whole log is cleared.
+
+    Attributes:
+        filename (str): Path to a DB file, or to a tree of a container file.
+        min_bytes (int): Only compact a write-ahead log of at least this size, another
+        writer may have compacted it while waiting for the lock.
+
+    Returns:
+        None
+    """
+    from container import split_tree_path
+    from storage import StoreAVLTree, wal_path
+
+    storage: StoreAVLTree = StoreAVLTree()
+
+    with storage.lock(filename=filename):
+        wal: str = wal_path(filename=filename)
+        if min_bytes and (
+            not os.path.exists(path=wal) or os.path.getsize(wal) < min_bytes
+        ):
+            return
+
+        for owner in storage.log_owners(filename=filename):
+            tree: AVLTree = read_nodes(filename=owner, cache=True)
+            store_node(root=tree.node, filename=owner)
+        # The keys are safe in the DB files now, replaying them again would be harmless.
+        storage.clear_log(filename=split_tree_path(filename=filename)[0])
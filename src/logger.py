@@ -1,20 +1,104 @@
+import atexit
+import os
+import warnings
 from logging import (
+    CRITICAL,
     DEBUG,
     ERROR,
     INFO,
+    WARNING,
     FileHandler,
     Formatter,
+    Handler,
     Logger,
     StreamHandler,
     getLogger,
 )
 
-from utils import validate_dir
+# Directory of the log files, it's created along with the first log file.
+LOG_DIR: str = "./logs/"
+
+# Log levels, OFF disables every log record.
+LOG_LEVELS: dict[str, int] = {
+    "DEBUG": DEBUG,
+    "INFO": INFO,
+    "WARNING": WARNING,
+    "ERROR": ERROR,
+    "OFF": CRITICAL + 1,
+}
+
+
+def _environment_level() -> int:
+    """
+    Returns the log level of RDMS_LOG_LEVEL, INFO with a warning if it isn't one of LOG_LEVELS.
+    """
+    name: str = os.environ.get("RDMS_LOG_LEVEL", "INFO").upper()
+
+    if name not in LOG_LEVELS:
+        warnings.warn(
+            f"RDMS_LOG_LEVEL must be one of {', '.join(LOG_LEVELS)}, not {name}, using INFO."
+        )
+        return INFO
+
+    return LOG_LEVELS[name]
+
+
+# Log level and mode of the process, set with RDMS_LOG_LEVEL and RDMS_LOG_QUEUE or configure_logging.
+# RDMS_LOG_LEVEL is read by the first logger, so the command line checks it before it warns.
+_level: int | None = None
+_queue: bool = os.environ.get("RDMS_LOG_QUEUE", "") == "1"
+
+# Loggers, that already have their handlers.
+_loggers: dict[str, Logger] = {}
+
+
+def configure_logging(level: str = "INFO", queue: bool = False) -> None:
+    """
+    Sets the log level of every logger, and whether new loggers write through a background queue.
+
+    Parameters:
+        level (str): One of LOG_LEVELS, OFF disables logging.
+        queue (bool): Hand the log records to a QueueListener thread, instead of writing them inline.
+
+    Returns:
+        None
+    """
+    global _level, _queue
+
+    _level = LOG_LEVELS[level.upper()]
+    _queue = queue
+
+    for logger in _loggers.values():
+        logger.setLevel(level=_level)
+
+
+class LazyFileHandler(FileHandler):
+    """
+    A FileHandler, that only creates the log directory and opens the log file on its first record.\n
+    Commands, that log nothing at the configured level, never touch ./logs/.
+    """
+
+    def __init__(self, filename: str) -> None:
+        """
+        Initializes a LazyFileHandler object.
+
+        Parameters:
+            filename (str): Path to the log file.
+        """
+        super().__init__(filename=filename, delay=True)
+
+    def _open(self):
+        """
+        Creates the log directory, then opens the log file.
+        """
+        os.makedirs(name=os.path.dirname(self.baseFilename), exist_ok=True)
+        return super()._open()
 
 
 def LOGGER(_name: str, _filename: str) -> Logger:
     """
-    Used to log critical points in the code exexution.
+    Used to log critical points in the code exexution.\n
+    The handlers are created once per process, later calls return the same logger.
 
     Parameters:
         _name (str): Name of the logger.
@@ -23,13 +107,20 @@ def LOGGER(_name: str, _filename: str) -> Logger:
     Returns:
         Logger: An Logger object is returned.
     """
+    global _level
+
+    if _name in _loggers:
+        return _loggers[_name]
+
+    if _level is None:
+        _level = _environment_level()
+
     # Create a logger for _name.
     logger: Logger = getLogger(name=_name)
-    logger.setLevel(level=INFO)
+    logger.setLevel(level=_level)
 
-    # File handler, which logs even debug logs.
-    filepath: str = validate_dir(filename=_filename, type="LOG")
-    file_handler = FileHandler(filename=filepath)
+    # File handler, which logs even debug logs, the file is opened on the first record.
+    file_handler = LazyFileHandler(filename=os.path.join(LOG_DIR, _filename))
     file_handler.setLevel(level=DEBUG)
 
     # Console handler with higher log level.
@@ -42,9 +133,24 @@ def LOGGER(_name: str, _filename: str) -> Logger:
     file_handler.setFormatter(fmt=formatter)
     console_handler.setFormatter(fmt=formatter)
 
+    handlers: list[Handler] = [file_handler, console_handler]
+
+    if _queue:
+        from logging.handlers import QueueHandler, QueueListener
+        from queue import SimpleQueue
+
+        # The listener thread formats and writes the records, the caller only enqueues them.
+        records: SimpleQueue = SimpleQueue()
+        listener = QueueListener(records, *handlers, respect_handler_level=True)
+        listener.start()
+        atexit.register(listener.stop)
+        handlers = [QueueHandler(queue=records)]
+
     # Add the handlers to the logger.
-    logger.addHandler(hdlr=file_handler)
-    logger.addHandler(hdlr=console_handler)
+    for handler in handlers:
+        logger.addHandler(hdlr=handler)
+
+    _loggers[_name] = logger
 
     return logger
 
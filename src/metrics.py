@@ -0,0 +1,255 @@
+import math
+import os
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from functools import wraps
+
+# Number of power of two latency buckets, the last one holds everything above ~36 minutes.
+BUCKETS: int = 32
+
+
+class Histogram:
+    """
+    A latency histogram with power of two buckets in microseconds.\n
+    Bucket i counts the observations up to 2^i microseconds, so percentiles are upper bounds.
+
+    Attributes:
+        counts (list[int]): Number of observations per bucket.
+        count (int): Number of observations.
+        total (float): Sum of the observations in seconds.
+        max (float): Largest observation in seconds.
+    """
+
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self) -> None:
+        """
+        Initializes an empty Histogram object.
+        """
+        self.counts: list[int] = [0] * BUCKETS
+        self.count: int = 0
+        self.total: float = 0.0
+        self.max: float = 0.0
+
+    def observe(self, seconds: float) -> None:
+        """
+        Adds an observation to its bucket.
+
+        Parameters:
+            seconds (float): The latency.
+
+        Returns:
+            None
+        """
+        # The bit length of the ceiling in microseconds is the index of the smallest bucket, that fits.
+        bucket: int = (math.ceil(seconds * 1e6) - 1).bit_length() if seconds > 0 else 0
+        self.counts[min(bucket, BUCKETS - 1)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def percentile(self, fraction: float) -> float:
+        """
+        Returns the upper bound of the bucket, that holds the percentile.
+
+        Parameters:
+            fraction (float): Percentile between 0 and 1.
+
+        Returns:
+            float: The percentile in microseconds, 0 without observations.
+        """
+        rank: float = self.count * fraction
+        seen: int = 0
+
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= rank:
+                return float(2**bucket)
+
+        return 0.0
+
+    def snapshot(self) -> dict:
+        """
+        Returns the histogram as a dict.
+
+        Returns:
+            dict: count, total_us, max_us, p50_us, p99_us and the non empty buckets by upper bound.
+        """
+        return {
+            "count": self.count,
+            "total_us": round(self.total * 1e6, 3),
+            "max_us": round(self.max * 1e6, 3),
+            "p50_us": self.percentile(fraction=0.50),
+            "p99_us": self.percentile(fraction=0.99),
+            "buckets": {
+                f"<={2**bucket}us": count
+                for bucket, count in enumerate(self.counts)
+                if count
+            },
+        }
+
+
+class Metrics:
+    """
+    Counters and latency histograms of the tree and storage operations.\n
+    Call sites check enabled first, so a disabled Metrics object costs a single attribute lookup.
+
+    Attributes:
+        enabled (bool): Whether the operations record anything.
+        counters (dict[str, int]): Counters by name.
+        histograms (dict[str, Histogram]): Latency histograms by operation name.
+    """
+
+    def __init__(self, enabled: bool = False) -> None:
+        """
+        Initializes a Metrics object.
+
+        Parameters:
+            enabled (bool): Whether the operations record anything.
+        """
+        self.enabled: bool = enabled
+        self.counters: dict[str, int] = {}
+        self.histograms: dict[str, Histogram] = {}
+
+    def increment(self, name: str, amount: int = 1) -> None:
+        """
+        Adds an amount to a counter.
+
+        Parameters:
+            name (str): Name of the counter.
+            amount (int): Added to the counter.
+
+        Returns:
+            None
+        """
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def observe(self, name: str, seconds: float) -> None:
+        """
+        Adds a latency to the histogram of an operation.
+
+        Parameters:
+            name (str): Name of the operation.
+            seconds (float): The latency.
+
+        Returns:
+            None
+        """
+        histogram: Histogram | None = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = Histogram()
+        histogram.observe(seconds=seconds)
+
+    @contextmanager
+    def timer(self, name: str) -> Iterator[None]:
+        """
+        Times the body of a with statement, if the metrics are enabled.
+
+        Parameters:
+            name (str): Name of the operation.
+
+        Returns:
+            Iterator[None]
+        """
+        if not self.enabled:
+            yield
+            return
+
+        start: float = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name=name, seconds=time.perf_counter() - start)
+
+    def snapshot(self) -> dict:
+        """
+        Returns a copy of the counters and histograms, that later operations don't change.
+
+        Returns:
+            dict: counters and histograms, sorted by name.
+        """
+        return {
+            "counters": dict(sorted(self.counters.items())),
+            "histograms": {
+                name: histogram.snapshot()
+                for name, histogram in sorted(self.histograms.items())
+            },
+        }
+
+    def reset(self) -> None:
+        """
+        Clears the counters and histograms.
+
+        Returns:
+            None
+        """
+        self.counters.clear()
+        self.histograms.clear()
+
+
+# Metrics of the process, enabled with RDMS_METRICS=1 or configure_metrics.
+METRICS: Metrics = Metrics(enabled=os.environ.get("RDMS_METRICS", "") == "1")
+
+
+def configure_metrics(enabled: bool = True) -> None:
+    """
+    Enables or disables the metrics of the process.
+
+    Parameters:
+        enabled (bool): Whether the operations record anything.
+
+    Returns:
+        None
+    """
+    METRICS.enabled = enabled
+
+
+def timed(name: str) -> Callable[[Callable], Callable]:
+    """
+    Decorates a function, so its latency is recorded while the metrics are enabled.\n
+    Meant for whole file operations, hot paths check METRICS.enabled inline instead.
+
+    Parameters:
+        name (str): Name of the latency histogram.
+
+    Returns:
+        Callable: The decorator.
+    """
+
+    def decorator(function: Callable) -> Callable:
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            if not METRICS.enabled:
+                return function(*args, **kwargs)
+
+            start: float = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                METRICS.observe(name=name, seconds=time.perf_counter() - start)
+
+        return wrapper
+
+    return decorator
+
+
+def format_snapshot(snapshot: dict) -> str:
+    """
+    Renders a snapshot as aligned text.
+
+    Parameters:
+        snapshot (dict): Returned by Metrics.snapshot.
+
+    Returns:
+        str: A line per counter and per histogram.
+    """
+    lines: list[str] = ["Counters:"]
+    lines += [f"  {name:<32} {value}" for name, value in snapshot["counters"].items()]
+    lines.append("Latency (us):")
+    lines += [
+        f"  {name:<32} count={histogram['count']} p50<={histogram['p50_us']:g}"
+        f" p99<={histogram['p99_us']:g} max={histogram['max_us']:g}"
+        for name, histogram in snapshot["histograms"].items()
+    ]
+    return "\n".join(lines)
@@ -0,0 +1,750 @@
+import os
+import struct
+from array import array
+from collections import OrderedDict
+from collections.abc import Iterable, Iterator
+from typing import BinaryIO
+
+from container import is_tree_path
+from metrics import METRICS
+from storage import PAGED_MAGIC, PAGED_VERSION, _fsync_dir, _temporary_path
+
+# Header page: magic, version, page size, root page, number of pages and number of keys.
+HEADER: struct.Struct = struct.Struct("<4sBIIIQ")
+
+# Node page: key, left and right child pages, subtree size, height and value length, then the value.
+NODE: struct.Struct = struct.Struct("<qIIIBH")
+
+# Default size of a page, a value can use the bytes after the node fields.
+PAGE_SIZE: int = 64
+
+# Default number of pages in the buffer pool, set with RDMS_POOL_PAGES.
+POOL_PAGES: int = int(os.environ.get("RDMS_POOL_PAGES", 1024))
+
+# Page number of a missing child node, page 0 is the header.
+NIL: int = 0
+
+
+class PageNode:
+    """
+    A decoded node page.
+
+    Attributes:
+        key (int): The value stored in the node.
+        value (bytes): Payload of the key.
+        left (int): Page of the left child node, NIL if there isn't one.
+        right (int): Page of the right child node, NIL if there isn't one.
+        size (int): Number of nodes in the subtree rooted at this node.
+        height (int): Height of the subtree rooted at this node.
+    """
+
+    __slots__ = ("key", "value", "left", "right", "size", "height")
+
+    def __init__(
+        self,
+        key: int,
+        value: bytes = b"",
+        left: int = NIL,
+        right: int = NIL,
+        size: int = 1,
+        height: int = 1,
+    ) -> None:
+        """
+        Initializes a PageNode object.
+
+        Parameters:
+            key (int): The value stored in the node.
+            value (bytes): Payload of the key.
+            left (int): Page of the left child node.
+            right (int): Page of the right child node.
+            size (int): Number of nodes in the subtree.
+            height (int): Height of the subtree.
+        """
+        self.key: int = key
+        self.value: bytes = value
+        self.left: int = left
+        self.right: int = right
+        self.size: int = size
+        self.height: int = height
+
+    @classmethod
+    def decode(cls, page: bytes) -> "PageNode":
+        """
+        Decodes a node page.
+
+        Parameters:
+            page (bytes): The page.
+
+        Returns:
+            PageNode: The node.
+        """
+        key, left, right, size, height, length = NODE.unpack_from(page)
+        value: bytes = page[NODE.size : NODE.size + length]
+        return cls(
+            key=key, value=value, left=left, right=right, size=size, height=height
+        )
+
+    def encode(self, page_size: int) -> bytes:
+        """
+        Encodes the node into a page.
+
+        Parameters:
+            page_size (int): Size of the page.
+
+        Returns:
+            bytes: The page, padded with zeros.
+        """
+        page: bytearray = bytearray(page_size)
+        NODE.pack_into(
+            page,
+            0,
+            self.key,
+            self.left,
+            self.right,
+            self.size,
+            self.height,
+            len(self.value),
+        )
+        page[NODE.size : NODE.size + len(self.value)] = self.value
+        return bytes(page)
+
+
+class BufferPool:
+    """
+    A least recently used cache of decoded node pages over a page file.\n
+    A changed page is only marked dirty, and written back once it's evicted or flushed.
+
+    Attributes:
+        file (BinaryIO): The page file.
+        page_size (int): Size of a page.
+        capacity (int): Max number of cached pages, at least 1.
+        pages (OrderedDict[int, PageNode]): Cached pages by page number, least recently used first.
+        dirty (set[int]): Cached pages, that are not written back yet.
+        hits (int): Number of pages, that were cached.
+        reads (int): Number of pages read from the page file.
+        writes (int): Number of pages written to the page file.
+    """
+
+    def __init__(self, file: BinaryIO, page_size: int, capacity: int) -> None:
+        """
+        Initializes a BufferPool object.
+
+        Parameters:
+            file (BinaryIO): The page file, opened for reading and writing.
+            page_size (int): Size of a page.
+            capacity (int): Max number of cached pages, at least 1.
+        """
+        if capacity < 1:
+            raise ValueError("The buffer pool needs room for at least 1 page.")
+
+        self.file: BinaryIO = file
+        self.page_size: int = page_size
+        self.capacity: int = capacity
+        self.pages: OrderedDict[int, PageNode] = OrderedDict()
+        self.dirty: set[int] = set()
+        self.hits: int = 0
+        self.reads: int = 0
+        self.writes: int = 0
+
+    def get(self, number: int) -> PageNode:
+        """
+        Returns a node page, it's read from the page file if it isn't cached.
+
+        Parameters:
+            number (int): Page number.
+
+        Returns:
+            PageNode: The node.
+        """
+        node: PageNode | None = self.pages.get(number)
+
+        if node is not None:
+            self.pages.move_to_end(key=number)
+            self.hits += 1
+            return node
+
+        self.file.seek(number * self.page_size)
+        node = PageNode.decode(page=self.file.read(self.page_size))
+        self.reads += 1
+        if METRICS.enabled:
+            METRICS.increment(name="paged.page_reads")
+
+        self.pages[number] = node
+        self.evict()
+
+        return node
+
+    def write(self, number: int, node: PageNode) -> None:
+        """
+        Caches a changed node page, and marks it dirty.
+
+        Parameters:
+            number (int): Page number.
+            node (PageNode): The node.
+
+        Returns:
+            None
+        """
+        self.pages[number] = node
+        self.pages.move_to_end(key=number)
+        self.dirty.add(number)
+        self.evict()
+
+    def evict(self) -> None:
+        """
+        Evicts the least recently used pages over capacity, dirty pages are written back first.
+
+        Returns:
+            None
+        """
+        while len(self.pages) > self.capacity:
+            number, node = self.pages.popitem(last=False)
+            if number in self.dirty:
+                self.dirty.discard(number)
+                self.write_back(number=number, node=node)
+
+    def write_back(self, number: int, node: PageNode) -> None:
+        """
+        Writes a node page to the page file.
+
+        Parameters:
+            number (int): Page number.
+            node (PageNode): The node.
+
+        Returns:
+            None
+        """
+        self.file.seek(number * self.page_size)
+        self.file.write(node.encode(page_size=self.page_size))
+        self.writes += 1
+        if METRICS.enabled:
+            METRICS.increment(name="paged.page_writes")
+
+    def flush(self) -> None:
+        """
+        Writes back every dirty page, in page order.
+
+        Returns:
+            None
+        """
+        for number in sorted(self.dirty):
+            self.write_back(number=number, node=self.pages[number])
+        self.dirty.clear()
+
+
+class PagedAVLTree:
+    """
+    An AVL tree stored in a page file, one node per fixed-size page, that is never loaded as a whole.\n
+    Page 0 is the header, and the node pages point at their children by page number.
+    Lookups and inserts only read the pages on the search path, through an LRU buffer pool,
+    and the changed pages are written back on eviction or flush.
+    Every key can hold a value of up to page_size - NODE.size bytes.
+
+    Attributes:
+        filename (str): Path to the page file.
+        file (BinaryIO): The page file.
+        page_size (int): Size of a page, fixed when the page file is created.
+        root (int): Page of the root node, NIL if the tree is empty.
+        pages (int): Number of pages, the header included.
+        count (int): Number of keys.
+        pool (BufferPool): Cached pages.
+        changed (bool): Whether the header needs to be written back.
+    """
+
+    def __init__(
+        self,
+        filename: str,
+        pool_pages: int = POOL_PAGES,
+        page_size: int = PAGE_SIZE,
+    ) -> None:
+        """
+        Initializes a PagedAVLTree object, and creates an empty page file if it doesn't exist.\n
+        Callers that write hold the lock of the DB file.
+
+        Parameters:
+            filename (str): Path to the page file.
+            pool_pages (int): Max number of pages in the buffer pool.
+            page_size (int): Size of a page, only used for a new page file.
+        """
+        if page_size < max(NODE.size, HEADER.size):
+            raise ValueError(f"A page needs at least {NODE.size} bytes.")
+
+        if not os.path.exists(path=filename):
+            os.makedirs(name=os.path.dirname(filename) or ".", exist_ok=True)
+            header: bytes = HEADER.pack(
+                PAGED_MAGIC, PAGED_VERSION, page_size, NIL, 1, 0
+            )
+            with open(file=filename, mode="xb") as file:
+                file.write(header.ljust(page_size, b"\0"))
+
+        self.filename: str = filename
+        self.file: BinaryIO = open(file=filename, mode="r+b")
+
+        header = self.file.read(HEADER.size)
+        if len(header) < HEADER.size or header[: len(PAGED_MAGIC)] != PAGED_MAGIC:
+            self.file.close()
+            raise ValueError(f"{filename} isn't a paged DB file.")
+
+        _, version, self.page_size, self.root, self.pages, self.count = HEADER.unpack(
+            header
+        )
+        if version != PAGED_VERSION:
+            self.file.close()
+            raise ValueError(f"{filename} has an unknown paged format version.")
+
+        self.pool: BufferPool = BufferPool(
+            file=self.file, page_size=self.page_size, capacity=pool_pages
+        )
+        self.changed: bool = False
+
+    @classmethod
+    def build(
+        cls, filename: str, keys: Iterable[int], page_size: int | None = None
+    ) -> None:
+        """
+        Writes a perfectly balanced page file from sorted, unique keys, in a single pass.\n
+        The values of the keys, that are already in the page file, are kept. The new page
+        file replaces the old one atomically, like StoreAVLTree.store.
+
+        Parameters:
+            filename (str): Path to the page file.
+            keys (Iterable[int]): Keys in ascending order, without duplicates.
+            page_size (int | None): Size of a page, by default the one of the old page file.
+
+        Returns:
+            None
+        """
+        ordered: array = array("q", keys)
+        values: list[bytes] = [b""] * len(ordered)
+
+        # Merge the old keys with the new keys, to pick up their values.
+        if is_paged(filename=filename):
+            with cls(filename=filename) as old:
+                page_size = page_size or old.page_size
+                index: int = 0
+                for key, value in old.items():
+                    while index < len(ordered) and ordered[index] < key:
+                        index += 1
+                    if index < len(ordered) and ordered[index] == key:
+                        values[index] = value
+
+        page_size = page_size or PAGE_SIZE
+        count: int = len(ordered)
+        # Key i is stored in page i + 1, so the pages are written in key order.
+        left: array = array("I", [NIL]) * count
+        right: array = array("I", [NIL]) * count
+        sizes: array = array("I", [0]) * count
+
+        # Ranges of keys, that still need a subtree, with the index of their parent.
+        stack: list[tuple[int, int, int, bool]] = [(0, count - 1, -1, False)]
+        root: int = NIL
+
+        while stack:
+            low, high, parent, is_left = stack.pop()
+            if low > high:
+                continue
+
+            # The middle key becomes the root of the subtree.
+            middle: int = (low + high) // 2
+            sizes[middle] = high - low + 1
+
+            if parent < 0:
+                root = middle + 1
+            elif is_left:
+                left[parent] = middle + 1
+            else:
+                right[parent] = middle + 1
+
+            stack.append((low, middle - 1, middle, True))
+            stack.append((middle + 1, high, middle, False))
+
+        os.makedirs(name=os.path.dirname(filename) or ".", exist_ok=True)
+        temporary: str = _temporary_path(filepath=filename)
+
+        with open(file=temporary, mode="wb") as file:
+            header: bytes = HEADER.pack(
+                PAGED_MAGIC, PAGED_VERSION, page_size, root, count + 1, count
+            )
+            file.write(header.ljust(page_size, b"\0"))
+
+            for index in range(count):
+                # A balanced subtree of n keys has a height of n.bit_length().
+                node: PageNode = PageNode(
+                    key=ordered[index],
+                    value=values[index],
+                    left=left[index],
+                    right=right[index],
+                    size=sizes[index],
+                    height=sizes[index].bit_length(),
+                )
+                file.write(node.encode(page_size=page_size))
+
+            file.flush()
+            os.fsync(file.fileno())
+
+        os.replace(src=temporary, dst=filename)
+        _fsync_dir(path=filename)
+
+    def __len__(self) -> int:
+        """
+        Returns the number of keys.
+
+        Returns:
+            int: Number of keys.
+        """
+        return self.count
+
+    def find(self, key: int) -> PageNode | None:
+        """
+        Finds the node of a key.
+
+        Parameters:
+            key (int): The value stored in the node.
+
+        Returns:
+            PageNode | None: The node of the key, None if the key doesn't exist.
+        """
+        number: int = self.root
+
+        while number:
+            node: PageNode = self.pool.get(number=number)
+            if key < node.key:
+                number = node.left
+            elif key > node.key:
+                number = node.right
+            else:
+                return node
+
+        return None
+
+    def contains(self, key: int) -> bool:
+        """
+        Checks whether the key exists in the tree.
+
+        Parameters:
+            key (int): The value stored in the node.
+
+        Returns:
+            bool: True if the key exists.
+        """
+        return self.find(key=key) is not None
+
+    def get(self, key: int) -> bytes | None:
+        """
+        Returns the value of a key.
+
+        Parameters:
+            key (int): The value stored in the node.
+
+        Returns:
+            bytes | None: The value, None if the key doesn't exist.
+        """
+        node: PageNode | None = self.find(key=key)
+        return node.value if node else None
+
+    def update(self, node: PageNode) -> int:
+        """
+        Recalculates the height and size of a node from its children's pages.
+
+        Parameters:
+            node (PageNode): The node.
+
+        Returns:
+            int: The balance factor of the node.
+        """
+        left: PageNode | None = self.pool.get(number=node.left) if node.left else None
+        right: PageNode | None = (
+            self.pool.get(number=node.right) if node.right else None
+        )
+        left_height: int = left.height if left else 0
+        right_height: int = right.height if right else 0
+
+        node.height = max(left_height, right_height) + 1
+        node.size = 1 + (left.size if left else 0) + (right.size if right else 0)
+
+        return left_height - right_height
+
+    def rotate_right(self, number: int, node: PageNode) -> int:
+        """
+        Rotate the unbalanced node to the right.
+
+        Parameters:
+            number (int): Page of the unbalanced node.
+            node (PageNode): The unbalanced node.
+
+        Returns:
+            int: Page of the node, that takes its place.
+        """
+        child: int = node.left
+        child_node: PageNode = self.pool.get(number=child)
+
+        node.left = child_node.right
+        self.update(node=node)
+        self.pool.write(number=number, node=node)
+
+        child_node.right = number
+        self.update(node=child_node)
+        self.pool.write(number=child, node=child_node)
+
+        return child
+
+    def rotate_left(self, number: int, node: PageNode) -> int:
+        """
+        Rotate the unbalanced node to the left.
+
+        Parameters:
+            number (int): Page of the unbalanced node.
+            node (PageNode): The unbalanced node.
+
+        Returns:
+            int: Page of the node, that takes its place.
+        """
+        child: int = node.right
+        child_node: PageNode = self.pool.get(number=child)
+
+        node.right = child_node.left
+        self.update(node=node)
+        self.pool.write(number=number, node=node)
+
+        child_node.left = number
+        self.update(node=child_node)
+        self.pool.write(number=child, node=child_node)
+
+        return child
+
+    def insert(self, key: int, value: bytes | None = None) -> bool:
+        """
+        Add a new node to the tree, or replace the value of an existing key.
+
+        Parameters:
+            key (int): The value stored in the node.
+            value (bytes | None): Payload of the key. If None, an existing key keeps its
+            value, and a new key gets an empty one.
+
+        Returns:
+            bool: True if the key is new.
+        """
+        if value is not None and len(value) > self.page_size - NODE.size:
+            raise ValueError(
+                f"The value of key {key} doesn't fit in "
+                f"{self.page_size - NODE.size} bytes."
+            )
+
+        # Pages and nodes on the insert path.
+        path: list[tuple[int, PageNode]] = []
+        number: int = self.root
+
+        while number:
+            node: PageNode = self.pool.get(number=number)
+
+            if key == node.key:
+                if value is not None and node.value != value:
+                    node.value = value
+                    self.pool.write(number=number, node=node)
+                return False
+
+            path.append((number, node))
+            number = node.left if key < node.key else node.right
+
+        # The new node is appended in a new page.
+        number = self.pages
+        self.pages += 1
+        self.count += 1
+        self.changed = True
+        self.pool.write(number=number, node=PageNode(key=key, value=value or b""))
+
+        # Once a subtree keeps its height, only the sizes change above it.
+        balancing: bool = True
+        # Balance factor of the previous node on the path, the new node has none.
+        child_balance: int = 0
+
+        for parent, node in reversed(path):
+            if key < node.key:
+                node.left = number
+            else:
+                node.right = number
+            node.size += 1
+
+            # Page of the node, that takes the place of the parent node.
+            subtree: int = parent
+
+            if balancing:
+                old_height: int = node.height
+                balance: int = self.update(node=node)
+
+                if balance > 1:
+                    if child_balance < 0:
+                        node.left = self.rotate_left(
+                            number=node.left, node=self.pool.get(number=node.left)
+                        )
+                    subtree = self.rotate_right(number=parent, node=node)
+                    # A rotation after an insert restores the previous subtree height.
+                    balancing = False
+                elif balance < -1:
+                    if child_balance > 0:
+                        node.right = self.rotate_right(
+                            number=node.right, node=self.pool.get(number=node.right)
+                        )
+                    subtree = self.rotate_left(number=parent, node=node)
+                    balancing = False
+                elif node.height == old_height:
+                    balancing = False
+
+                child_balance = balance
+
+            # The rotations already wrote their nodes.
+            if subtree == parent:
+                self.pool.write(number=parent, node=node)
+            number = subtree
+
+        self.root = number
+
+        return True
+
+    def items(
+        self, low: int | None = None, high: int | None = None
+    ) -> Iterator[tuple[int, bytes]]:
+        """
+        Lazily iterates over the keys and values between low and high (inclusive), in ascending order.
+
+        Parameters:
+            low (int | None): Lower bound of the keys, None for no bound.
+            high (int | None): Upper bound of the keys, None for no bound.
+
+        Returns:
+            Iterator[tuple[int, bytes]]: Keys and values of the nodes.
+        """
+        number: int = self.root
+        # Nodes, whose left subtree is being visited.
+        stack: list[PageNode] = []
+
+        while stack or number:
+            # Go as far left as possible, but not below the lower bound.
+            while number:
+                node: PageNode = self.pool.get(number=number)
+                stack.append(node)
+                number = node.left if low is None or low < node.key else NIL
+
+            node = stack.pop()
+            if high is not None and node.key > high:
+                return
+            if low is None or node.key >= low:
+                yield node.key, node.value
+            number = node.right
+
+    def inorder(self) -> Iterator[int]:
+        """
+        Iterates over the keys of the tree in ascending order.
+
+        Returns:
+            Iterator[int]: Keys of the nodes.
+        """
+        for key, _ in self.items():
+            yield key
+
+    def range(self, low: int, high: int) -> Iterator[int]:
+        """
+        Lazily iterates over the keys between low and high (inclusive), in ascending order.
+
+        Parameters:
+            low (int): Lower bound of the keys.
+            high (int): Upper bound of the keys.
+
+        Returns:
+            Iterator[int]: Keys of the nodes.
+        """
+        for key, _ in self.items(low=low, high=high):
+            yield key
+
+    def flush(self) -> None:
+        """
+        Writes back the dirty pages and the header, and makes them durable.\n
+        The pages are changed in place, so unlike StoreAVLTree.store a crash during
+        a flush can leave a partly written tree.
+
+        Returns:
+            None
+        """
+        if not self.pool.dirty and not self.changed:
+            return
+
+        self.pool.flush()
+
+        self.file.seek(0)
+        self.file.write(
+            HEADER.pack(
+                PAGED_MAGIC,
+                PAGED_VERSION,
+                self.page_size,
+                self.root,
+                self.pages,
+                self.count,
+            )
+        )
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.changed = False
+
+    def close(self) -> None:
+        """
+        Flushes the tree, and closes the page file.
+
+        Returns:
+            None
+        """
+        try:
+            self.flush()
+        finally:
+            self.file.close()
+
+    def __enter__(self) -> "PagedAVLTree":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+def is_paged(filename: str) -> bool:
+    """
+    Checks whether a DB file is a page file, from its header.
+
+    Parameters:
+        filename (str): Path to the DB file.
+
+    Returns:
+        bool: True for a page file, False if it's in another format or doesn't exist.
+    """
+    # The trees of a container can't be paged.
+    if is_tree_path(filename=filename):
+        return False
+
+    try:
+        with open(file=filename, mode="rb") as file:
+            return file.read(len(PAGED_MAGIC)) == PAGED_MAGIC
+    except FileNotFoundError:
+        return False
+
+
+def read_keys(nodes: bytes) -> Iterator[int]:
+    """
+    Iterates over the keys of a page file read into memory, in ascending order.
+
+    Parameters:
+        nodes (bytes): The page file.
+
+    Returns:
+        Iterator[int]: Keys of the nodes.
+    """
+    _, _, page_size, number, _, _ = HEADER.unpack_from(nodes)
+    unpack = NODE.unpack_from
+    # Keys and right children of the nodes, whose left subtree is being visited.
+    stack: list[tuple[int, int]] = []
+
+    while stack or number:
+        while number:
+            key, left, right, _, _, _ = unpack(nodes, number * page_size)
+            stack.append((key, right))
+            number = left
+
+        key, number = stack.pop()
+        yield key
@@ -0,0 +1,347 @@
+import threading
+from collections.abc import Iterable, Iterator, Sequence
+
+
+class PersistentNode:
+    """
+    An immutable node of a persistent AVL tree, it's never changed after it's created.
+
+    Attributes:
+        key (int): The value stored in the node.
+        left (PersistentNode | None): The left child node.
+        right (PersistentNode | None): The right child node.
+        height (int): Height of the subtree rooted at this node.
+        size (int): Number of nodes in the subtree rooted at this node.
+    """
+
+    __slots__ = ("key", "left", "right", "height", "size")
+
+    def __init__(
+        self,
+        key: int,
+        left: "PersistentNode | None" = None,
+        right: "PersistentNode | None" = None,
+    ) -> None:
+        """
+        Initializes a PersistentNode object.
+
+        Parameters:
+            key (int): The value to be stored in the node.
+            left (PersistentNode | None): The left child node.
+            right (PersistentNode | None): The right child node.
+        """
+        self.key: int = key
+        self.left: PersistentNode | None = left
+        self.right: PersistentNode | None = right
+        self.height: int = max(height(node=left), height(node=right)) + 1
+        self.size: int = 1 + (left.size if left else 0) + (right.size if right else 0)
+
+
+def height(node: PersistentNode | None) -> int:
+    """
+    Returns the height of a subtree.
+
+    Parameters:
+        node (PersistentNode | None): Root of the subtree.
+
+    Returns:
+        int: Height of the subtree, 0 if the node doesn't exist.
+    """
+    return node.height if node else 0
+
+
+def balance(
+    key: int, left: PersistentNode | None, right: PersistentNode | None
+) -> PersistentNode:
+    """
+    Creates a node from a key and two subtrees, whose heights differ by at most 2.\n
+    The rotations create new nodes, instead of changing the existing ones.
+
+    Parameters:
+        key (int): The value stored in the node.
+        left (PersistentNode | None): The left subtree.
+        right (PersistentNode | None): The right subtree.
+
+    Returns:
+        PersistentNode: Root of the balanced subtree.
+    """
+    # There is more child nodes on the left side.
+    if height(node=left) > height(node=right) + 1:
+        # Left-right rotation.
+        if height(node=left.left) < height(node=left.right):  # type: ignore
+            pivot: PersistentNode = left.right  # type: ignore
+            return PersistentNode(
+                key=pivot.key,
+                left=PersistentNode(
+                    key=left.key, left=left.left, right=pivot.left  # type: ignore
+                ),
+                right=PersistentNode(key=key, left=pivot.right, right=right),
+            )
+        # Right rotation.
+        return PersistentNode(
+            key=left.key,  # type: ignore
+            left=left.left,  # type: ignore
+            right=PersistentNode(key=key, left=left.right, right=right),  # type: ignore
+        )
+
+    # There is more child nodes on the right side.
+    if height(node=right) > height(node=left) + 1:
+        # Right-left rotation.
+        if height(node=right.right) < height(node=right.left):  # type: ignore
+            pivot = right.left  # type: ignore
+            return PersistentNode(
+                key=pivot.key,
+                left=PersistentNode(key=key, left=left, right=pivot.left),
+                right=PersistentNode(
+                    key=right.key, left=pivot.right, right=right.right  # type: ignore
+                ),
+            )
+        # Left rotation.
+        return PersistentNode(
+            key=right.key,  # type: ignore
+            left=PersistentNode(key=key, left=left, right=right.left),  # type: ignore
+            right=right.right,  # type: ignore
+        )
+
+    return PersistentNode(key=key, left=left, right=right)
+
+
+class PersistentAVLTree:
+    """
+    A persistent AVL tree, insert returns a new version and leaves the current one untouched.\n
+    The new version shares every subtree, that is not on the insert path.
+
+    Attributes:
+        root (PersistentNode | None): Root node of this version, None if the tree is empty.
+    """
+
+    __slots__ = ("root",)
+
+    def __init__(self, root: PersistentNode | None = None) -> None:
+        """
+        Initializes a PersistentAVLTree object.
+
+        Parameters:
+            root (PersistentNode | None): Root node of the version.
+        """
+        self.root: PersistentNode | None = root
+
+    @classmethod
+    def from_sorted(cls, keys: Sequence[int]) -> "PersistentAVLTree":
+        """
+        Builds a perfectly balanced tree from sorted, unique keys, without any rotations.
+
+        Parameters:
+            keys (Sequence[int]): Keys in ascending order, without duplicates.
+
+        Returns:
+            PersistentAVLTree: Returns a PersistentAVLTree object.
+        """
+
+        def build(low: int, high: int) -> PersistentNode | None:
+            # Empty range, there is no node.
+            if low > high:
+                return None
+
+            # The middle key becomes the root of the subtree.
+            middle: int = (low + high) // 2
+            return PersistentNode(
+                key=keys[middle],
+                left=build(low=low, high=middle - 1),
+                right=build(low=middle + 1, high=high),
+            )
+
+        return cls(root=build(low=0, high=len(keys) - 1))
+
+    def __len__(self) -> int:
+        """
+        Returns the number of nodes in the tree.
+
+        Returns:
+            int: Size of the root node.
+        """
+        return self.root.size if self.root else 0
+
+    def snapshot(self) -> "PersistentAVLTree":
+        """
+        Returns a stable version of the tree, in O(1).\n
+        A version is never changed, so it's its own snapshot.
+
+        Returns:
+            PersistentAVLTree: This version.
+        """
+        return self
+
+    def insert(self, key: int) -> "PersistentAVLTree":
+        """
+        Add a new node, by copying the nodes on the insert path.
+
+        Parameters:
+            key (int): The value stored in the node.
+
+        Returns:
+            PersistentAVLTree: The new version, or this version if the key already exists.
+        """
+        node: PersistentNode | None = self.root
+        # Nodes on the insert path, and whether the path went left.
+        path: list[tuple[PersistentNode, bool]] = []
+
+        while node:
+            if key < node.key:
+                path.append((node, True))
+                node = node.left
+            elif key > node.key:
+                path.append((node, False))
+                node = node.right
+            else:
+                # Do not duplicate a existing node.
+                return self
+
+        # Copy the insert path bottom-up, and rebalance every copied node.
+        subtree: PersistentNode = PersistentNode(key=key)
+        for parent, went_left in reversed(path):
+            if went_left:
+                subtree = balance(key=parent.key, left=subtree, right=parent.right)
+            else:
+                subtree = balance(key=parent.key, left=parent.left, right=subtree)
+
+        return PersistentAVLTree(root=subtree)
+
+    def contains(self, key: int) -> bool:
+        """
+        Checks whether the key exists in the tree.
+
+        Parameters:
+            key (int): The value stored in the node.
+
+        Returns:
+            bool: True if the key exists.
+        """
+        node: PersistentNode | None = self.root
+
+        while node:
+            if key < node.key:
+                node = node.left
+            elif key > node.key:
+                node = node.right
+            else:
+                return True
+
+        return False
+
+    def range(self, low: int, high: int) -> Iterator[int]:
+        """
+        Lazily iterates over the keys between low and high (inclusive), in ascending order.
+
+        Parameters:
+            low (int): Lower bound of the keys.
+            high (int): Upper bound of the keys.
+
+        Returns:
+            Iterator[int]: Keys of the nodes.
+        """
+        node: PersistentNode | None = self.root
+        # Nodes, whose key and right subtree are still to be visited.
+        stack: list[PersistentNode] = []
+
+        while stack or node:
+            # Go left, but skip the subtrees that are below low.
+            while node:
+                if node.key < low:
+                    node = node.right
+                else:
+                    stack.append(node)
+                    node = node.left
+
+            if not stack:
+                return
+
+            node = stack.pop()
+            if node.key > high:
+                return
+
+            yield node.key
+            node = node.right
+
+    def inorder(self) -> Iterator[int]:
+        """
+        Iterates over the keys of the tree in ascending order.
+
+        Returns:
+            Iterator[int]: Keys of the nodes.
+        """
+        node: PersistentNode | None = self.root
+        # List of nodes, whose left subtree is being visited.
+        stack: list[PersistentNode] = []
+
+        while stack or node:
+            # Go as far left as possible.
+            while node:
+                stack.append(node)
+                node = node.left
+
+            node = stack.pop()
+            yield node.key
+            node = node.right
+
+
+class VersionedTree:
+    """
+    Publishes versions of a persistent AVL tree, to concurrent reader threads.\n
+    Readers never lock, snapshot only reads the current version reference.
+    Writers are serialized with a lock, and publish a new version with a single assignment.
+
+    Attributes:
+        current (PersistentAVLTree): The latest published version.
+    """
+
+    def __init__(self, tree: PersistentAVLTree | None = None) -> None:
+        """
+        Initializes a VersionedTree object.
+
+        Parameters:
+            tree (PersistentAVLTree | None): The first version, an empty tree by default.
+        """
+        self.current: PersistentAVLTree = tree or PersistentAVLTree()
+        self._lock: threading.Lock = threading.Lock()
+
+    def snapshot(self) -> PersistentAVLTree:
+        """
+        Returns the latest published version, in O(1) and without locking.
+
+        Returns:
+            PersistentAVLTree: A stable version of the tree.
+        """
+        return self.current
+
+    def insert(self, key: int) -> PersistentAVLTree:
+        """
+        Add a node, and publish the new version.
+
+        Parameters:
+            key (int): The value stored in the node.
+
+        Returns:
+            PersistentAVLTree: The published version.
+        """
+        return self.insert_many(keys=[key])
+
+    def insert_many(self, keys: Iterable[int]) -> PersistentAVLTree:
+        """
+        Add several nodes, and publish them as a single new version.
+
+        Parameters:
+            keys (Iterable[int]): Values of the nodes.
+
+        Returns:
+            PersistentAVLTree: The published version.
+        """
+        with self._lock:
+            tree: PersistentAVLTree = self.current
+            for key in keys:
+                tree = tree.insert(key=key)
+
+            # Readers see either the old version or the new one, never a partial one.
+            self.current = tree
+
+        return tree
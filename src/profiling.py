@@ -0,0 +1,194 @@
+import cProfile
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager
+from types import FrameType
+from typing import TextIO
+
+
+class StackSampler:
+    """
+    Samples the call stack of a thread in the background, for flamegraphs.\n
+    Unlike cProfile, the samples keep the full stacks, so they can be written as collapsed stacks:
+    one "outer;...;inner count" line per stack, as read by flamegraph.pl and speedscope.
+
+    Attributes:
+        interval (float): Seconds between two samples.
+        stacks (Counter[str]): Number of samples per collapsed stack.
+    """
+
+    def __init__(self, interval: float = 0.001) -> None:
+        """
+        Initializes a StackSampler object, that samples the calling thread.
+
+        Parameters:
+            interval (float): Seconds between two samples.
+        """
+        self.interval: float = interval
+        self.stacks: Counter[str] = Counter()
+        self._target: int = threading.get_ident()
+        self._stopped: threading.Event = threading.Event()
+        self._thread: threading.Thread = threading.Thread(
+            target=self._sample, name="StackSampler", daemon=True
+        )
+
+    def _sample(self) -> None:
+        """
+        Records the stack of the target thread, until the sampler is stopped.
+
+        Returns:
+            None
+        """
+        while not self._stopped.wait(timeout=self.interval):
+            frame: FrameType | None = sys._current_frames().get(self._target)
+            names: list[str] = []
+
+            while frame:
+                code = frame.f_code
+                names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+
+            if names:
+                self.stacks[";".join(reversed(names))] += 1
+
+    def start(self) -> None:
+        """
+        Starts sampling in a daemon thread.
+
+        Returns:
+            None
+        """
+        self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Stops sampling, and waits for the sampler thread.
+
+        Returns:
+            None
+        """
+        self._stopped.set()
+        self._thread.join()
+
+    def write(self, filename: str) -> None:
+        """
+        Writes the samples as collapsed stacks.
+
+        Parameters:
+            filename (str): Path to the collapsed stack file.
+
+        Returns:
+            None
+        """
+        with open(file=filename, mode="w") as file:
+            for stack, count in self.stacks.most_common():
+                file.write(f"{stack} {count}\n")
+
+
+def report_allocations(
+    snapshot: tracemalloc.Snapshot, peak: int, limit: int, stream: TextIO
+) -> None:
+    """
+    Writes the top allocation sites of a tracemalloc snapshot.
+
+    Parameters:
+        snapshot (tracemalloc.Snapshot): Memory blocks still allocated at the end of the command.
+        peak (int): Peak of the traced memory in bytes.
+        limit (int): Number of allocation sites.
+        stream (TextIO): Where the report is written.
+
+    Returns:
+        None
+    """
+    # The profiler's own allocations are left out.
+    snapshot = snapshot.filter_traces(
+        [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ]
+    )
+    statistics: list[tracemalloc.Statistic] = snapshot.statistics(key_type="lineno")
+
+    print(f"\nPeak traced memory: {peak} bytes", file=stream)
+    print(f"Top {limit} allocation sites, still allocated:", file=stream)
+
+    for statistic in statistics[:limit]:
+        frame: tracemalloc.Frame = statistic.traceback[0]
+        print(
+            f"  {statistic.size:>12} B {statistic.count:>9} blocks"
+            f"  {frame.filename}:{frame.lineno}",
+            file=stream,
+        )
+
+
+@contextmanager
+def profile_command(
+    profile: bool = False,
+    sort: str = "cumulative",
+    limit: int = 25,
+    output: str | None = None,
+    stacks: str | None = None,
+    trace_malloc: int | None = None,
+    stream: TextIO = sys.stderr,
+) -> Iterator[None]:
+    """
+    Profiles the body of a with statement, and reports once it's done, even if it fails.\n
+    Without any option, the body runs as is.
+
+    Parameters:
+        profile (bool): Run the body under cProfile, and report the hotspots.
+        sort (str): pstats sort key of the hotspot report.
+        limit (int): Number of hotspots and allocation sites.
+        output (str | None): Path to a pstats file, for snakeviz, gprof2dot or flameprof.
+        stacks (str | None): Path to a collapsed stack file, from a sampling profiler.
+        trace_malloc (int | None): Number of frames traced by tracemalloc, None disables it.
+        stream (TextIO): Where the reports are written.
+
+    Returns:
+        Iterator[None]
+    """
+    profiler: cProfile.Profile | None = (
+        cProfile.Profile() if profile or output else None
+    )
+    sampler: StackSampler | None = StackSampler() if stacks else None
+
+    if trace_malloc:
+        tracemalloc.start(trace_malloc)
+    if sampler:
+        sampler.start()
+
+    start: float = time.perf_counter()
+    if profiler:
+        profiler.enable()
+
+    try:
+        yield
+    finally:
+        if profiler:
+            profiler.disable()
+        seconds: float = time.perf_counter() - start
+
+        if sampler:
+            sampler.stop()
+            sampler.write(filename=stacks)  # type: ignore
+            print(f"\nCollapsed stacks written to {stacks}.", file=stream)
+
+        if trace_malloc:
+            snapshot: tracemalloc.Snapshot = tracemalloc.take_snapshot()
+            peak: int = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            report_allocations(snapshot=snapshot, peak=peak, limit=limit, stream=stream)
+
+        if profiler:
+            if output:
+                profiler.dump_stats(file=output)
+                print(f"\nProfile written to {output}.", file=stream)
+            if profile:
+                print(f"\nCommand took {seconds:.6f} seconds.", file=stream)
+                pstats.Stats(profiler, stream=stream).sort_stats(sort).print_stats(limit)
@@ -0,0 +1,349 @@
+import asyncio
+import io
+import os
+import socket
+import threading
+from asyncio import StreamReader, StreamWriter
+from collections.abc import Iterator
+from logging import Logger
+
+from avl_tree import AVLTree
+from cache import Stamp, stamp
+from container import exists, is_container, tree_path
+from database import WAL_COMPACT_BYTES, compact, read_nodes, store_node
+from logger import LOGGER
+from storage import StoreAVLTree
+
+# Default TCP port of the DB server.
+DEFAULT_PORT: int = 7878
+
+
+def _tree_option(tree: str | None) -> str:
+    """
+    Returns the --tree option of a request, empty without a tree.
+    """
+    return "" if tree is None else f" --tree {tree}"
+
+
+class DBServer:
+    """
+    Serves DB files over a line based protocol, and keeps the opened trees in memory.\n
+    A resident tree is read again, once another writer changed its DB file or write-ahead log.
+    The requests run in worker threads, one at a time per DB file.
+    Every request is a single line: COMMAND FILENAME [ARGS...] [--tree NAME]
+        ADD <filename> <key>
+        GET <filename> <key>
+        RANGE <filename> <low> <high>
+        SHOW <filename>
+    Like on the command line, a request only addresses a tree of a container file with --tree.
+    Every response is either "OK <n>" followed by n lines, or "ERR <message>".
+
+    Attributes:
+        trees (dict[str, AVLTree]): Opened trees, by the path to their DB file.
+        stamps (dict[str, Stamp | None]): Identity of the DB file, the resident tree was read from.
+        locks (dict[str, threading.Lock]): Lock of each resident tree, held by its requests.
+        compact_bytes (int): Size of the write-ahead log, that triggers a compaction.
+        logger (Logger): The logger will post logs to the server.log file.
+    """
+
+    def __init__(self, compact_bytes: int = WAL_COMPACT_BYTES) -> None:
+        """
+        Initializes a DBServer object.
+
+        Parameters:
+            compact_bytes (int): Size of the write-ahead log, that triggers a compaction.
+        """
+        self.trees: dict[str, AVLTree] = {}
+        self.stamps: dict[str, Stamp | None] = {}
+        self.locks: dict[str, threading.Lock] = {}
+        self.compact_bytes: int = compact_bytes
+        self.storage: StoreAVLTree = StoreAVLTree()
+        self.logger: Logger = LOGGER(_name="server.DBServer", _filename="server.log")
+
+    def open(self, filename: str) -> AVLTree | None:
+        """
+        Returns the tree of the DB file, it is read from disk again whenever the DB file changed.
+
+        Parameters:
+            filename (str): Path to the DB file, or to a tree of a container file.
+
+        Returns:
+            AVLTree | None: The tree, None if the DB file doesn't exist.
+        """
+        # The identity is taken before the tree is read, a write in between reloads it again.
+        current: Stamp | None = stamp(filename=filename)
+
+        if filename in self.trees and self.stamps[filename] == current:
+            return self.trees[filename]
+
+        if not exists(filename=filename):
+            self.trees.pop(filename, None)
+            self.stamps.pop(filename, None)
+            return None
+
+        # The resident tree is changed in place, so it isn't shared with the cache.
+        self.trees[filename] = read_nodes(filename=filename)
+        self.stamps[filename] = current
+        self.logger.info("DB file %s loaded.", filename)
+
+        return self.trees[filename]
+
+    def add(self, filename: str, key: int) -> None:
+        """
+        Add a node to the DB, the key is written to the write-ahead log before it's acknowledged.
+
+        Parameters:
+            filename (str): Path to the DB file.
+            key (int): Value of the node.
+
+        Returns:
+            None
+        """
+        # No other writer changes the DB file, between the reload of the tree and the key.
+        with self.storage.lock(filename=filename):
+            tree: AVLTree | None = self.open(filename=filename)
+
+            if tree is None:
+                tree = AVLTree(key=key)
+                store_node(root=tree.node, filename=filename, cache=False)
+                self.trees[filename] = tree
+                self.stamps[filename] = stamp(filename=filename)
+                return
+
+            size: int = self.storage.append_log(key=key, filename=filename)
+            tree.insert(key=key)
+            self.stamps[filename] = stamp(filename=filename)
+
+            # Like on the command line, the trees are read from the DB files and the log to be
+            # compacted, other writers may have logged keys that aren't in the resident trees.
+            if size >= self.compact_bytes:
+                compact(filename=filename)
+                # The resident tree still has the same keys as the DB file.
+                self.stamps[filename] = stamp(filename=filename)
+
+    def execute(self, line: str) -> list[str]:
+        """
+        Runs a single request.
+
+        Parameters:
+            line (str): The request, without the newline.
+
+        Returns:
+            list[str]: Lines of the response body.
+        """
+        command, filename, *args = line.split()
+        command = command.upper()
+        # The DB file, as the messages name it.
+        name: str = filename
+
+        # A # in the filename is part of the path, the tree is only named with --tree.
+        if len(args) >= 2 and args[-2] == "--tree":
+            if os.path.exists(path=filename) and not is_container(filename=filename):
+                raise ValueError(f"DB file {filename} doesn't hold named trees.")
+
+            name = f"{filename} --tree {args[-1]}"
+            filename = tree_path(filename=filename, tree=args[-1])
+            args = args[:-2]
+
+        # A request of another connection may be changing the resident tree.
+        with self.locks.setdefault(filename, threading.Lock()):
+            if command == "ADD":
+                self.add(filename=filename, key=int(args[0]))
+                return []
+
+            tree: AVLTree | None = self.open(filename=filename)
+            if tree is None:
+                raise ValueError(f"DB file {name} doesn't exist.")
+
+            if command == "GET":
+                return ["1" if tree.contains(key=int(args[0])) else "0"]
+            elif command == "RANGE":
+                low: int = int(args[0])
+                high: int = int(args[1])
+                return [str(key) for key in tree.range(low=low, high=high)]
+            elif command == "SHOW":
+                output: io.StringIO = io.StringIO()
+                tree.show(node=tree.node, file=output)
+                return output.getvalue().splitlines()
+
+        raise ValueError(f"Unknown command {command}.")
+
+    async def handle(self, reader: StreamReader, writer: StreamWriter) -> None:
+        """
+        Answers the requests of a single connection, until the client disconnects.
+
+        Parameters:
+            reader (StreamReader): Requests from the client.
+            writer (StreamWriter): Responses to the client.
+
+        Returns:
+            None
+        """
+        while line := await reader.readline():
+            try:
+                # The fsync and lock waits of a request don't block the other connections.
+                body: list[str] = await asyncio.to_thread(
+                    self.execute, line=line.decode().strip()
+                )
+                response: str = "".join(
+                    [f"OK {len(body)}\n"] + [f"{row}\n" for row in body]
+                )
+            except (ValueError, IndexError, OSError) as error:
+                # An unreadable DB file fails the request, not the connection.
+                response = f"ERR {error}\n"
+
+            writer.write(response.encode())
+            await writer.drain()
+
+        writer.close()
+
+    async def serve(
+        self, host: str = "127.0.0.1", port: int = DEFAULT_PORT, path: str | None = None
+    ) -> None:
+        """
+        Runs the server forever, on a TCP port or on a Unix socket.
+
+        Parameters:
+            host (str): Address of the TCP server.
+            port (int): Port of the TCP server.
+            path (str | None): Path to a Unix socket, used instead of the TCP port.
+
+        Returns:
+            None
+        """
+        if path:
+            server: asyncio.Server = await asyncio.start_unix_server(
+                self.handle, path=path
+            )
+        else:
+            server = await asyncio.start_server(self.handle, host=host, port=port)
+
+        self.logger.info("DB server listening on %s.", path or f"{host}:{port}")
+
+        async with server:
+            await server.serve_forever()
+
+
+class DBClient:
+    """
+    A blocking client for the DB server.
+
+    Attributes:
+        connection (socket.socket): Connection to the DB server.
+    """
+
+    def __init__(
+        self, host: str = "127.0.0.1", port: int = DEFAULT_PORT, path: str | None = None
+    ) -> None:
+        """
+        Initializes a DBClient object, and connects to the DB server.
+
+        Parameters:
+            host (str): Address of the TCP server.
+            port (int): Port of the TCP server.
+            path (str | None): Path to a Unix socket, used instead of the TCP port.
+        """
+        if path:
+            self.connection: socket.socket = socket.socket(family=socket.AF_UNIX)
+            self.connection.connect(path)
+        else:
+            self.connection = socket.create_connection(address=(host, port))
+            self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+        self.file: io.BufferedRWPair = self.connection.makefile(mode="rwb")  # type: ignore
+
+    def request(self, line: str) -> list[str]:
+        """
+        Sends a single request, and waits for the response.
+
+        Parameters:
+            line (str): The request, without the newline.
+
+        Returns:
+            list[str]: Lines of the response body.
+        """
+        self.file.write(f"{line}\n".encode())
+        self.file.flush()
+
+        status: str = self.file.readline().decode().rstrip("\n")
+        if status.startswith("ERR"):
+            raise ValueError(status[4:])
+
+        return [self.file.readline().decode().rstrip("\n") for _ in range(int(status[3:]))]
+
+    def add(self, filename: str, key: int, tree: str | None = None) -> None:
+        """
+        Add a node to the DB.
+
+        Parameters:
+            filename (str): Path to the DB file.
+            key (int): Value of the node.
+            tree (str | None): Name of the tree, if the DB file is a container file.
+
+        Returns:
+            None
+        """
+        self.request(line=f"ADD {filename} {key}{_tree_option(tree=tree)}")
+
+    def get(self, filename: str, key: int, tree: str | None = None) -> bool:
+        """
+        Checks whether the key exists in the DB.
+
+        Parameters:
+            filename (str): Path to the DB file.
+            key (int): Value of the node.
+            tree (str | None): Name of the tree, if the DB file is a container file.
+
+        Returns:
+            bool: True if the key exists.
+        """
+        line: str = f"GET {filename} {key}{_tree_option(tree=tree)}"
+        return self.request(line=line) == ["1"]
+
+    def range(
+        self, filename: str, low: int, high: int, tree: str | None = None
+    ) -> Iterator[int]:
+        """
+        Iterates over the keys between low and high (inclusive).
+
+        Parameters:
+            filename (str): Path to the DB file.
+            low (int): Lower bound of the keys.
+            high (int): Upper bound of the keys.
+            tree (str | None): Name of the tree, if the DB file is a container file.
+
+        Returns:
+            Iterator[int]: Keys in ascending order.
+        """
+        line: str = f"RANGE {filename} {low} {high}{_tree_option(tree=tree)}"
+        return map(int, self.request(line=line))
+
+    def show(self, filename: str, tree: str | None = None) -> str:
+        """
+        Visualizes the AVL tree of the DB.
+
+        Parameters:
+            filename (str): Path to the DB file.
+            tree (str | None): Name of the tree, if the DB file is a container file.
+
+        Returns:
+            str: The rendered tree.
+        """
+        line: str = f"SHOW {filename}{_tree_option(tree=tree)}"
+        return "\n".join(self.request(line=line))
+
+    def close(self) -> None:
+        """
+        Closes the connection to the DB server.
+
+        Returns:
+            None
+        """
+        self.file.close()
+        self.connection.close()
+
+    def __enter__(self) -> "DBClient":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
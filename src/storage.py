@@ -1,10 +1,227 @@
-from io import TextIOWrapper
+import mmap
+import os
+import struct
+import sys
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterator
+from contextlib import contextmanager
 from logging import Logger
+from typing import BinaryIO
+from zlib import compress, crc32, decompress
 
-from avl_tree import AVLTree, Node
+from avl_tree import AVLTree, Node, inorder_keys
+from bloom import BLOOM_SUFFIX, BloomFilter, add_key, sync_bloom
+from container import (
+    CONTAINER_MAGIC,
+    TREE_SEPARATOR,
+    is_tree_path,
+    read_tree,
+    remove_tree,
+    sidecar_path,
+    split_tree_path,
+    tree_path,
+    write_tree,
+)
 from logger import LOGGER
+from metrics import METRICS, timed
 from utils import validate_dir
 
+try:
+    import fcntl
+except ImportError:
+    # Without fcntl (Windows), the locks only exclude the threads of this process.
+    fcntl = None  # type: ignore
+
+# Header of the binary DB format, followed by the format version.
+MAGIC: bytes = b"AVLT"
+VERSION: int = 2
+
+# Footer of the sorted key block: offset and count of the int64 keys, then KEY_BLOCK_MAGIC.
+KEY_BLOCK_MAGIC: bytes = b"AVLK"
+KEY_BLOCK_FOOTER: struct.Struct = struct.Struct("<QQ4s")
+
+# Header of the compressed DB format, followed by the format version.
+COMPRESSED_MAGIC: bytes = b"AVLZ"
+COMPRESSED_VERSION: int = 1
+
+# Header of the paged DB format, followed by the format version, see paged_tree.
+PAGED_MAGIC: bytes = b"AVLP"
+PAGED_VERSION: int = 1
+
+# Codecs of the compressed DB format blocks.
+CODECS: dict[str, int] = {"none": 0, "zlib": 1, "lzma": 2}
+
+# Shape bits of a node in the binary DB format.
+HAS_LEFT: int = 0b01
+HAS_RIGHT: int = 0b10
+
+# Suffix of the write-ahead log, next to the DB file. The trees of a container file share
+# the log of the container, and their keys are logged with the tree name.
+WAL_SUFFIX: str = ".wal"
+
+# Suffix of the lock file, next to the DB file. It also holds the synced size of the write-ahead log.
+# The trees of a container file share the lock of the container.
+LOCK_SUFFIX: str = ".lock"
+SYNCED: struct.Struct = struct.Struct("<Q")
+
+# Lock files held by the current thread, by path, so nested locks on a DB file don't deadlock.
+_held: threading.local = threading.local()
+# Process wide locks by path, flock doesn't exclude threads that share an open file.
+_thread_locks: dict[str, threading.Lock] = {}
+
+
+def _write_varint(buffer: bytearray, value: int) -> None:
+    """
+    Append a zigzag encoded varint to the buffer.
+
+    Parameters:
+        buffer (bytearray): Buffer the varint is appended to.
+        value (int): Signed integer to encode.
+
+    Returns:
+        None
+    """
+    # Zigzag encoding maps negative keys onto odd numbers, so they stay small.
+    _write_uvarint(buffer=buffer, value=value * 2 if value >= 0 else -value * 2 - 1)
+
+
+def _write_uvarint(buffer: bytearray, value: int) -> None:
+    """
+    Append an unsigned varint to the buffer.
+
+    Parameters:
+        buffer (bytearray): Buffer the varint is appended to.
+        value (int): Unsigned integer to encode.
+
+    Returns:
+        None
+    """
+    # Write 7 bits at a time, the high bit marks that more bytes follow.
+    while value > 0x7F:
+        buffer.append((value & 0x7F) | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def _read_varint(data: bytes, offset: int) -> tuple[int, int]:
+    """
+    Read a zigzag encoded varint from the data.
+
+    Parameters:
+        data (bytes): Buffer the varint is read from.
+        offset (int): Position of the first byte of the varint.
+
+    Returns:
+        tuple[int, int]: The decoded integer and the position after the varint.
+    """
+    value, offset = _read_uvarint(data=data, offset=offset)
+
+    # Undo the zigzag encoding.
+    value = value >> 1 if not value & 1 else -((value + 1) >> 1)
+
+    return value, offset
+
+
+def _read_uvarint(data: bytes, offset: int) -> tuple[int, int]:
+    """
+    Read an unsigned varint from the data.
+
+    Parameters:
+        data (bytes): Buffer the varint is read from.
+        offset (int): Position of the first byte of the varint.
+
+    Returns:
+        tuple[int, int]: The decoded integer and the position after the varint.
+    """
+    value: int = 0
+    shift: int = 0
+
+    while True:
+        byte: int = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        shift += 7
+
+        if byte < 0x80:
+            break
+
+    return value, offset
+
+
+def _fsync_dir(path: str) -> None:
+    """
+    Makes a created, renamed or removed directory entry durable.
+
+    Parameters:
+        path (str): Path to a file in the directory.
+
+    Returns:
+        None
+    """
+    # Directories can't be opened on Windows, their entries are durable anyway.
+    if os.name != "posix":
+        return
+
+    descriptor: int = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    try:
+        os.fsync(descriptor)
+    finally:
+        os.close(descriptor)
+
+
+def _temporary_path(filepath: str) -> str:
+    """
+    Returns the path of a temporary file next to a file, that is unique to the process
+    and the thread, so concurrent writers in one process don't share it.
+
+    Parameters:
+        filepath (str): Path to the file, that the temporary file replaces.
+
+    Returns:
+        str: Path of the temporary file.
+    """
+    return f"{filepath}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+
+def _replace(filepath: str, data: str | bytes) -> int:
+    """
+    Replaces a file atomically, through a synced temporary file next to it.
+
+    Parameters:
+        filepath (str): Path to the file.
+        data (str | bytes): New content of the file.
+
+    Returns:
+        int: Number of bytes written.
+    """
+    temporary: str = _temporary_path(filepath=filepath)
+    with open(file=temporary, mode="wb" if isinstance(data, bytes) else "w") as file:
+        file.write(data)
+        file.flush()
+        os.fsync(file.fileno())
+        written: int = file.tell()
+
+    # Readers and a crash see either the old or the new file, never a partial one.
+    os.replace(src=temporary, dst=filepath)
+    _fsync_dir(path=filepath)
+
+    return written
+
+
+def wal_path(filename: str) -> str:
+    """
+    Returns the path of the write-ahead log of a DB file, or of the container of a tree.
+
+    Parameters:
+        filename (str): Path to a DB file, or to a tree of a container file.
+
+    Returns:
+        str: Path of the write-ahead log.
+    """
+    return split_tree_path(filename=filename)[0] + WAL_SUFFIX
+
 
 class StoreAVLTree:
     """
@@ -18,9 +235,10 @@ class StoreAVLTree:
 
         filename: str = "storage.log"
         self.logger: Logger = LOGGER(_name="storage.StoreAVLTree", _filename=filename)
-        self.logger.info(msg=f"Creating a log file...")
-        self.logger.info(msg=f"Log file {filename} was created.")
+        self.logger.info(msg="Creating a log file...")
+        self.logger.info("Log file %s was created.", filename)
 
+    @timed(name="storage.serialize.text")
     def serialize(self, root: Node) -> str:
         """
         Serialize a AVL tree int oa single str.
@@ -35,7 +253,7 @@ class StoreAVLTree:
         if not root:
             return
 
-        self.logger.info(msg=f"Serializing the AVL tree...")
+        self.logger.info(msg="Serializing the AVL tree...")
 
         # Queue of nodes to loop through.
         stack: list[Node] = [root]
@@ -55,70 +273,412 @@ class StoreAVLTree:
         # Convert the list[str] into a single str.
         serialized_tree: str = ",".join(nodes)
 
-        self.logger.info(msg=f"Serialized AVL Tree: {serialized_tree}.")
+        self.logger.debug("Serialized AVL Tree: %s.", serialized_tree)
 
         return serialized_tree
 
-    def deserialize(self, nodes: str) -> AVLTree:
+    @timed(name="storage.serialize.binary")
+    def serialize_binary(self, root: Node) -> bytes:
         """
-        Deserialize the single str into an AVL tree.
+        Serialize a AVL tree into the binary DB format.\n
+        Header: MAGIC, VERSION and the node count, followed by every node in preorder,
+        as a shape byte (HAS_LEFT | HAS_RIGHT) and a zigzag varint key.
+        Then, if every key fits in an int64, the sorted key block read by MappedKeyBlock:
+        the keys as 8 byte aligned little endian int64, and the KEY_BLOCK_FOOTER.
 
         Attributes:
-            nodes (str): Serialized str of nodes.
+            root (Node): Pass the root node of the tree.
+
+        Returns:
+            bytes: The serialized tree.
+        """
+
+        self.logger.info(msg="Serializing the AVL tree into binary...")
+
+        # Queue of nodes to loop through.
+        stack: list[Node] = [root]
+        # Serialized nodes, in preorder.
+        body: bytearray = bytearray()
+        count: int = 0
+
+        while stack:
+            current: Node = stack.pop()
+            count += 1
+
+            # Shape bits, so the loader can rebuild the exact same tree.
+            shape: int = (HAS_LEFT if current.left else 0) | (
+                HAS_RIGHT if current.right else 0
+            )
+            body.append(shape)
+            _write_varint(buffer=body, value=current.key)
+
+            if current.right:
+                stack.append(current.right)
+            if current.left:
+                stack.append(current.left)
+
+        header: bytearray = bytearray(MAGIC)
+        header.append(VERSION)
+        _write_varint(buffer=header, value=count)
+
+        nodes: bytearray = header + body
+        nodes += self.serialize_key_block(root=root, offset=len(nodes))
+
+        self.logger.info("Serialized %s nodes into binary.", count)
+
+        return bytes(nodes)
+
+    def serialize_key_block(self, root: Node, offset: int) -> bytes:
+        """
+        Serialize the sorted key block, that is appended to the binary DB format.
+
+        Attributes:
+            root (Node): Pass the root node of the tree.
+            offset (int): Position in the DB file, where the key block starts.
+
+        Returns:
+            bytes: The padding, keys and footer, empty if a key doesn't fit in an int64.
+        """
+        try:
+            keys: array = array("q", inorder_keys(node=root))
+        except OverflowError:
+            return b""
+
+        if sys.byteorder == "big":
+            keys.byteswap()
+
+        # Align the keys to 8 bytes, so the block can be cast to int64 in place.
+        padding: bytes = bytes(-offset % 8)
+        start: int = offset + len(padding)
+
+        return (
+            padding
+            + keys.tobytes()
+            + KEY_BLOCK_FOOTER.pack(start, len(keys), KEY_BLOCK_MAGIC)
+        )
+
+    def deserialize_binary(self, nodes: bytes) -> AVLTree:
+        """
+        Rebuild the exact AVL tree from the binary DB format, in a single pass without rotations.
+
+        Attributes:
+            nodes (bytes): Serialized bytes of nodes.
 
         Returns:
             AVLTree: Returns an AVLTree object.
         """
 
-        self.logger.info(msg=f"Deserializing the AVL tree...")
+        self.logger.info(msg="Deserializing the binary AVL tree...")
+
+        if nodes[: len(MAGIC)] != MAGIC:
+            raise ValueError("Not a binary DB file.")
+
+        # Version 1 has no key block, the nodes are stored the same way.
+        version: int = nodes[len(MAGIC)]
+        if version not in (1, VERSION):
+            raise ValueError(f"Unsupported binary DB format version {version}.")
+
+        count, offset = _read_varint(data=nodes, offset=len(MAGIC) + 1)
+
+        if METRICS.enabled:
+            METRICS.increment(name="tree.nodes_allocated", amount=count)
+
+        # Nodes in preorder, used to fill in the heights and sizes afterwards.
+        preorder: list[Node] = []
+        # Empty child slots, waiting for the next nodes in preorder.
+        slots: list[tuple[Node, int]] = []
+
+        for _ in range(count):
+            shape: int = nodes[offset]
+            key, offset = _read_varint(data=nodes, offset=offset + 1)
+            node: Node = Node(key=key)
+
+            # Attach the node to the next empty slot, the first node is the root.
+            if slots:
+                parent, side = slots.pop()
+                node.parent = parent
+                if side == HAS_LEFT:
+                    parent.left = node
+                else:
+                    parent.right = node
+
+            # The left child is next in preorder, so its slot goes on top.
+            if shape & HAS_RIGHT:
+                slots.append((node, HAS_RIGHT))
+            if shape & HAS_LEFT:
+                slots.append((node, HAS_LEFT))
+
+            preorder.append(node)
+
+        # In reverse preorder, the children are always visited before their parent.
+        for node in reversed(preorder):
+            node.update()
+
+        # Create a AVL tree and hand it the rebuilt root node.
+        tree: AVLTree = AVLTree(key=preorder[0].key)
+        tree.node = preorder[0]
+        tree.node.root = True
+
+        self.logger.info("Deserialized %s nodes from binary.", count)
+
+        return tree
+
+    @timed(name="storage.serialize.compressed")
+    def serialize_compressed(
+        self, root: Node, codec: str = "zlib", block_size: int = 4096
+    ) -> bytes:
+        """
+        Serialize the keys of a AVL tree in sorted order, into the compressed DB format.\n
+        Header: COMPRESSED_MAGIC, COMPRESSED_VERSION, the codec, the key count and the block count.
+        Index: for every block, its first key, key count, byte length and CRC32.
+        Blocks: the first key as a zigzag varint, then the gaps to the next keys as varints,
+        compressed with the codec. The tree shape is not stored, the loader rebuilds a
+        perfectly balanced tree.
+
+        Attributes:
+            root (Node): Pass the root node of the tree.
+            codec (str): Compression of the blocks, one of CODECS.
+            block_size (int): Number of keys per block.
+
+        Returns:
+            bytes: The serialized keys.
+        """
+
+        self.logger.info("Serializing the AVL tree into %s compressed blocks...", codec)
+
+        index: bytearray = bytearray()
+        blocks: list[bytes] = []
+        keys: Iterator[int] = inorder_keys(node=root)
+        count: int = 0
+
+        while True:
+            block: bytearray = bytearray()
+            previous: int | None = None
+
+            for key in keys:
+                if previous is None:
+                    _write_varint(buffer=block, value=key)
+                    _write_varint(buffer=index, value=key)
+                else:
+                    # The keys are sorted and unique, so the gap is at least 1.
+                    _write_uvarint(buffer=block, value=key - previous - 1)
+
+                previous = key
+                count += 1
+                if count % block_size == 0:
+                    break
+
+            if previous is None:
+                break
+
+            if codec == "zlib":
+                data: bytes = compress(block)
+            elif codec == "lzma":
+                import lzma
+
+                data = lzma.compress(block)
+            else:
+                data = bytes(block)
 
-        # Convert the str into an usable list[int].
-        deserialized_nodes: list[int] = list(map(int, nodes.split(sep=",")))
+            _write_uvarint(buffer=index, value=(count - 1) % block_size + 1)
+            _write_uvarint(buffer=index, value=len(data))
+            index += crc32(data).to_bytes(length=4, byteorder="little")
+            blocks.append(data)
 
-        # Get the root from the deserialized nodes list.
-        root_key: int = deserialized_nodes.pop(0)
+        header: bytearray = bytearray(COMPRESSED_MAGIC)
+        header.append(COMPRESSED_VERSION)
+        header.append(CODECS[codec])
+        _write_uvarint(buffer=header, value=count)
+        _write_uvarint(buffer=header, value=len(blocks))
+
+        self.logger.info("Serialized %s keys into %s blocks.", count, len(blocks))
+
+        return bytes(header + index) + b"".join(blocks)
+
+    def deserialize_compressed(self, nodes: bytes) -> AVLTree:
+        """
+        Decode the sorted keys of the compressed DB format, and build a balanced AVL tree.
+
+        Attributes:
+            nodes (bytes): Serialized bytes of the keys.
+
+        Returns:
+            AVLTree: Returns an AVLTree object.
+        """
+
+        self.logger.info(msg="Deserializing the compressed AVL tree...")
+
+        if nodes[: len(COMPRESSED_MAGIC)] != COMPRESSED_MAGIC:
+            raise ValueError("Not a compressed DB file.")
+
+        version: int = nodes[len(COMPRESSED_MAGIC)]
+        if version != COMPRESSED_VERSION:
+            raise ValueError(f"Unsupported compressed DB format version {version}.")
+
+        codec: int = nodes[len(COMPRESSED_MAGIC) + 1]
+        count, offset = _read_uvarint(data=nodes, offset=len(COMPRESSED_MAGIC) + 2)
+        block_count, offset = _read_uvarint(data=nodes, offset=offset)
+
+        # Read the index, the blocks follow right after it.
+        index: list[tuple[int, int, int]] = []
+        for _ in range(block_count):
+            _, offset = _read_varint(data=nodes, offset=offset)
+            size, offset = _read_uvarint(data=nodes, offset=offset)
+            length, offset = _read_uvarint(data=nodes, offset=offset)
+            checksum: int = int.from_bytes(nodes[offset : offset + 4], byteorder="little")
+            index.append((size, length, checksum))
+            offset += 4
+
+        keys: list[int] = []
+
+        for number, (size, length, checksum) in enumerate(index):
+            data: bytes = nodes[offset : offset + length]
+            offset += length
+
+            if crc32(data) != checksum:
+                raise ValueError(f"Block {number} of the compressed DB file is corrupt.")
+
+            if codec == CODECS["zlib"]:
+                data = decompress(data)
+            elif codec == CODECS["lzma"]:
+                import lzma
+
+                data = lzma.decompress(data)
+
+            # Decode the first key, then add up the gaps.
+            key, position = _read_varint(data=data, offset=0)
+            keys.append(key)
+            for _ in range(size - 1):
+                gap, position = _read_uvarint(data=data, offset=position)
+                key += gap + 1
+                keys.append(key)
+
+        if len(keys) != count:
+            raise ValueError("The compressed DB file is truncated.")
+
+        self.logger.info("Deserialized %s keys from compressed blocks.", count)
+
+        return AVLTree.from_sorted(keys=keys)
+
+    @timed(name="storage.deserialize")
+    def deserialize(self, nodes: str | bytes) -> AVLTree:
+        """
+        Deserialize the single str into an AVL tree.\n
+        Binary and compressed DB files are passed on to deserialize_binary and deserialize_compressed,
+        the keys of a paged DB file are read in order and built into a balanced tree.
+
+        Attributes:
+            nodes (str | bytes): Serialized str or bytes of nodes.
+
+        Returns:
+            AVLTree: Returns an AVLTree object.
+        """
+
+        if isinstance(nodes, bytes):
+            if nodes.startswith(COMPRESSED_MAGIC):
+                return self.deserialize_compressed(nodes=nodes)
+            if nodes.startswith(PAGED_MAGIC):
+                from paged_tree import read_keys
+
+                return AVLTree.from_sorted(keys=list(read_keys(nodes=nodes)))
+            return self.deserialize_binary(nodes=nodes)
+
+        self.logger.info(msg="Deserializing the AVL tree...")
+
+        # Convert the str into an usable iterator of int.
+        deserialized_nodes = map(int, nodes.split(sep=","))
+
+        # Get the root from the deserialized nodes.
+        root_key: int = next(deserialized_nodes)
         # Create a AVL tree with the root ey.
         tree: AVLTree = AVLTree(key=root_key)
 
-        # If the deserialized nodes list is not empty.
-        while deserialized_nodes:
-            # The the first value from the list.
-            key: int = deserialized_nodes.pop(0)
-            # Add the key as a node in the AVL tree.
+        # Add the remaining keys as nodes in the AVL tree.
+        for key in deserialized_nodes:
             tree.insert(key=key)
 
-        self.logger.info(msg=f"Deserialized the AVL tree.")
+        self.logger.info(msg="Deserialized the AVL tree.")
 
         # Return the created AVL tree.
         return tree
 
-    def store(self, nodes: str, filename: str) -> None:
+    @timed(name="storage.store")
+    def store(
+        self, nodes: str | bytes, filename: str, bloom: BloomFilter | None = None
+    ) -> None:
         """
-        Save the str of nodes in the DB file.
+        Save the str or bytes of nodes in the DB file.\n
+        The Bloom filter is stored before the DB file, so it never misses one of its keys.
 
         Attributes:
-            nodes (str): Serialized str of nodes.
+            nodes (str | bytes): Serialized str or bytes of nodes.
             filename (str): DB file path.
+            bloom (BloomFilter | None): Bloom filter of the keys, None removes an existing one.
 
         Returns:
             None
         """
 
-        self.logger.info(msg=f"Creating DB file {filename}...")
+        self.logger.info("Creating DB file %s...", filename)
 
         # Get file path to the DB file.
         filepath: str = validate_dir(filename=filename, type="DB")
 
-        self.logger.info(msg=f"DB file created: {filepath}")
+        self.logger.info("DB file created: %s", filepath)
 
-        # Open the DB file in write mode
-        DB: TextIOWrapper = open(file=filepath, mode="w")
-        # Save the AVL tree to the DB.
-        DB.write(nodes)
+        written: int
+        if is_tree_path(filename=filepath):
+            # Only this tree and its Bloom filter are written, the other trees of the
+            # container are kept as is.
+            with self.lock(filename=filepath):
+                written = self.store_bloom(bloom=bloom, filepath=filepath)
+                written += write_tree(
+                    filename=filepath,
+                    data=nodes if isinstance(nodes, bytes) else nodes.encode(),
+                )
+        else:
+            written = self.store_bloom(bloom=bloom, filepath=filepath)
+            # Save the AVL tree to the DB, binary nodes are written as is.
+            written += _replace(filepath=filepath, data=nodes)
 
-        self.logger.info(msg=f"AVL tree saved in {filepath}.")
+        if METRICS.enabled:
+            METRICS.increment(name="storage.bytes_written", amount=written)
 
-    def read(self, filename: str) -> str:
+        self.logger.info("AVL tree saved in %s.", filepath)
+
+    def store_bloom(self, bloom: BloomFilter | None, filepath: str) -> int:
+        """
+        Save the Bloom filter of a DB file next to it, or remove a stale one.
+        The Bloom filter of a tree is saved in its container, under the lock of the container.
+
+        Attributes:
+            bloom (BloomFilter | None): Bloom filter of the keys, None removes an existing one.
+            filepath (str): Path to the DB file, or to a tree of a container file.
+
+        Returns:
+            int: Number of bytes written.
+        """
+
+        if is_tree_path(filename=filepath):
+            path: str = sidecar_path(filename=filepath, suffix=BLOOM_SUFFIX)
+            with self.lock(filename=filepath):
+                if bloom is not None:
+                    return write_tree(filename=path, data=bloom.to_bytes())
+                remove_tree(filename=path)
+            return 0
+
+        if bloom is not None:
+            return _replace(filepath=filepath + BLOOM_SUFFIX, data=bloom.to_bytes())
+
+        # A stale Bloom filter would miss the new keys.
+        if os.path.exists(path=filepath + BLOOM_SUFFIX):
+            os.remove(path=filepath + BLOOM_SUFFIX)
+            _fsync_dir(path=filepath)
+
+        return 0
+
+    @timed(name="storage.read")
+    def read(self, filename: str) -> str | bytes:
         """
         Retrieves the serialized str of nodes from the DB file.
 
@@ -126,18 +686,466 @@ class StoreAVLTree:
             filename (str): Path to the DB file.
 
         Returns:
-            str: Returns the serialized str of nodes.
+            str | bytes: Returns the serialized str of nodes, or bytes for a binary or compressed DB file.
+        """
+
+        self.logger.info("Opening DB file %s...", filename)
+
+        nodes: bytes
+        if is_tree_path(filename=filename):
+            # Only this tree is read from the container.
+            nodes = read_tree(filename=filename)
+        else:
+            # Open the DB file in read mode
+            with open(file=filename, mode="rb") as DB:
+                nodes = DB.read()
+
+        if METRICS.enabled:
+            METRICS.increment(name="storage.bytes_read", amount=len(nodes))
+
+        self.logger.info("AVL tree retrieved from %s.", filename)
+
+        # Return the AVL tree nodes, text DB files are returned as a str.
+        if nodes.startswith((MAGIC, COMPRESSED_MAGIC, PAGED_MAGIC)):
+            return nodes
+        return nodes.decode()
+
+    def detect_format(self, filename: str) -> str | None:
+        """
+        Detects the format of the DB file, from its header.
+
+        Attributes:
+            filename (str): Path to the DB file.
+
+        Returns:
+            str | None: Either text, binary, compressed, paged or container, None if the DB file
+            doesn't exist.
+        """
+
+        header: bytes
+        if is_tree_path(filename=filename):
+            try:
+                header = read_tree(filename=filename, length=len(MAGIC))
+            except FileNotFoundError:
+                return None
+        elif not os.path.exists(path=filename):
+            return None
+        else:
+            with open(file=filename, mode="rb") as DB:
+                header = DB.read(len(MAGIC))
+
+        if header == MAGIC:
+            return "binary"
+        if header == COMPRESSED_MAGIC:
+            return "compressed"
+        if header == PAGED_MAGIC:
+            return "paged"
+        if header == CONTAINER_MAGIC:
+            return "container"
+        return "text"
+
+    def remove(self, filename: str) -> None:
+        """
+        Removes the DB file, or a tree from its container file.
+
+        Attributes:
+            filename (str): Path to a DB file, or to a tree of a container file.
+
+        Returns:
+            None
+        """
+
+        if is_tree_path(filename=filename):
+            with self.lock(filename=filename):
+                remove_tree(filename=filename)
+        else:
+            os.remove(path=filename)
+            _fsync_dir(path=filename)
+
+        self.logger.info("DB file %s removed.", filename)
+
+    @contextmanager
+    def lock(self, filename: str) -> Iterator[BinaryIO]:
+        """
+        Holds the exclusive advisory lock of the DB file, around a read-modify-write.\n
+        The lock is reentrant within a thread, and excludes other threads and processes.
+        The trees of a container file share the lock of the container.
+
+        Attributes:
+            filename (str): Path to a DB file, or to a tree of a container file.
+
+        Returns:
+            Iterator[BinaryIO]: The lock file, which holds the synced size of the write-ahead log.
+        """
+        filepath: str = os.path.abspath(split_tree_path(filename=filename)[0] + LOCK_SUFFIX)
+        held: dict[str, BinaryIO] = _held.__dict__.setdefault("files", {})
+
+        if filepath in held:
+            yield held[filepath]
+            return
+
+        thread_lock: threading.Lock = _thread_locks.setdefault(filepath, threading.Lock())
+
+        try:
+            descriptor: int = os.open(filepath, os.O_RDWR | os.O_CREAT, 0o644)
+        except FileNotFoundError:
+            # The lock is taken before a new DB file, and its directory, are created.
+            os.makedirs(name=os.path.dirname(filepath), exist_ok=True)
+            descriptor = os.open(filepath, os.O_RDWR | os.O_CREAT, 0o644)
+
+        with thread_lock, open(file=descriptor, mode="r+b", buffering=0) as file:
+            if fcntl:
+                fcntl.flock(file.fileno(), fcntl.LOCK_EX)
+
+            held[filepath] = file
+            try:
+                yield file
+            finally:
+                del held[filepath]
+                # Closing the file releases the flock.
+
+    @timed(name="storage.append_log")
+    def append_log(self, key: int, filename: str) -> int:
+        """
+        Append a key to the write-ahead log of the DB file, and make it durable with a group commit.\n
+        The key is appended under the lock, then the lock is taken again to fsync. Every writer, that
+        appended in the meantime, is covered by the same fsync, so it doesn't need its own.
+        The key of a tree is appended to the log of its container, after the tree name.
+
+        Attributes:
+            key (int): Key of the inserted node.
+            filename (str): Path to a DB file, or to a tree of a container file.
+
+        Returns:
+            int: Size of the write-ahead log in bytes.
+        """
+
+        filepath: str = wal_path(filename=filename)
+        tree: str | None = split_tree_path(filename=filename)[1]
+        record: bytes = (
+            f"{key}\n" if tree is None else f"{tree}{TREE_SEPARATOR}{key}\n"
+        ).encode()
+
+        # A compaction can't remove the write-ahead log, while the key is appended.
+        with self.lock(filename=filename) as lock:
+            # The Bloom filter covers the key, before readers can find it in the log.
+            add_key(filename=filename, key=key)
+
+            # One key per line, so a torn write only loses the last line.
+            with open(file=filepath, mode="a+b") as WAL:
+                end: int = WAL.seek(0, os.SEEK_END)
+                created: bool = end == 0
+
+                if end:
+                    WAL.seek(end - 1)
+                    if WAL.read(1) != b"\n":
+                        # The torn line of a crashed writer would merge with this key.
+                        WAL.seek(0)
+                        WAL.truncate(WAL.read().rfind(b"\n") + 1)
+                        # The truncated bytes may have been counted as synced.
+                        lock.seek(0)
+                        lock.write(SYNCED.pack(0))
+
+                WAL.write(record)
+                size: int = WAL.tell()
+
+            if created:
+                _fsync_dir(path=filepath)
+
+        if METRICS.enabled:
+            METRICS.increment(name="storage.bytes_written", amount=len(record))
+
+        self.sync_log(filename=filename, size=size)
+
+        self.logger.info("Key %s appended to %s.", key, filepath)
+
+        return size
+
+    def sync_log(self, filename: str, size: int) -> None:
+        """
+        Makes the write-ahead log durable up to size, unless another writer already did.
+
+        Attributes:
+            filename (str): Path to the DB file.
+            size (int): Size of the write-ahead log, after the key was appended.
+
+        Returns:
+            None
+        """
+
+        filepath: str = wal_path(filename=filename)
+
+        with self.lock(filename=filename) as lock:
+            lock.seek(0)
+            data: bytes = lock.read(SYNCED.size)
+            synced: int = SYNCED.unpack(data)[0] if len(data) == SYNCED.size else 0
+
+            # Another writer's fsync covered the key, or a compaction stored it in the DB file.
+            if synced >= size or not os.path.exists(path=filepath):
+                if METRICS.enabled:
+                    METRICS.increment(name="storage.wal_syncs_coalesced")
+                return
+
+            # The bits of the logged keys are durable before the keys.
+            sync_bloom(filename=filename)
+
+            with open(file=filepath, mode="rb") as WAL:
+                # Every key appended so far is covered, including the ones of waiting writers.
+                end: int = WAL.seek(0, os.SEEK_END)
+                os.fsync(WAL.fileno())
+
+            # Overwritten in place, the lock file is never truncated by writers.
+            lock.seek(0)
+            lock.write(SYNCED.pack(end))
+
+        if METRICS.enabled:
+            METRICS.increment(name="storage.wal_syncs")
+
+    def read_log(self, filename: str) -> list[int]:
+        """
+        Retrieves the keys from the write-ahead log of the DB file.\n
+        The keys of a tree are picked from the log of its container, by the tree name.
+
+        Attributes:
+            filename (str): Path to a DB file, or to a tree of a container file.
+
+        Returns:
+            list[int]: Keys in the order, they were appended.
+        """
+
+        filepath: str = wal_path(filename=filename)
+        tree: str | None = split_tree_path(filename=filename)[1]
+
+        if not os.path.exists(path=filepath):
+            return []
+
+        with open(file=filepath, mode="r") as WAL:
+            log: str = WAL.read()
+
+        if METRICS.enabled:
+            METRICS.increment(name="storage.bytes_read", amount=len(log))
+
+        lines: list[str] = log.split(sep="\n")
+
+        # The last line is either empty, or a torn write without a newline.
+        keys: list[int]
+        if tree is None:
+            keys = [int(line) for line in lines[:-1] if line]
+        else:
+            prefix: str = tree + TREE_SEPARATOR
+            keys = [
+                int(line[len(prefix) :]) for line in lines[:-1] if line.startswith(prefix)
+            ]
+
+        self.logger.info("%s keys retrieved from %s.", len(keys), filepath)
+
+        return keys
+
+    def clear_log(self, filename: str) -> None:
+        """
+        Removes the write-ahead log of the DB file, once it is compacted into the DB file.\n
+        A tree only removes its keys from the log of its container, the log of a container
+        file is removed with the keys of all its trees. Callers hold the lock of the DB file.
+
+        Attributes:
+            filename (str): Path to a DB file, or to a tree of a container file.
+
+        Returns:
+            None
+        """
+
+        filepath: str = wal_path(filename=filename)
+        tree: str | None = split_tree_path(filename=filename)[1]
+        # The synced size of the next write-ahead log.
+        synced: int = 0
+
+        if tree is not None and os.path.exists(path=filepath):
+            prefix: bytes = f"{tree}{TREE_SEPARATOR}".encode()
+            with open(file=filepath, mode="rb") as WAL:
+                # A torn last line is dropped, like append_log would.
+                lines: list[bytes] = WAL.read().split(sep=b"\n")[:-1]
+            kept: bytes = b"".join(
+                line + b"\n" for line in lines if not line.startswith(prefix)
+            )
+
+            # The other trees keep their keys, the new log is synced before it replaces the old one.
+            if kept:
+                synced = _replace(filepath=filepath, data=kept)
+            else:
+                os.remove(path=filepath)
+        elif os.path.exists(path=filepath):
+            os.remove(path=filepath)
+
+        # The next write-ahead log starts at offset 0 again, or at the kept keys.
+        lockpath: str = split_tree_path(filename=filename)[0] + LOCK_SUFFIX
+        if os.path.exists(path=lockpath):
+            with open(file=lockpath, mode="r+b") as lock:
+                lock.write(SYNCED.pack(synced))
+
+        self.logger.info("Write-ahead log %s cleared.", filepath)
+
+    def log_owners(self, filename: str) -> list[str]:
+        """
+        Returns the DB files, whose keys are in the write-ahead log of a DB file.\n
+        The trees of a container share its log, so they are compacted together.
+
+        Attributes:
+            filename (str): Path to a DB file, or to a tree of a container file.
+
+        Returns:
+            list[str]: The DB file itself, then the other trees with logged keys.
+        """
+
+        container, tree = split_tree_path(filename=filename)
+        filepath: str = wal_path(filename=filename)
+
+        if tree is None or not os.path.exists(path=filepath):
+            return [filename]
+
+        with open(file=filepath, mode="r") as WAL:
+            lines: list[str] = WAL.read().split(sep="\n")[:-1]
+
+        # The tree names in the order, they were first logged.
+        trees: dict[str, None] = {tree: None}
+        for line in lines:
+            trees.setdefault(line.rpartition(TREE_SEPARATOR)[0], None)
+
+        return [tree_path(filename=container, tree=name) for name in trees]
+
+
+class MappedKeyBlock:
+    """
+    Answers lookups from the sorted key block of a binary DB file, without building the tree.\n
+    The file is memory-mapped, and binary search only touches the pages it reads.
+
+    Attributes:
+        keys (memoryview): The sorted keys, cast to int64 over the mapped file.
+    """
+
+    def __init__(self, filename: str) -> None:
+        """
+        Initializes a MappedKeyBlock object, and maps the DB file.
+
+        Parameters:
+            filename (str): Path to the DB file.
+        """
+        self.file = open(file=filename, mode="rb")
+        self.map: mmap.mmap = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        start, count, magic = KEY_BLOCK_FOOTER.unpack_from(
+            self.map, len(self.map) - KEY_BLOCK_FOOTER.size
+        )
+        if magic != KEY_BLOCK_MAGIC:
+            self.close()
+            raise ValueError("The DB file has no key block.")
+
+        self.view: memoryview = memoryview(self.map)
+        self.keys: memoryview = self.view[start : start + count * 8].cast("q")
+
+    @classmethod
+    def open(cls, filename: str) -> "MappedKeyBlock | None":
+        """
+        Maps the key block of the DB file, if it has one.
+
+        Parameters:
+            filename (str): Path to the DB file.
+
+        Returns:
+            MappedKeyBlock | None: The key block, None for text DB files and older formats.
+        """
+        # The int64 keys are little endian, and the trees of a container are read whole.
+        if sys.byteorder == "big" or is_tree_path(filename=filename):
+            return None
+
+        with open(file=filename, mode="rb") as DB:
+            header: bytes = DB.read(len(MAGIC) + 1)
+            DB.seek(0, os.SEEK_END)
+            size: int = DB.tell()
+
+        # Text DB files and version 1 have no key block.
+        if len(header) <= len(MAGIC) or header[: len(MAGIC)] != MAGIC:
+            return None
+        if header[len(MAGIC)] < 2 or size < len(header) + KEY_BLOCK_FOOTER.size:
+            return None
+
+        try:
+            return cls(filename=filename)
+        except ValueError:
+            return None
+
+    def __len__(self) -> int:
+        """
+        Returns the number of keys.
+
+        Returns:
+            int: Length of the key block.
+        """
+        return len(self.keys)
+
+    def contains(self, key: int) -> bool:
+        """
+        Checks whether the key exists, with a binary search.
+
+        Parameters:
+            key (int): The value stored in the node.
+
+        Returns:
+            bool: True if the key exists.
         """
+        index: int = bisect_left(self.keys, key)
+        return index < len(self.keys) and self.keys[index] == key
+
+    def count(self, low: int, high: int) -> int:
+        """
+        Counts the keys between low and high (inclusive).
+
+        Parameters:
+            low (int): Lower bound of the keys.
+            high (int): Upper bound of the keys.
 
-        self.logger.info(msg=f"Opening DB file {filename}...")
+        Returns:
+            int: Number of keys.
+        """
+        if low > high:
+            return 0
+
+        return bisect_right(self.keys, high) - bisect_left(self.keys, low)
+
+    def range(self, low: int, high: int) -> Iterator[int]:
+        """
+        Lazily iterates over the keys between low and high (inclusive), in ascending order.
 
-        # Open the DB file in read mode
-        DB: TextIOWrapper = open(file=filename, mode="r")
+        Parameters:
+            low (int): Lower bound of the keys.
+            high (int): Upper bound of the keys.
+
+        Returns:
+            Iterator[int]: Keys of the nodes.
+        """
+        index: int = bisect_left(self.keys, low)
+
+        while index < len(self.keys) and self.keys[index] <= high:
+            yield self.keys[index]
+            index += 1
+
+    def close(self) -> None:
+        """
+        Unmaps and closes the DB file.
+
+        Returns:
+            None
+        """
+        if hasattr(self, "keys"):
+            self.keys.release()
+            self.view.release()
+        self.map.close()
+        self.file.close()
 
-        self.logger.info(msg=f"AVL tree retrieved from {filename}.")
+    def __enter__(self) -> "MappedKeyBlock":
+        return self
 
-        # Return the AVL tree nodes.
-        return DB.read()
+    def __exit__(self, *args) -> None:
+        self.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,61 @@
+from array_tree import NIL, ArrayAVLTree
+
+
+class TestArrayAVLTree:
+    """
+    Tests the array backed AVL tree functions
+    """
+
+    def check_balance(self, tree: ArrayAVLTree, index: int) -> int:
+        """
+        Validates the cached heights and balance factors of a subtree.
+
+        Returns:
+            int: Height of the subtree.
+        """
+        if index == NIL:
+            return 0
+
+        left_height: int = self.check_balance(tree=tree, index=tree.left[index])
+        right_height: int = self.check_balance(tree=tree, index=tree.right[index])
+
+        assert abs(left_height - right_height) <= 1
+        assert tree.heights[index] == max(left_height, right_height) + 1
+
+        return tree.heights[index]
+
+    def test_insert(self) -> None:
+        """
+        Testing whether, the inserts keep the tree sorted and balanced.
+
+        Returns:
+            None
+        """
+
+        keys: list[int] = [50, 20, 80, 10, 30, 25, 27, 90, 95, 5, 1, 60, 70, 65, 30]
+        tree: ArrayAVLTree = ArrayAVLTree()
+        for key in keys:
+            tree.insert(key=key)
+
+        assert list(tree.inorder()) == sorted(set(keys))
+        assert len(tree) == len(set(keys))
+        assert tree.contains(key=27) is True
+        assert tree.contains(key=28) is False
+        self.check_balance(tree=tree, index=tree.root)
+
+    def test_from_sorted(self) -> None:
+        """
+        Testing whether, the bulk built tree is balanced and can still grow.
+
+        Returns:
+            None
+        """
+
+        tree: ArrayAVLTree = ArrayAVLTree.from_sorted(keys=list(range(100)))
+        self.check_balance(tree=tree, index=tree.root)
+
+        for key in range(-50, 0):
+            tree.insert(key=key)
+
+        assert list(tree.inorder()) == list(range(-50, 100))
+        self.check_balance(tree=tree, index=tree.root)
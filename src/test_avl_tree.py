@@ -1,4 +1,40 @@
-from avl_tree import AVLTree
+import io
+import random
+from math import log2
+
+import pytest
+
+from avl_tree import AVLTree, Node
+from metrics import METRICS, configure_metrics
+
+
+def assert_valid(tree: AVLTree) -> None:
+    """
+    Asserts that every node of the tree has up to date cached values, is balanced,
+    and is linked to its parent.
+
+    Parameters:
+        tree (AVLTree): The tree.
+
+    Returns:
+        None
+    """
+    assert tree.node.root is True and tree.node.parent is None
+
+    stack: list[Node] = [tree.node]
+    while stack:
+        node: Node = stack.pop()
+
+        assert node.height == tree.max_depth(node=node)
+        assert abs(tree.calculate_balance_factor(node=node)) <= 1
+        assert node.size == 1 + sum(
+            child.size for child in (node.left, node.right) if child
+        )
+
+        for child in (node.left, node.right):
+            if child:
+                assert child.parent is node
+                stack.append(child)
 
 
 class TestAVLTree:
@@ -186,3 +222,319 @@ class TestAVLTree:
         assert tree.node.right.left is None  # type: ignore
         assert tree.node.right.right is None  # type: ignore
         assert tree.node.right.parent.key is 20  # type: ignore
+
+    def test_cached_heights(self) -> None:
+        """
+        Testing whether, the cached heights match the recomputed subtree depths.
+
+        Returns:
+            None
+        """
+
+        # Create a AVL Tree, with a mix of rotations.
+        tree: AVLTree = AVLTree(key=50)
+        tree.logger.disabled = True
+
+        for key in [20, 80, 10, 30, 25, 27, 90, 95, 5, 1, 60, 70, 65]:
+            tree.insert(key=key)
+
+        tree.logger.disabled = False
+
+        assert_valid(tree=tree)
+
+    def test_insert_scaling(self) -> None:
+        """
+        Testing whether, the insert cost grows logarithmically with the tree size,
+        counted in comparisons instead of timed, so a loaded machine can't fail it.
+
+        Returns:
+            None
+        """
+
+        # Create a AVL Tree, sorted keys are the worst case of an unbalanced tree.
+        tree: AVLTree = AVLTree(key=0)
+        tree.logger.disabled = True
+
+        batch: int = 1000
+        key: int = 1
+
+        for size in [2_000, 64_000]:
+            # Grow the tree to the given size.
+            while key < size:
+                tree.insert(key=key)
+                key += 1
+
+            # Count the comparisons of a batch of inserts at the given size.
+            configure_metrics(enabled=True)
+            METRICS.reset()
+            try:
+                for _ in range(batch):
+                    tree.insert(key=key)
+                    key += 1
+                comparisons: int = METRICS.snapshot()["counters"]["tree.comparisons"]
+            finally:
+                configure_metrics(enabled=False)
+
+            # An insert walks a single path, and the height of an AVL tree is
+            # bounded by ~1.44 log2(n).
+            assert tree.node.height <= 1.45 * log2(key + 2)
+            assert comparisons <= batch * tree.node.height
+
+        tree.logger.disabled = False
+        assert_valid(tree=tree)
+
+    def test_from_iterable(self) -> None:
+        """
+        Testing whether, the bulk built tree is balanced and keeps every unique key.
+
+        Returns:
+            None
+        """
+
+        keys: list[int] = [9, 3, 7, 3, 1, 12, 5, 9, 0, 11]
+        tree: AVLTree = AVLTree.from_iterable(keys=keys)
+
+        assert list(tree.inorder()) == sorted(set(keys))
+        assert_valid(tree=tree)
+
+    def test_lookups(self) -> None:
+        """
+        Testing whether, the point lookups and range scans return the right keys.
+
+        Returns:
+            None
+        """
+
+        keys: list[int] = [50, 20, 80, 10, 30, 25, 27, 90, 95, 5, 60, 70, 65]
+        tree: AVLTree = AVLTree(key=keys[0])
+        for key in keys[1:]:
+            tree.insert(key=key)
+
+        assert tree.contains(key=27) is True
+        assert tree.contains(key=28) is False
+
+        assert tree.floor(key=28) == 27
+        assert tree.floor(key=27) == 27
+        assert tree.floor(key=4) is None
+        assert tree.ceiling(key=28) == 30
+        assert tree.ceiling(key=96) is None
+        assert tree.predecessor(key=27) == 25
+        assert tree.successor(key=27) == 30
+        assert tree.successor(key=95) is None
+
+        assert list(tree.range(low=26, high=65)) == [27, 30, 50, 60, 65]
+        assert list(tree.range(low=-100, high=100)) == sorted(keys)
+        assert list(tree.range(low=31, high=49)) == []
+
+    def test_order_statistics(self) -> None:
+        """
+        Testing whether, the subtree sizes answer rank, select and count.
+
+        Returns:
+            None
+        """
+
+        keys: list[int] = [50, 20, 80, 10, 30, 25, 27, 90, 95, 5, 60, 70, 65, 30]
+        tree: AVLTree = AVLTree(key=keys[0])
+        for key in keys[1:]:
+            tree.insert(key=key)
+
+        ordered: list[int] = sorted(set(keys))
+
+        assert len(tree) == len(ordered)
+        assert [tree.select(k=k) for k in range(len(tree))] == ordered
+        assert [tree.rank(key=key) for key in ordered] == list(range(len(ordered)))
+        assert tree.rank(key=28) == 5
+        assert tree.rank(key=27, inclusive=True) == 5
+        assert tree.count(low=26, high=65) == 5
+        assert tree.count(low=31, high=49) == 0
+        assert tree.count(low=65, high=26) == 0
+
+    def test_logger_handlers(self) -> None:
+        """
+        Testing whether, the log handlers are only created once per process.
+
+        Returns:
+            None
+        """
+
+        first: AVLTree = AVLTree(key=1)
+        handlers: int = len(first.logger.handlers)
+        second: AVLTree = AVLTree(key=2)
+
+        assert second.logger is first.logger
+        assert len(second.logger.handlers) == handlers
+
+    def test_set_operations(self) -> None:
+        """
+        Testing whether, split, join and the set operations keep the trees balanced.
+
+        Returns:
+            None
+        """
+
+        def build(keys: set[int]) -> AVLTree:
+            tree: AVLTree = AVLTree(key=min(keys))
+            for key in sorted(keys, reverse=True):
+                tree.insert(key=key)
+            return tree
+
+        def check(tree: AVLTree | None, keys: set[int]) -> None:
+            if not keys:
+                assert tree is None
+                return
+
+            assert tree is not None
+            assert list(tree.inorder()) == sorted(keys)
+            assert len(tree) == len(keys)
+            assert_valid(tree=tree)
+
+        first: set[int] = set(range(0, 300, 3))
+        second: set[int] = set(range(0, 300, 5)) | {1000, 1001}
+
+        check(tree=build(keys=first).union(build(keys=second)), keys=first | second)
+        check(
+            tree=build(keys=first).intersection(build(keys=second)),
+            keys=first & second,
+        )
+        check(
+            tree=build(keys=first).difference(build(keys=second)),
+            keys=first - second,
+        )
+        check(tree=build(keys=first).difference(build(keys=first)), keys=set())
+
+        smaller, found, larger = build(keys=first).split(key=150)
+        assert found is True
+        check(tree=smaller, keys={key for key in first if key < 150})
+        check(tree=larger, keys={key for key in first if key > 150})
+
+        joined: AVLTree = AVLTree.join(
+            left=build(keys=set(range(200))), key=500, right=build(keys={600})
+        )
+        check(tree=joined, keys=set(range(200)) | {500, 600})
+
+    def test_show(self) -> None:
+        """
+        Testing whether, show renders the tree iteratively, and honours depth and limit.
+
+        Returns:
+            None
+        """
+
+        tree: AVLTree = AVLTree.from_sorted(keys=range(1, 8))
+        output: io.StringIO = io.StringIO()
+        tree.show(node=tree.node, prefix="Root--- ", file=output)
+
+        assert output.getvalue().splitlines() == [
+            "Root--- 4",
+            "    L--- 2",
+            "        L--- 1",
+            "        R--- 3",
+            "    R--- 6",
+            "        L--- 5",
+            "        R--- 7",
+        ]
+
+        output = io.StringIO()
+        tree.show(node=tree.node, prefix="Root--- ", file=output, depth=2)
+        assert output.getvalue().splitlines() == [
+            "Root--- 4",
+            "    L--- 2",
+            "        ... 2 more nodes",
+            "    R--- 6",
+            "        ... 2 more nodes",
+        ]
+
+        output = io.StringIO()
+        tree.show(node=tree.node.right, prefix="Root--- ", file=output, limit=2)
+        assert output.getvalue().splitlines() == [
+            "Root--- 6",
+            "    L--- 5",
+            "... output limited to 2 nodes.",
+        ]
+
+        # A degenerate chain, deeper than the recursion limit.
+        root: Node = Node(key=0)
+        node: Node = root
+        for key in range(1, 5000):
+            node.right = Node(key=key)
+            node = node.right
+
+        output = io.StringIO()
+        tree.show(node=root, file=output)
+        assert output.getvalue().count("R--- ") == 4999
+
+    def test_delete(self) -> None:
+        """
+        Testing whether, deletes and range deletes keep the tree balanced, under a mix of inserts.
+
+        Returns:
+            None
+        """
+        def check(tree: AVLTree, keys: set[int]) -> None:
+            assert list(tree.inorder()) == sorted(keys)
+            assert len(tree) == len(keys)
+            assert_valid(tree=tree)
+
+        rng: random.Random = random.Random(7)
+        keys: set[int] = set(range(0, 2000, 2))
+        tree: AVLTree = AVLTree.from_iterable(keys=keys)
+        tree.logger.disabled = True
+
+        for _ in range(2000):
+            key: int = rng.randrange(2000)
+            if rng.random() < 0.5:
+                tree.insert(key=key)
+                keys.add(key)
+            else:
+                assert tree.delete(key=key) is (key in keys)
+                keys.discard(key)
+        check(tree=tree, keys=keys)
+
+        removed: set[int] = {key for key in keys if 500 <= key <= 1499}
+        assert tree.delete_range(low=500, high=1499) == len(removed)
+        assert tree.delete_range(low=500, high=1499) == 0
+        check(tree=tree, keys=keys - removed)
+
+        tree.logger.disabled = False
+
+        # An AVL tree can't be empty.
+        with pytest.raises(ValueError):
+            AVLTree(key=1).delete(key=1)
+        with pytest.raises(ValueError):
+            tree.delete_range(low=min(keys), high=max(keys))
+
+    def test_batch(self) -> None:
+        """
+        Testing whether, insert_many keeps the tree balanced, and the batch lookups agree with the per-key ones.
+
+        Returns:
+            None
+        """
+        from array import array
+
+        rng: random.Random = random.Random(11)
+        keys: set[int] = set(range(0, 3000, 3))
+        tree: AVLTree = AVLTree.from_iterable(keys=keys)
+
+        for size in (1, 10, 500, 5000):
+            batch: list[int] = [rng.randrange(-1000, 4000) for _ in range(size)]
+            # Arrays are accepted as well, and stored as int keys.
+            added: int = tree.insert_many(keys=array("q", batch))
+            assert added == len(set(batch) - keys)
+            keys.update(batch)
+
+        assert list(tree.inorder()) == sorted(keys)
+        assert all(type(key) is int for key in tree.inorder())
+        assert_valid(tree=tree)
+
+        # Small batches are looked up per key, large ones in a snapshot.
+        for size in (5, 5000):
+            queries: list[int] = [rng.randrange(-1500, 4500) for _ in range(size)]
+            assert tree.contains_many(keys=queries) == [key in keys for key in queries]
+            assert tree.rank_many(keys=queries) == [
+                tree.rank(key=key) for key in queries
+            ]
+            assert tree.rank_many(keys=queries, inclusive=True) == [
+                tree.rank(key=key, inclusive=True) for key in queries
+            ]
@@ -0,0 +1,131 @@
+import io
+import os
+from contextlib import redirect_stdout
+
+import pytest
+
+import bloom
+import DB
+from avl_tree import AVLTree
+from bloom import (
+    BLOOM_SUFFIX,
+    BloomFilter,
+    configure_bloom,
+    may_contain,
+    parse_rate,
+    read_header,
+)
+from DB import add, get, store_node
+from storage import StoreAVLTree
+
+
+class TestBloomFilter:
+    """
+    Tests the Bloom filter functions
+    """
+
+    def test_false_positive_rate(self) -> None:
+        """
+        Testing whether, the filter has no false negatives, and about the false positive rate it was sized for.
+
+        Returns:
+            None
+        """
+        keys: range = range(0, 200_000, 2)
+        bloom_filter: BloomFilter = BloomFilter.from_keys(
+            keys=keys, capacity=len(keys), fp_rate=0.01
+        )
+
+        assert all(key in bloom_filter for key in keys)
+
+        # The odd keys were never added.
+        positives: int = sum(key in bloom_filter for key in range(1, 200_000, 2))
+        assert positives / len(keys) < 0.02
+
+        # Keys added one by one set the same bits, as the ones added in bulk.
+        added: BloomFilter = BloomFilter.for_capacity(capacity=len(keys), fp_rate=0.01)
+        for key in keys:
+            added.add(key=key)
+        assert added.words == bloom_filter.words
+
+    def test_rate(self, monkeypatch) -> None:
+        """
+        Testing whether, a false positive rate is checked the same way, from the environment and from a caller.
+
+        Returns:
+            None
+        """
+        assert parse_rate(value="0.01") == 0.01
+        assert parse_rate(value=0) == 0
+
+        invalid: tuple[str | float, ...] = ("abc", "nan", "-0.1", "1", 2.0)
+        for value in invalid:
+            with pytest.raises(ValueError):
+                parse_rate(value=value)
+            with pytest.raises(ValueError):
+                configure_bloom(fp_rate=value)
+
+        # A bad RDMS_BLOOM_FP is ignored with a warning, instead of failing the import.
+        monkeypatch.setenv("RDMS_BLOOM_FP", "abc")
+        with pytest.warns(UserWarning, match="RDMS_BLOOM_FP"):
+            assert bloom._environment_rate() is None
+
+        monkeypatch.setenv("RDMS_BLOOM_FP", "0.05")
+        assert bloom._environment_rate() == 0.05
+
+    def test_sidecar(self, tmp_path, monkeypatch) -> None:
+        """
+        Testing whether, the Bloom filter is stored next to the DB file, covers the logged keys, and answers missing keys without reading the DB file.
+
+        Returns:
+            None
+        """
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setattr(bloom, "FP_RATE", None)
+        filename: str = "./DB/tree.db"
+
+        # Without a rate, no Bloom filter is stored.
+        store_node(root=AVLTree.from_iterable(keys=range(100)).node, filename=filename)
+        assert read_header(filename=filename) is None
+        assert may_contain(filename=filename, key=1000)
+
+        configure_bloom(fp_rate=0.01)
+        store_node(root=AVLTree.from_iterable(keys=range(100)).node, filename=filename)
+        header: tuple[int, float, int] | None = read_header(filename=filename)
+        assert header is not None
+        assert header[1] == 0.01
+
+        # The logged keys are added to the Bloom filter in place.
+        StoreAVLTree().append_log(key=1000, filename=filename)
+        assert all(may_contain(filename=filename, key=key) for key in range(100))
+        assert may_contain(filename=filename, key=1000)
+
+        # A missing key is answered by the Bloom filter, without a lookup.
+        missing: int = next(
+            key for key in range(2000, 3000) if not may_contain(filename=filename, key=key)
+        )
+        with monkeypatch.context() as patch:
+            patch.setattr(DB, "contains_key", None)
+            output: io.StringIO = io.StringIO()
+            with redirect_stdout(output):
+                get(key=missing, filename=filename)
+        assert output.getvalue() == f"\nKey {missing} not found.\n\n"
+
+        # A duplicate key isn't logged again.
+        output = io.StringIO()
+        with redirect_stdout(output):
+            add(key=50, filename=filename)
+            add(key=1000, filename=filename)
+        assert output.getvalue().count("already exists") == 2
+        assert StoreAVLTree().read_log(filename=filename) == [1000]
+
+        # Without a configured rate, a stored DB file keeps its Bloom filter, 0 removes it.
+        configure_bloom(fp_rate=None)
+        store_node(root=AVLTree.from_iterable(keys=range(10)).node, filename=filename)
+        header = read_header(filename=filename)
+        assert header is not None
+        assert header[1] == 0.01
+
+        configure_bloom(fp_rate=0)
+        store_node(root=AVLTree.from_iterable(keys=range(10)).node, filename=filename)
+        assert not os.path.exists(path=filename + BLOOM_SUFFIX)
@@ -0,0 +1,101 @@
+from avl_tree import AVLTree
+from cache import NODE_BYTES, TREES, TreeCache
+from database import read_nodes, store_node
+from storage import StoreAVLTree
+
+
+class TestTreeCache:
+    """
+    Tests the tree cache functions
+    """
+
+    def test_hit_and_stale(self, tmp_path, monkeypatch) -> None:
+        """
+        Testing whether, a DB file is read once, until it or its write-ahead log change.
+
+        Returns:
+            None
+        """
+        monkeypatch.chdir(tmp_path)
+        filename: str = "./DB/tree.db"
+        TREES.invalidate()
+
+        store_node(root=AVLTree.from_iterable(keys=range(10)).node, filename=filename)
+        TREES.invalidate()
+
+        tree: AVLTree = read_nodes(filename=filename, cache=True)
+        assert read_nodes(filename=filename, cache=True) is tree
+        # Without the cache, the caller gets a tree of its own.
+        assert read_nodes(filename=filename) is not tree
+
+        # An appended key makes the cached tree stale.
+        StoreAVLTree().append_log(key=10, filename=filename)
+        reloaded: AVLTree = read_nodes(filename=filename, cache=True)
+        assert reloaded is not tree
+        assert list(reloaded.inorder()) == list(range(11))
+
+        TREES.invalidate(filename=filename)
+        assert read_nodes(filename=filename, cache=True) is not reloaded
+
+    def test_store_updates_in_place(self, tmp_path, monkeypatch) -> None:
+        """
+        Testing whether, a stored tree is cached without reading the DB file back.
+
+        Returns:
+            None
+        """
+        monkeypatch.chdir(tmp_path)
+        filename: str = "./DB/tree.db"
+        TREES.invalidate()
+
+        tree: AVLTree = AVLTree.from_iterable(keys=range(10))
+        store_node(root=tree.node, filename=filename)
+
+        assert read_nodes(filename=filename, cache=True).node is tree.node
+
+        # A new tree replaces the DB file, and the cached tree.
+        tree = AVLTree.from_iterable(keys=range(20))
+        store_node(root=tree.node, filename=filename)
+
+        assert read_nodes(filename=filename, cache=True).node is tree.node
+
+        store_node(root=tree.node, filename=filename, cache=False)
+        assert len(TREES) == 0
+
+    def test_eviction(self, tmp_path, monkeypatch) -> None:
+        """
+        Testing whether, the least recently used trees are evicted over the entry and memory budgets.
+
+        Returns:
+            None
+        """
+        monkeypatch.chdir(tmp_path)
+        cache: TreeCache = TreeCache(max_entries=2, max_bytes=25 * NODE_BYTES)
+        storage: StoreAVLTree = StoreAVLTree()
+
+        trees: dict[str, AVLTree] = {}
+        for name in ("a", "b", "c"):
+            trees[name] = AVLTree.from_iterable(keys=range(10))
+            storage.store(
+                nodes=storage.serialize_binary(root=trees[name].node), filename=name
+            )
+
+        cache.put(filename="./DB/a", tree=trees["a"])
+        cache.put(filename="./DB/b", tree=trees["b"])
+        # a is now the most recently used, so b is evicted by c.
+        assert cache.get(filename="./DB/a") is trees["a"]
+        cache.put(filename="./DB/c", tree=trees["c"])
+
+        assert cache.get(filename="./DB/b") is None
+        assert cache.get(filename="./DB/a") is trees["a"]
+        assert cache.size == 20 * NODE_BYTES
+
+        # A tree over the memory budget on its own isn't cached.
+        cache.put(filename="./DB/b", tree=AVLTree.from_iterable(keys=range(30)))
+        assert len(cache) == 2
+        assert cache.get(filename="./DB/b") is None
+
+        # 20 more nodes only fit once both trees are evicted.
+        cache.put(filename="./DB/b", tree=AVLTree.from_iterable(keys=range(20)))
+        assert len(cache) == 1
+        assert cache.size == 20 * NODE_BYTES
@@ -0,0 +1,168 @@
+import io
+import os
+from argparse import Namespace
+from contextlib import redirect_stdout
+
+import pytest
+
+import bloom
+from avl_tree import AVLTree
+from bloom import BLOOM_SUFFIX, may_contain
+from container import (
+    TREE_SEPARATOR,
+    exists,
+    is_tree_path,
+    read_catalog,
+    read_tree,
+    reclaim,
+    remove_tree,
+    split_tree_path,
+    tree_path,
+    write_tree,
+)
+from database import compact
+from DB import add, delete, read_nodes, resolve_trees, store_node
+from storage import StoreAVLTree
+
+
+class TestContainer:
+    """
+    Tests the container file functions
+    """
+
+    def test_catalog(self, tmp_path) -> None:
+        """
+        Testing whether, a tree is rewritten without moving the other trees, and reclaim drops the dead space.
+
+        Returns:
+            None
+        """
+        filename: str = str(tmp_path / "trees.db")
+        users: str = tree_path(filename=filename, tree="users")
+        orders: str = tree_path(filename=filename, tree="orders")
+
+        assert split_tree_path(filename=users) == (filename, "users")
+        assert split_tree_path(filename=filename) == (filename, None)
+        with pytest.raises(ValueError):
+            tree_path(filename=filename, tree="a/b")
+
+        write_tree(filename=users, data=b"u" * 100)
+        write_tree(filename=orders, data=b"o" * 50)
+        before: tuple[int, int] = read_catalog(filename=filename)["orders"]
+
+        # A rewritten tree is appended, the other trees stay where they are.
+        write_tree(filename=users, data=b"U" * 80)
+        assert read_catalog(filename=filename)["orders"] == before
+        assert read_tree(filename=users) == b"U" * 80
+        assert read_tree(filename=orders, length=4) == b"oooo"
+
+        assert remove_tree(filename=orders) is True
+        assert remove_tree(filename=orders) is False
+        assert not exists(filename=orders)
+
+        size: int = os.path.getsize(filename)
+        trees, reclaimed = reclaim(filename=filename)
+        assert trees == 1
+        assert os.path.getsize(filename) == size - reclaimed
+        assert read_tree(filename=users) == b"U" * 80
+        assert list(read_catalog(filename=filename)) == ["users"]
+
+    def test_reclaim_on_write(self, tmp_path, monkeypatch) -> None:
+        """
+        Testing whether, writes reclaim the dead space once it outgrows the live trees.
+
+        Returns:
+            None
+        """
+        import container
+
+        monkeypatch.setattr(container, "RECLAIM_BYTES", 0)
+        filename: str = str(tmp_path / "trees.db")
+        users: str = tree_path(filename=filename, tree="users")
+
+        for number in range(100):
+            write_tree(filename=users, data=bytes([number]) * 100)
+            # At most as much dead space as the live tree and catalog.
+            assert os.path.getsize(filename) <= 2 * (100 + 100)
+
+        assert read_tree(filename=users) == bytes([99]) * 100
+
+    def test_commands(self, tmp_path, monkeypatch) -> None:
+        """
+        Testing whether, the commands work on the trees of a container file, which share its write-ahead log, lock and file.
+
+        Returns:
+            None
+        """
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setattr(bloom, "FP_RATE", 0.01)
+        container: str = "./DB/trees.db"
+        users: str = tree_path(filename=container, tree="users")
+        orders: str = tree_path(filename=container, tree="orders")
+
+        store_node(root=AVLTree.from_iterable(keys=range(10)).node, filename=users)
+        store_node(
+            root=AVLTree.from_iterable(keys=range(100, 110)).node, filename=orders
+        )
+
+        with redirect_stdout(io.StringIO()):
+            add(key=50, filename=users)
+            add(key=200, filename=orders)
+            delete(low=100, high=104, filename=orders)
+
+        # The Bloom filters are stored in the container, next to the trees.
+        assert sorted(os.listdir(path="./DB")) == [
+            "trees.db",
+            "trees.db.lock",
+            "trees.db.wal",
+        ]
+        assert may_contain(filename=users, key=50)
+        assert not any(may_contain(filename=users, key=key) for key in range(100, 110))
+
+        # The delete only compacted the keys of orders out of the shared log.
+        assert StoreAVLTree().read_log(filename=users) == [50]
+        assert StoreAVLTree().read_log(filename=orders) == []
+        assert list(read_nodes(filename=users).inorder()) == [*range(10), 50]
+        assert list(read_nodes(filename=orders).inorder()) == [*range(105, 110), 200]
+
+        # A compaction of one tree compacts every tree of the shared log.
+        with redirect_stdout(io.StringIO()):
+            add(key=201, filename=orders)
+        compact(filename=orders)
+        assert not os.path.exists(path="./DB/trees.db.wal")
+        assert list(read_nodes(filename=users).inorder()) == [*range(10), 50]
+
+        # Removing a tree removes its Bloom filter, and vacuum only counts the trees.
+        with redirect_stdout(io.StringIO()):
+            delete(low=0, high=100, filename=users)
+        assert sorted(read_catalog(filename=container)) == [
+            "orders",
+            f"orders{TREE_SEPARATOR}{BLOOM_SUFFIX}",
+        ]
+        with StoreAVLTree().lock(filename=container):
+            assert reclaim(filename=container)[0] == 1
+
+        # --tree points every DB file argument at the tree, and a container needs it.
+        args: Namespace = Namespace(filename=container, tree="users")
+        assert resolve_trees(args=args)
+        assert args.filename == users
+
+        with redirect_stdout(io.StringIO()) as output:
+            assert not resolve_trees(args=Namespace(filename=container, tree=None))
+        assert "pick one with --tree" in output.getvalue()
+
+        # --tree on a DB file, that isn't a container file, is refused without a crash.
+        with redirect_stdout(io.StringIO()) as output:
+            add(key=1, filename="./DB/plain.db")
+            args = Namespace(filename="./DB/plain.db", tree="x")
+            assert not resolve_trees(args=args)
+        assert "doesn't hold named trees" in output.getvalue()
+        assert args.filename == "./DB/plain.db"
+        assert not exists(filename=tree_path(filename="./DB/plain.db", tree="x"))
+
+        # A # is part of a path, only --tree names a tree.
+        with redirect_stdout(io.StringIO()):
+            add(key=1, filename="./DB/my#db")
+        assert not is_tree_path(filename="./DB/my#db")
+        assert os.path.exists(path="./DB/my#db")
+        assert not os.path.exists(path="./DB/my")
@@ -0,0 +1,30 @@
+import os
+from logging import Logger
+
+from logger import LOGGER, configure_logging
+
+
+class TestLogger:
+    """
+    Tests the logger functions
+    """
+
+    def test_lazy_log_file(self, tmp_path, monkeypatch) -> None:
+        """
+        Testing whether, the log directory and file are only created by the first record.
+
+        Returns:
+            None
+        """
+        monkeypatch.chdir(tmp_path)
+        configure_logging(level="INFO")
+
+        logger: Logger = LOGGER(_name="test_logger.lazy", _filename="lazy.log")
+        logger.debug(msg="Below the log level.")
+
+        assert not os.path.exists(path="./logs")
+
+        logger.info(msg="Testing...")
+
+        assert os.path.exists(path="./logs/lazy.log")
+        assert LOGGER(_name="test_logger.lazy", _filename="lazy.log") is logger
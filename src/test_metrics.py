@@ -0,0 +1,107 @@
+from avl_tree import AVLTree
+from metrics import METRICS, Histogram, configure_metrics
+from storage import StoreAVLTree
+
+
+class TestMetrics:
+    """
+    Tests the metrics functions
+    """
+
+    def test_disabled(self) -> None:
+        """
+        Testing whether, nothing is recorded while the metrics are disabled.
+
+        Returns:
+            None
+        """
+        configure_metrics(enabled=False)
+        METRICS.reset()
+
+        tree: AVLTree = AVLTree.from_iterable(keys=range(100))
+        tree.contains(key=50)
+
+        assert METRICS.snapshot() == {"counters": {}, "histograms": {}}
+
+    def test_tree_counters(self) -> None:
+        """
+        Testing whether, inserts record their comparisons, rotations and latencies.
+
+        Returns:
+            None
+        """
+        configure_metrics(enabled=True)
+        METRICS.reset()
+
+        try:
+            # 1, 2, 3 needs a single rotation, 1, 3, 2 a double rotation.
+            for keys in ([1, 2, 3], [1, 3, 2]):
+                tree: AVLTree = AVLTree(key=keys[0])
+                for key in keys[1:]:
+                    tree.insert(key=key)
+            tree.insert(key=2)
+            tree.contains(key=3)
+
+            snapshot: dict = METRICS.snapshot()
+
+            # A bulk build allocates a node per key, and no origin node.
+            METRICS.reset()
+            AVLTree.from_iterable(keys=range(100))
+            built: dict = METRICS.snapshot()
+        finally:
+            configure_metrics(enabled=False)
+
+        assert built["counters"]["tree.nodes_allocated"] == 100
+        assert snapshot["counters"]["tree.rotations.single"] == 1
+        assert snapshot["counters"]["tree.rotations.double"] == 1
+        assert snapshot["counters"]["tree.nodes_allocated"] == 6
+        # 1 + 2 comparisons per tree, 1 for the duplicate and 2 for the lookup.
+        assert snapshot["counters"]["tree.comparisons"] == 9
+        assert snapshot["histograms"]["tree.insert"]["count"] == 5
+        assert snapshot["histograms"]["tree.find"]["count"] == 1
+
+    def test_storage_counters(self, tmp_path, monkeypatch) -> None:
+        """
+        Testing whether, storing and reading a DB file records the bytes and latencies.
+
+        Returns:
+            None
+        """
+        # The DB file is stored under ./DB/ of the temporary directory.
+        monkeypatch.chdir(tmp_path)
+        configure_metrics(enabled=True)
+        METRICS.reset()
+        storage: StoreAVLTree = StoreAVLTree()
+
+        try:
+            nodes: bytes = storage.serialize_binary(
+                root=AVLTree.from_sorted(keys=range(100)).node
+            )
+            storage.store(nodes=nodes, filename="test_metrics.db")
+            storage.deserialize(nodes=storage.read(filename="./DB/test_metrics.db"))
+
+            snapshot: dict = METRICS.snapshot()
+        finally:
+            configure_metrics(enabled=False)
+
+        assert snapshot["counters"]["storage.bytes_written"] == len(nodes)
+        assert snapshot["counters"]["storage.bytes_read"] == len(nodes)
+        for name in ("serialize.binary", "store", "read", "deserialize"):
+            assert snapshot["histograms"][f"storage.{name}"]["count"] == 1
+
+    def test_histogram(self) -> None:
+        """
+        Testing whether, the histogram percentiles are the upper bounds of their buckets.
+
+        Returns:
+            None
+        """
+        histogram: Histogram = Histogram()
+
+        for seconds in [0.000_001] * 98 + [0.000_003, 0.001]:
+            histogram.observe(seconds=seconds)
+
+        assert histogram.percentile(fraction=0.50) == 1
+        assert histogram.percentile(fraction=0.99) == 4
+        assert histogram.percentile(fraction=1.0) == 1024
+        assert histogram.snapshot()["buckets"] == {"<=1us": 98, "<=4us": 1, "<=1024us": 1}
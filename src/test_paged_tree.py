@@ -0,0 +1,144 @@
+import random
+
+import pytest
+
+from paged_tree import NIL, PagedAVLTree, read_keys
+
+
+class TestPagedAVLTree:
+    """
+    Tests the paged AVL tree functions
+    """
+
+    def check_balance(self, tree: PagedAVLTree, number: int) -> int:
+        """
+        Validates the heights and sizes of a subtree, from its pages.
+
+        Returns:
+            int: Height of the subtree.
+        """
+        if number == NIL:
+            return 0
+
+        node = tree.pool.get(number=number)
+        left_height: int = self.check_balance(tree=tree, number=node.left)
+        right_height: int = self.check_balance(tree=tree, number=node.right)
+
+        assert abs(left_height - right_height) <= 1
+        assert node.height == max(left_height, right_height) + 1
+        assert node.size == (
+            1
+            + (tree.pool.get(number=node.left).size if node.left else 0)
+            + (tree.pool.get(number=node.right).size if node.right else 0)
+        )
+
+        return node.height
+
+    def test_insert(self, tmp_path) -> None:
+        """
+        Testing whether, inserts with a tiny buffer pool write back every page, and keep the tree balanced.
+
+        Returns:
+            None
+        """
+        filename: str = str(tmp_path / "tree.db")
+        rng: random.Random = random.Random(5)
+        values: dict[int, bytes] = {}
+
+        with PagedAVLTree(filename=filename, pool_pages=2) as tree:
+            for _ in range(2000):
+                key: int = rng.randrange(-5000, 5000)
+                values[key] = str(key).encode()
+                tree.insert(key=key, value=values[key])
+
+            # An existing key only gets a new value.
+            assert tree.insert(key=key, value=b"new") is False
+            values[key] = b"new"
+
+            assert tree.pool.writes > 0
+
+        with PagedAVLTree(filename=filename) as tree:
+            assert len(tree) == len(values)
+            assert list(tree.items()) == sorted(values.items())
+            assert list(tree.range(low=-100, high=100)) == [
+                key for key in sorted(values) if -100 <= key <= 100
+            ]
+            assert tree.get(key=key) == b"new"
+            assert tree.get(key=10_000) is None
+            self.check_balance(tree=tree, number=tree.root)
+
+        with open(file=filename, mode="rb") as file:
+            assert list(read_keys(nodes=file.read())) == sorted(values)
+
+        with PagedAVLTree(filename=filename) as tree, pytest.raises(ValueError):
+            tree.insert(key=1, value=b"x" * tree.page_size)
+
+    def test_search_path_pages(self, tmp_path) -> None:
+        """
+        Testing whether, a lookup only reads the pages on its search path.
+
+        Returns:
+            None
+        """
+        filename: str = str(tmp_path / "tree.db")
+        PagedAVLTree.build(filename=filename, keys=range(100_000))
+
+        with PagedAVLTree(filename=filename, pool_pages=64) as tree:
+            height: int = tree.pool.get(number=tree.root).height
+            tree.pool.reads = 0
+
+            assert tree.contains(key=12_345)
+            assert tree.pool.reads <= height
+
+            # The upper levels stay in the buffer pool.
+            tree.pool.reads = 0
+            assert not tree.contains(key=-1)
+            assert tree.pool.reads <= height - 5
+
+            assert tree.insert(key=100_000)
+            self.check_balance(tree=tree, number=tree.root)
+
+    def test_build_keeps_values(self, tmp_path, monkeypatch) -> None:
+        """
+        Testing whether, rewriting a paged DB file keeps the values of the remaining keys.
+
+        Returns:
+            None
+        """
+        import io
+        from contextlib import redirect_stdout
+
+        from DB import add, convert, delete
+
+        monkeypatch.chdir(tmp_path)
+        filename: str = "./DB/tree.db"
+
+        with redirect_stdout(io.StringIO()):
+            for key in range(10):
+                add(key=key, filename=filename)
+            convert(filename=filename, format="paged")
+            for key in range(0, 20, 2):
+                add(key=key, filename=filename, value=f"v{key}".encode())
+            delete(low=4, high=12, filename=filename)
+
+        with PagedAVLTree(filename=filename) as tree:
+            assert list(tree.items()) == [
+                (0, b"v0"),
+                (1, b""),
+                (2, b"v2"),
+                (3, b""),
+                (14, b"v14"),
+                (16, b"v16"),
+                (18, b"v18"),
+            ]
+
+        # Without a value, an existing key keeps its value, and a new key gets an empty one.
+        output: io.StringIO = io.StringIO()
+        with redirect_stdout(output):
+            add(key=2, filename=filename)
+            add(key=20, filename=filename)
+        assert output.getvalue() == "\nKey 2 already exists.\n\n\nKey 20 added.\n\n"
+
+        with PagedAVLTree(filename=filename) as tree:
+            assert tree.get(key=2) == b"v2"
+            assert tree.get(key=20) == b""
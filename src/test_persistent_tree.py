@@ -0,0 +1,109 @@
+import random
+import threading
+
+from persistent_tree import PersistentAVLTree, PersistentNode, VersionedTree
+
+
+class TestPersistentAVLTree:
+    """
+    Tests the persistent AVL tree functions
+    """
+
+    def check_balance(self, node: PersistentNode | None) -> int:
+        """
+        Validates the heights, sizes and balance factors of a subtree.
+
+        Returns:
+            int: Height of the subtree.
+        """
+        if not node:
+            return 0
+
+        left_height: int = self.check_balance(node=node.left)
+        right_height: int = self.check_balance(node=node.right)
+
+        assert abs(left_height - right_height) <= 1
+        assert node.height == max(left_height, right_height) + 1
+        assert node.size == 1 + len(PersistentAVLTree(root=node.left)) + len(
+            PersistentAVLTree(root=node.right)
+        )
+
+        return node.height
+
+    def test_versions(self) -> None:
+        """
+        Testing whether, an insert leaves the older versions untouched.
+
+        Returns:
+            None
+        """
+
+        keys: list[int] = [50, 20, 80, 10, 30, 25, 27, 90, 95, 5, 1, 60, 70, 65]
+        versions: list[PersistentAVLTree] = [PersistentAVLTree()]
+        for key in keys:
+            versions.append(versions[-1].insert(key=key))
+
+        for count, version in enumerate(versions):
+            assert list(version.inorder()) == sorted(keys[:count])
+            self.check_balance(node=version.root)
+
+        latest: PersistentAVLTree = versions[-1]
+        assert latest.insert(key=27) is latest
+        assert list(latest.range(low=26, high=65)) == [27, 30, 50, 60, 65]
+        assert latest.contains(key=95) and not versions[8].contains(key=95)
+
+    def test_structural_sharing(self) -> None:
+        """
+        Testing whether, a new version shares the subtrees off the insert path.
+
+        Returns:
+            None
+        """
+
+        tree: PersistentAVLTree = PersistentAVLTree.from_sorted(
+            keys=list(range(0, 200, 2))
+        )
+        newer: PersistentAVLTree = tree.insert(key=1)
+
+        # The insert path goes left, so the right subtree is shared as is.
+        assert newer.root.right is tree.root.right  # type: ignore
+        assert newer.root is not tree.root
+        self.check_balance(node=newer.root)
+
+    def test_concurrent_readers(self) -> None:
+        """
+        Testing whether, readers always see a complete version while a writer inserts.
+
+        Returns:
+            None
+        """
+
+        versioned: VersionedTree = VersionedTree()
+        keys: list[int] = random.sample(range(100_000), 2_000)
+        done: threading.Event = threading.Event()
+        errors: list[str] = []
+
+        def read() -> None:
+            while not done.is_set():
+                snapshot: PersistentAVLTree = versioned.snapshot()
+                scanned: list[int] = list(snapshot.inorder())
+
+                # A version published after a batch always holds whole batches.
+                if scanned != sorted(scanned) or len(scanned) % 100:
+                    errors.append(f"Torn view of {len(scanned)} keys.")
+
+        readers: list[threading.Thread] = [
+            threading.Thread(target=read) for _ in range(4)
+        ]
+        for reader in readers:
+            reader.start()
+
+        for start in range(0, len(keys), 100):
+            versioned.insert_many(keys=keys[start : start + 100])
+
+        done.set()
+        for reader in readers:
+            reader.join()
+
+        assert errors == []
+        assert list(versioned.snapshot().inorder()) == sorted(keys)
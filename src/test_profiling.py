@@ -0,0 +1,69 @@
+import io
+import pstats
+
+from avl_tree import AVLTree
+from profiling import profile_command
+
+
+class TestProfiling:
+    """
+    Tests the profiling functions
+    """
+
+    def test_profile_command(self, tmp_path) -> None:
+        """
+        Testing whether, the profiled command writes the hotspots, allocations, pstats and collapsed stacks.
+
+        Returns:
+            None
+        """
+        stream: io.StringIO = io.StringIO()
+        output: str = str(tmp_path / "tree.pstats")
+        stacks: str = str(tmp_path / "tree.collapsed")
+
+        with profile_command(
+            profile=True,
+            limit=5,
+            output=output,
+            stacks=stacks,
+            trace_malloc=1,
+            stream=stream,
+        ):
+            tree: AVLTree = AVLTree.from_iterable(keys=range(20_000, 0, -1))
+
+        assert len(tree) == 20_000
+
+        report: str = stream.getvalue()
+        assert "Peak traced memory" in report
+        assert "Top 5 allocation sites" in report
+        assert "avl_tree.py" in report
+
+        # The pstats file can be loaded, and holds the tree functions.
+        functions: list[str] = [
+            function for _, _, function in pstats.Stats(output).stats  # type: ignore
+        ]
+        assert "from_iterable" in functions
+
+        with open(file=stacks, mode="r") as file:
+            lines: list[str] = file.read().splitlines()
+
+        # Every line is a collapsed stack and its number of samples.
+        assert lines
+        for line in lines:
+            stack, count = line.rsplit(sep=" ", maxsplit=1)
+            assert ";" in stack
+            assert int(count) > 0
+
+    def test_disabled(self) -> None:
+        """
+        Testing whether, without any option, nothing is reported.
+
+        Returns:
+            None
+        """
+        stream: io.StringIO = io.StringIO()
+
+        with profile_command(stream=stream):
+            AVLTree.from_iterable(keys=range(100))
+
+        assert stream.getvalue() == ""
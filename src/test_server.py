@@ -0,0 +1,185 @@
+import asyncio
+import os
+import threading
+
+import pytest
+
+from container import exists, tree_path
+from server import DBClient, DBServer
+
+
+class TestDBServer:
+    """
+    Tests the DB server functions
+    """
+
+    def test_execute(self, tmp_path, monkeypatch) -> None:
+        """
+        Testing whether, the requests are answered from the resident trees.
+
+        Returns:
+            None
+        """
+
+        monkeypatch.chdir(tmp_path)
+        server: DBServer = DBServer()
+
+        for key in [30, 20, 10, 40]:
+            assert server.execute(line=f"ADD ./DB/tree.db {key}") == []
+
+        assert server.execute(line="GET ./DB/tree.db 20") == ["1"]
+        assert server.execute(line="GET ./DB/tree.db 25") == ["0"]
+        assert server.execute(line="RANGE ./DB/tree.db 15 35") == ["20", "30"]
+        assert "Root--- 20" in server.execute(line="SHOW ./DB/tree.db")
+
+        # A tree of a container file is only addressed with --tree.
+        assert server.execute(line="ADD ./DB/trees.db 7 --tree users") == []
+        assert server.execute(line="GET ./DB/trees.db 7 --tree users") == ["1"]
+        assert exists(filename=tree_path(filename="./DB/trees.db", tree="users"))
+        assert not os.path.exists(path="./DB/my")
+        assert server.execute(line="ADD ./DB/my#db 7") == []
+        assert os.path.exists(path="./DB/my#db")
+
+        # A DB file, that isn't a container file, fails the request without being changed.
+        for command in ("ADD", "GET"):
+            line: str = f"{command} ./DB/tree.db 7 --tree users"
+            with pytest.raises(ValueError, match="doesn't hold named trees"):
+                server.execute(line=line)
+        with pytest.raises(ValueError, match="trees.db --tree orders doesn't exist"):
+            server.execute(line="GET ./DB/trees.db 7 --tree orders")
+
+        # A new server replays the write-ahead log from disk.
+        assert DBServer().execute(line="RANGE ./DB/tree.db 0 100") == [
+            "10",
+            "20",
+            "30",
+            "40",
+        ]
+
+    def test_client(self, tmp_path, monkeypatch) -> None:
+        """
+        Testing whether, the client talks to the server over a Unix socket.
+
+        Returns:
+            None
+        """
+
+        monkeypatch.chdir(tmp_path)
+        path: str = str(tmp_path / "db.sock")
+        loop: asyncio.AbstractEventLoop = asyncio.new_event_loop()
+        started: threading.Event = threading.Event()
+
+        async def serve() -> None:
+            await asyncio.start_unix_server(DBServer().handle, path=path)
+            started.set()
+
+        thread: threading.Thread = threading.Thread(
+            target=lambda: (loop.run_until_complete(serve()), loop.run_forever()),
+            daemon=True,
+        )
+        thread.start()
+        started.wait(timeout=5)
+
+        with DBClient(path=path) as client:
+            client.add(filename="./DB/tree.db", key=5)
+            client.add(filename="./DB/tree.db", key=1)
+
+            assert client.get(filename="./DB/tree.db", key=1) is True
+            assert client.get(filename="./DB/tree.db", key=2) is False
+            assert list(client.range(filename="./DB/tree.db", low=0, high=9)) == [1, 5]
+
+            client.add(filename="./DB/trees.db", key=3, tree="users")
+            assert client.get(filename="./DB/trees.db", key=3, tree="users") is True
+            assert client.get(filename="./DB/tree.db", key=3) is False
+
+            # A DB file that can't be read fails the request, and the connection stays open.
+            os.makedirs(name="./DB/directory.db")
+            with pytest.raises(ValueError, match="Is a directory"):
+                client.get(filename="./DB/directory.db", key=1)
+            assert client.get(filename="./DB/tree.db", key=5) is True
+
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout=5)
+
+    def test_paged(self, tmp_path, monkeypatch) -> None:
+        """
+        Testing whether, the keys the server adds to a paged DB file are found from the command line.
+
+        Returns:
+            None
+        """
+        import io
+        from argparse import Namespace
+        from contextlib import redirect_stdout
+
+        from DB import add, get, order_statistic, range_keys
+
+        monkeypatch.chdir(tmp_path)
+        filename: str = "./DB/tree.db"
+
+        with redirect_stdout(io.StringIO()):
+            for key in range(0, 10, 2):
+                add(key=key, filename=filename, value=f"v{key}".encode())
+
+        # The server only appends the keys to the write-ahead log.
+        server: DBServer = DBServer()
+        assert server.execute(line=f"ADD {filename} 20") == []
+        assert server.execute(line=f"ADD {filename} 4") == []
+
+        output: io.StringIO = io.StringIO()
+        with redirect_stdout(output):
+            get(key=20, filename=filename)
+            get(key=4, filename=filename)
+            range_keys(low=3, high=100, filename=filename)
+            order_statistic(
+                command="count", args=Namespace(low=3, high=100, filename=filename)
+            )
+        assert output.getvalue() == (
+            "\nKey 20 found.\n\n\nKey 4 found: v4\n\n4\n6\n8\n20\n"
+            "\n4 keys between 3 and 100.\n\n"
+        )
+
+    def test_other_writers(self, tmp_path, monkeypatch) -> None:
+        """
+        Testing whether, the keys added and deleted on the command line are seen by the server, and kept by its compactions.
+
+        Returns:
+            None
+        """
+        import io
+        from contextlib import redirect_stdout
+
+        from database import read_nodes
+        from DB import add, delete
+
+        monkeypatch.chdir(tmp_path)
+        filename: str = "./DB/tree.db"
+
+        # Every key, the server adds, compacts the write-ahead log.
+        server: DBServer = DBServer(compact_bytes=1)
+        for key in [10, 20]:
+            server.execute(line=f"ADD {filename} {key}")
+
+        with redirect_stdout(io.StringIO()):
+            add(key=99, filename=filename)
+        assert server.execute(line=f"GET {filename} 99") == ["1"]
+
+        with redirect_stdout(io.StringIO()):
+            add(key=98, filename=filename)
+        server.execute(line=f"ADD {filename} 30")
+        assert list(read_nodes(filename=filename).inorder()) == [10, 20, 30, 98, 99]
+
+        with redirect_stdout(io.StringIO()):
+            delete(low=20, high=20, filename=filename)
+        assert server.execute(line=f"GET {filename} 20") == ["0"]
+        assert server.execute(line=f"RANGE {filename} 0 100") == ["10", "30", "98", "99"]
+
+        # A compaction of one tree of a container keeps the keys logged for the others.
+        users: str = tree_path(filename="./DB/trees.db", tree="users")
+        server.execute(line="ADD ./DB/trees.db 1 --tree orders")
+        with redirect_stdout(io.StringIO()):
+            add(key=7, filename=users)
+            add(key=8, filename=users)
+        server.execute(line="ADD ./DB/trees.db 2 --tree orders")
+        assert list(read_nodes(filename=users).inorder()) == [7, 8]
+        assert server.execute(line="RANGE ./DB/trees.db 0 9 --tree users") == ["7", "8"]
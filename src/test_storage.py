@@ -0,0 +1,273 @@
+import pytest
+
+from avl_tree import AVLTree, Node
+from storage import (
+    CODECS,
+    COMPRESSED_MAGIC,
+    MAGIC,
+    WAL_SUFFIX,
+    MappedKeyBlock,
+    StoreAVLTree,
+)
+
+
+class TestStoreAVLTree:
+    """
+    Tests the AVL tree storage functions
+    """
+
+    def test_binary_round_trip(self) -> None:
+        """
+        Testing whether, the binary format rebuilds the exact same tree.
+
+        Returns:
+            None
+        """
+
+        # Create a AVL Tree, including negative and large keys.
+        tree: AVLTree = AVLTree(key=42)
+        for key in [7, 86, 23, 15, 91, 34, -300, 2**40, 0]:
+            tree.insert(key=key)
+
+        storage: StoreAVLTree = StoreAVLTree()
+        nodes: bytes = storage.serialize_binary(root=tree.node)
+        loaded: AVLTree = storage.deserialize(nodes=nodes)
+
+        assert nodes.startswith(MAGIC)
+        # The preorder and the shape of the tree are preserved.
+        assert storage.serialize(root=loaded.node) == storage.serialize(root=tree.node)
+
+        # Validate the links and the cached heights of every node.
+        stack: list[tuple[Node, Node]] = [(tree.node, loaded.node)]
+        while stack:
+            original, node = stack.pop()
+
+            assert node.key == original.key
+            assert node.height == original.height
+            assert (node.left is None) == (original.left is None)
+            assert (node.right is None) == (original.right is None)
+
+            if node.left:
+                assert node.left.parent is node
+                stack.append((original.left, node.left))  # type: ignore
+            if node.right:
+                assert node.right.parent is node
+                stack.append((original.right, node.right))  # type: ignore
+
+        assert loaded.node.root is True
+
+    def test_text_format(self) -> None:
+        """
+        Testing whether, the text format can still be read.
+
+        Returns:
+            None
+        """
+
+        storage: StoreAVLTree = StoreAVLTree()
+        tree: AVLTree = storage.deserialize(nodes="30,20,10")
+
+        assert tree.node.key == 20
+        assert tree.node.left.key == 10  # type: ignore
+        assert tree.node.right.key == 30  # type: ignore
+
+    def test_write_ahead_log(self, tmp_path) -> None:
+        """
+        Testing whether, the write-ahead log keeps the appended keys, and skips and drops a torn write.
+
+        Returns:
+            None
+        """
+
+        storage: StoreAVLTree = StoreAVLTree()
+        filename: str = str(tmp_path / "tree.db")
+
+        storage.append_log(key=5, filename=filename)
+        storage.append_log(key=-3, filename=filename)
+
+        # Simulate a crash in the middle of an append.
+        with open(file=filename + WAL_SUFFIX, mode="a") as WAL:
+            WAL.write("12")
+
+        assert storage.read_log(filename=filename) == [5, -3]
+
+        # The next append drops the torn line, instead of merging with it.
+        storage.append_log(key=7, filename=filename)
+        assert storage.read_log(filename=filename) == [5, -3, 7]
+
+        storage.clear_log(filename=filename)
+
+        assert storage.read_log(filename=filename) == []
+
+    def test_mapped_key_block(self, tmp_path) -> None:
+        """
+        Testing whether, the mapped key block answers lookups without building the tree.
+
+        Returns:
+            None
+        """
+
+        keys: list[int] = [42, 7, 86, 23, 15, 91, 34, -300, 0]
+        tree: AVLTree = AVLTree.from_iterable(keys=keys)
+        storage: StoreAVLTree = StoreAVLTree()
+        filename: str = str(tmp_path / "tree.db")
+
+        with open(file=filename, mode="wb") as DB:
+            DB.write(storage.serialize_binary(root=tree.node))
+
+        block: MappedKeyBlock | None = MappedKeyBlock.open(filename=filename)
+        assert block is not None
+
+        with block:
+            assert len(block) == len(keys)
+            assert block.contains(key=23) is True
+            assert block.contains(key=24) is False
+            assert block.count(low=0, high=42) == 6
+            assert list(block.range(low=-1000, high=15)) == [-300, 0, 7, 15]
+
+        # Text DB files have no key block.
+        with open(file=filename, mode="w") as DB:
+            DB.write(storage.serialize(root=tree.node))
+
+        assert MappedKeyBlock.open(filename=filename) is None
+
+    def test_compressed_round_trip(self) -> None:
+        """
+        Testing whether, the compressed format keeps every key and detects corrupt blocks.
+
+        Returns:
+            None
+        """
+
+        keys: list[int] = [-(2**70), -300, 0, 1, 2, 7, 15, 23, 34, 42, 86, 91, 2**40]
+        tree: AVLTree = AVLTree.from_iterable(keys=keys)
+        storage: StoreAVLTree = StoreAVLTree()
+
+        for codec in CODECS:
+            nodes: bytes = storage.serialize_compressed(
+                root=tree.node, codec=codec, block_size=4
+            )
+            loaded: AVLTree = storage.deserialize(nodes=nodes)
+
+            assert nodes.startswith(COMPRESSED_MAGIC)
+            assert list(loaded.inorder()) == keys
+
+        # Flip a bit in the last block.
+        corrupt: bytearray = bytearray(nodes)
+        corrupt[-1] ^= 1
+
+        with pytest.raises(ValueError):
+            storage.deserialize(nodes=bytes(corrupt))
+
+    def test_atomic_store(self, tmp_path, monkeypatch) -> None:
+        """
+        Testing whether, store replaces the DB file in one step, without leaving a temporary file.
+
+        Returns:
+            None
+        """
+        monkeypatch.chdir(tmp_path)
+        storage: StoreAVLTree = StoreAVLTree()
+
+        for keys in (range(10), range(100, 105)):
+            tree: AVLTree = AVLTree.from_sorted(keys=keys)
+            storage.store(nodes=storage.serialize_binary(root=tree.node), filename="tree.db")
+
+            assert list(
+                storage.deserialize(nodes=storage.read(filename="./DB/tree.db")).inorder()
+            ) == list(keys)
+
+        assert sorted(path.name for path in (tmp_path / "DB").iterdir()) == ["tree.db"]
+
+        # Threads of one process replacing the same file don't share a temporary file.
+        import threading
+
+        errors: list[BaseException] = []
+
+        def replace(keys: range) -> None:
+            try:
+                for _ in range(20):
+                    tree: AVLTree = AVLTree.from_sorted(keys=keys)
+                    storage.store(
+                        nodes=storage.serialize_binary(root=tree.node), filename="tree.db"
+                    )
+            except BaseException as error:
+                errors.append(error)
+
+        threads: list[threading.Thread] = [
+            threading.Thread(target=replace, args=(range(start, start + 50),))
+            for start in range(0, 400, 100)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert errors == []
+        assert sorted(path.name for path in (tmp_path / "DB").iterdir()) == ["tree.db"]
+
+    def test_concurrent_writers(self, tmp_path, monkeypatch) -> None:
+        """
+        Testing whether, concurrent writers and compactions don't lose any key.
+
+        Returns:
+            None
+        """
+        import io
+        import threading
+        from contextlib import redirect_stdout
+
+        from DB import add, read_nodes
+
+        monkeypatch.chdir(tmp_path)
+        filename: str = "./DB/tree.db"
+
+        def writer(keys: range) -> None:
+            for key in keys:
+                # A tiny write-ahead log, so the writers keep compacting each other's keys.
+                add(key=key, filename=filename, compact_bytes=64)
+
+        with redirect_stdout(io.StringIO()):
+            threads: list[threading.Thread] = [
+                threading.Thread(target=writer, args=(range(start, 200, 4),))
+                for start in range(4)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        assert list(read_nodes(filename=filename).inorder()) == list(range(200))
+
+    def test_delete_logged_keys(self, tmp_path, monkeypatch) -> None:
+        """
+        Testing whether, deleted keys are not replayed from the write-ahead log.
+
+        Returns:
+            None
+        """
+        import io
+        from contextlib import redirect_stdout
+
+        from DB import add, delete, read_nodes
+
+        monkeypatch.chdir(tmp_path)
+        filename: str = "./DB/tree.db"
+
+        with redirect_stdout(io.StringIO()):
+            for key in range(20):
+                add(key=key, filename=filename)
+
+            delete(low=5, high=5, filename=filename)
+            delete(low=10, high=14, filename=filename)
+
+        assert not (tmp_path / "DB" / f"tree.db{WAL_SUFFIX}").exists()
+        assert list(read_nodes(filename=filename).inorder()) == [
+            key for key in range(20) if key != 5 and not 10 <= key <= 14
+        ]
+
+        # Deleting every key removes the DB file.
+        with redirect_stdout(io.StringIO()):
+            delete(low=0, high=19, filename=filename)
+
+        assert not (tmp_path / "DB" / "tree.db").exists()
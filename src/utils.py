@@ -1,4 +1,7 @@
+import heapq
 import os
+from collections.abc import Iterable, Iterator
+from itertools import islice
 
 
 def validate_dir(filename: str, type: str) -> str:
@@ -13,12 +16,76 @@ def validate_dir(filename: str, type: str) -> str:
         str: Returns the filepath to the log/txt file.
     """
     # Log files directory.
-    file_dir: str = "./logs/" if type is "LOG" else "./DB/"
+    file_dir: str = "./logs/" if type == "LOG" else "./DB/"
     # Path to the log file.
     filepath: str = os.path.join(file_dir, filename)
 
-    # If the file directory doesn't exist, create the directory.
-    if not os.path.exists(path=file_dir):
-        os.makedirs(name=file_dir)
+    # Create the file directory, if it doesn't exist yet.
+    os.makedirs(name=file_dir, exist_ok=True)
 
     return filepath
+
+
+def parse_keys(lines: Iterable[str]) -> Iterator[int]:
+    """
+    Streams int keys from lines of text, separated by whitespace or commas.
+
+    Parameters:
+        lines (Iterable[str]): Lines of a file or stdin.
+
+    Returns:
+        Iterator[int]: Keys in the order, they were read.
+    """
+    for line in lines:
+        for token in line.replace(",", " ").split():
+            yield int(token)
+
+
+def sorted_unique(keys: Iterable[int], chunk_size: int = 1_000_000) -> Iterator[int]:
+    """
+    Sorts and dedupes keys in chunks, chunks that don't fit in memory are merged from temporary files.
+
+    Parameters:
+        keys (Iterable[int]): Keys in any order.
+        chunk_size (int): Max number of keys sorted in memory at once.
+
+    Returns:
+        Iterator[int]: Unique keys in ascending order.
+    """
+    # Only needed once a chunk is spilled, so importing utils stays cheap.
+    import tempfile
+
+    iterator: Iterator[int] = iter(keys)
+    # Sorted chunks, that are spilled to temporary files.
+    runs: list = []
+
+    try:
+        while True:
+            chunk: list[int] = list(islice(iterator, chunk_size))
+            # If the chunk isn't full, there are no more keys.
+            exhausted: bool = len(chunk) < chunk_size
+            chunk = sorted(set(chunk))
+
+            # A single chunk doesn't need to be spilled.
+            if not runs and exhausted:
+                yield from chunk
+                return
+
+            if chunk:
+                run = tempfile.TemporaryFile(mode="w+")
+                run.writelines(f"{key}\n" for key in chunk)
+                run.seek(0)
+                runs.append(run)
+
+            if exhausted:
+                break
+
+        # Merge the sorted runs, and drop the keys that are in more than one run.
+        previous: int | None = None
+        for key in heapq.merge(*(map(int, run) for run in runs)):
+            if key != previous:
+                yield key
+                previous = key
+    finally:
+        for run in runs:
+            run.close()